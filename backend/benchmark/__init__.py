@@ -0,0 +1,13 @@
+"""性能基准测试包.
+
+在 backend 目录下以模块方式运行，例如 python -m benchmark.decrypt
+
+common      -- 公共工具
+decrypt     -- 回调解密
+middleware  -- 中间件开销
+startup     -- 启动耗时
+memory      -- worker 内存占用(preload_app 对比)
+lark_stub   -- 飞书开放平台和业务方接口的本地替身服务
+load        -- 端到端压测
+relation    -- 关联字段映射(大表单)
+"""
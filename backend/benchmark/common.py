@@ -0,0 +1,79 @@
+"""基准测试公共工具."""
+
+import base64
+import hashlib
+import os
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from Crypto.Cipher import AES
+
+from src.lib import const
+
+
+def encrypt(key: str, plaintext: str) -> str:
+    """按飞书回调的方式加密，与 util._AESCipher 对应.
+
+    Args:
+        key: 加密密钥.
+        plaintext: 明文.
+
+    Returns:
+        base64 编码的密文.
+    """
+    data = plaintext.encode(const.UTF_8)
+    pad = AES.block_size - len(data) % AES.block_size
+    data += bytes([pad]) * pad
+    iv = os.urandom(AES.block_size)
+    cipher = AES.new(hashlib.sha256(key.encode(const.UTF_8)).digest(), AES.MODE_CBC, iv)
+    return base64.b64encode(iv + cipher.encrypt(data)).decode(const.UTF_8)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """计算分位数.
+
+    Args:
+        samples: 样本.
+        q: 分位，取值 0-100.
+
+    Returns:
+        分位数.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def timeit(func: Callable[[], Any], number: int) -> list[float]:
+    """多次执行并记录每次耗时.
+
+    Args:
+        func: 被测函数.
+        number: 执行次数.
+
+    Returns:
+        每次耗时(秒).
+    """
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(title: str, samples: list[float]) -> None:
+    """打印耗时统计，单位微秒.
+
+    Args:
+        title: 标题.
+        samples: 每次耗时(秒).
+    """
+    us = [sample * 1e6 for sample in samples]
+    print(
+        f"{title:<40} n={len(us):<7} mean={statistics.fmean(us):9.2f}us "
+        f"p50={percentile(us, 50):9.2f}us p99={percentile(us, 99):9.2f}us"
+    )
@@ -0,0 +1,102 @@
+"""回调解密基准测试.
+
+对比优化前后每个回调的解密开销:
+    before -- 每次新建 _AESCipher(重新计算 sha256 摘要)，并通过 asyncify 放到线程池
+    after  -- 复用进程内的解密器，小内容直接在事件循环中解密
+
+运行: python -m benchmark.decrypt
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+from asyncer import asyncify
+
+from benchmark import common
+from src.lib import schema
+from src.lib import util
+from src.lib.config import settings
+
+
+KEY = "benchmark-encrypt-key"
+
+
+def _make_event(size: int) -> str:
+    """构造接近真实审批任务事件的回调内容.
+
+    Args:
+        size: 额外填充的字节数，模拟更大的事件.
+
+    Returns:
+        加密后的回调内容.
+    """
+    event = {
+        "uuid": "41b5f371157e3d5341b38b20396e77a3",
+        "token": "2g7als3DgPW6Xp1xEpmcvgVhQG621bFY",
+        "ts": "1502199207.7171419",
+        "type": "event_callback",
+        "event": {
+            "app_id": "cli_xxx",
+            "approval_code": "7C468A54-8745-2245-9675-08B7C63E7A85",
+            "instance_code": "81D31358-93AF-92D6-7425-01A5D67C4E71",
+            "task_id": "12345",
+            "user_id": "b84ba6ef",
+            "status": "PENDING",
+            "type": "approval_task",
+            "operate_time": "1502199207000",
+            "tenant_key": "2d520d3b434f175e",
+            "padding": "x" * size,
+        },
+    }
+    return common.encrypt(KEY, orjson.dumps(event).decode())
+
+
+def _decrypt_before(content: str) -> schema.LarkEventContext:
+    """优化前的解密实现."""
+    return schema.LarkEventContext(**orjson.loads(util._AESCipher(KEY).decrypt_str(content)))
+
+
+async def _run_async(func: Callable[[str], Awaitable[Any]], content: str, number: int) -> list[float]:
+    """在事件循环中多次执行异步解密并记录耗时."""
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        await func(content)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--number", type=int, default=20000, help="每组执行次数")
+    args = parser.parse_args()
+
+    settings.lark.encrypt_key = KEY
+
+    for size in (0, 4 * 1024, 64 * 1024):
+        content = _make_event(size)
+        print(f"# payload {len(content)} bytes")
+        common.report(
+            "cpu    before (new cipher)", common.timeit(lambda content=content: _decrypt_before(content), args.number)
+        )
+        common.report(
+            "cpu    after  (cached cipher)", common.timeit(lambda content=content: util.decrypt(content), args.number)
+        )
+        common.report(
+            "async  before (new cipher + thread)",
+            asyncio.run(_run_async(asyncify(_decrypt_before), content, args.number // 10)),
+        )
+        common.report(
+            "async  after  (decrypt_async)",
+            asyncio.run(_run_async(util.decrypt_async, content, args.number // 10)),
+        )
+
+
+if __name__ == "__main__":
+    main()
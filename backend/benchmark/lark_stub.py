@@ -0,0 +1,179 @@
+"""飞书开放平台和业务方接口的本地替身服务.
+
+实现 lark-ticket 用到的接口，配合 [LARK] domain 指向本服务后即可在本地压测，不访问真实飞书:
+    POST /open-apis/auth/v3/tenant_access_token/internal        -- 获取 tenant_access_token
+    GET  /open-apis/approval/v4/instances/{instance_id}           -- 审批实例详情
+    POST /open-apis/approval/v4/tasks/approve                     -- 同意审批任务
+    POST /open-apis/approval/v4/tasks/reject                      -- 拒绝审批任务
+    GET  /open-apis/approval/v4/approvals/{approval_code}         -- 审批定义详情
+    POST /open-apis/approval/v4/approvals/{approval_code}/subscribe、unsubscribe -- 订阅、取消订阅
+    POST /webhook/check、/webhook/execute                         -- 检查、执行节点的业务方接口(同步返回结果)
+    GET  /stats、POST /stats/reset                                -- 各接口调用次数，供 benchmark.load 统计端到端完成数
+
+审批实例详情中的 instance_code 与请求的 instance_id 相同，任务位于 --node 指定的节点，
+表单包含 --form-fields 个控件。审批定义包含检查、执行节点和 OTHER_NODE，节点 id 与名称相同。
+
+运行: python -m benchmark.lark_stub
+"""
+
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Any
+
+import orjson
+import uvicorn
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+
+from src.lib import const
+from src.lib.config import settings
+
+
+# 替身服务和压测工具默认使用的审批定义 code
+APPROVAL_CODE = "BENCHMARK-APPROVAL"
+# 审批定义中检查、执行节点之外的节点，节点 id 与名称相同
+OTHER_NODE = "benchmark_other_node"
+
+
+def _ok(data: dict[str, Any] | None = None) -> ORJSONResponse:
+    """飞书接口成功响应."""
+    return ORJSONResponse({"code": 0, "msg": "success", "data": data or {}})
+
+
+def _make_form(fields: int) -> str:
+    """构造审批表单，与飞书返回的 form 字段格式相同."""
+    return orjson.dumps(
+        [
+            {"id": f"widget{index}", "name": f"字段{index}", "type": "input", "value": f"value-{index}"}
+            for index in range(fields)
+        ]
+    ).decode()
+
+
+def make_app(args: argparse.Namespace) -> FastAPI:
+    """创建替身服务.
+
+    Args:
+        args: 命令行参数.
+
+    Returns:
+        FastAPI 应用.
+    """
+    app = FastAPI(default_response_class=ORJSONResponse)
+    stats: Counter[str] = Counter()
+    form = _make_form(args.form_fields)
+    node_list = [
+        {"name": name, "node_id": name, "custom_node_id": name, "node_type": "AND", "need_approver": True}
+        for name in (const.LARK_CHECK_NODE_NAME, const.LARK_EXECUTE_NODE_NAME, OTHER_NODE)
+    ]
+
+    async def _lark_latency(api: str) -> ORJSONResponse | None:
+        """模拟飞书接口耗时和限流，被限流时返回限流响应."""
+        stats[api] += 1
+        await asyncio.sleep(args.latency_ms / 1000)
+        if random.random() < args.rate_limit_ratio:
+            stats[f"{api}_rate_limited"] += 1
+            return ORJSONResponse(
+                {"code": const.LARK_RATE_LIMIT_CODES[0], "msg": "request trigger frequency limit"},
+                status_code=const.LARK_RATE_LIMIT_HTTP_STATUS,
+            )
+        return None
+
+    @app.post(const.LARK_TENANT_ACCESS_TOKEN_URI)
+    async def tenant_access_token():
+        stats["tenant_access_token"] += 1
+        return {"code": 0, "msg": "ok", "tenant_access_token": "t-benchmark", "expire": 7200}
+
+    @app.get("/open-apis/approval/v4/instances/{instance_id}")
+    async def get_instance(instance_id: str):
+        if (limited := await _lark_latency("instance_get")) is not None:
+            return limited
+        return _ok(
+            {
+                "approval_code": args.approval_code,
+                "approval_name": "benchmark",
+                "instance_code": instance_id,
+                "status": "PENDING",
+                "uuid": instance_id,
+                "form": form,
+                "task_list": [
+                    {
+                        "id": f"{instance_id}-task",
+                        "user_id": settings.lark.assistant_user_id,
+                        "status": "PENDING",
+                        "node_id": args.node,
+                        "node_name": args.node,
+                        "type": "AND",
+                    }
+                ],
+            }
+        )
+
+    @app.post("/open-apis/approval/v4/tasks/approve")
+    async def approve_task():
+        return await _lark_latency("task_approve") or _ok()
+
+    @app.post("/open-apis/approval/v4/tasks/reject")
+    async def reject_task():
+        return await _lark_latency("task_reject") or _ok()
+
+    @app.get("/open-apis/approval/v4/approvals/{approval_code}")
+    async def get_approval(approval_code: str):
+        if (limited := await _lark_latency("approval_get")) is not None:
+            return limited
+        return _ok({"approval_name": "benchmark", "status": "ACTIVE", "form": form, "node_list": node_list})
+
+    @app.post("/open-apis/approval/v4/approvals/{approval_code}/subscribe")
+    async def subscribe(approval_code: str):
+        return await _lark_latency("approval_subscribe") or _ok()
+
+    @app.post("/open-apis/approval/v4/approvals/{approval_code}/unsubscribe")
+    async def unsubscribe(approval_code: str):
+        return await _lark_latency("approval_unsubscribe") or _ok()
+
+    @app.post("/webhook/{node}")
+    async def webhook(node: str, request: Request):
+        stats[f"webhook_{node}"] += 1
+        body = orjson.loads(await request.body())
+        await asyncio.sleep(args.webhook_latency_ms / 1000)
+        return {"ticket_id": body.get("ticket_id", ""), "result": not args.webhook_reject, "msg": "", "error": ""}
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.clear()
+        return {}
+
+    return app
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=9000, help="监听端口")
+    parser.add_argument("--approval-code", default=APPROVAL_CODE, help="审批实例所属的审批定义 code")
+    parser.add_argument(
+        "--node",
+        default=const.LARK_CHECK_NODE_NAME,
+        choices=[const.LARK_CHECK_NODE_NAME, const.LARK_EXECUTE_NODE_NAME],
+        help="审批任务所在节点",
+    )
+    parser.add_argument("--form-fields", type=int, default=20, help="审批表单控件数")
+    parser.add_argument("--latency-ms", type=float, default=20, help="飞书接口模拟耗时(毫秒)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="飞书接口返回限流的比例，取值 0-1")
+    parser.add_argument("--webhook-latency-ms", type=float, default=20, help="业务方接口模拟耗时(毫秒)")
+    parser.add_argument("--webhook-reject", action="store_true", help="业务方接口返回失败，审批被拒绝")
+    args = parser.parse_args()
+
+    uvicorn.run(make_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""端到端压测.
+
+按固定速率向 /api/v1/lark/callback 发送加密的审批任务事件，统计吞吐和响应耗时分位数。
+发送按计划时间进行(开环)，耗时从计划发送时间算起，服务变慢时排队的时间也计入耗时。
+
+配合 benchmark.lark_stub 使用时，还会统计从开始发送到替身服务收到同意、拒绝请求的端到端完成数:
+    1. 启动替身服务: python -m benchmark.lark_stub
+    2. 将配置文件 [LARK] domain 改为 http://127.0.0.1:9000，启动 lark-ticket
+    3. 压测: python -m benchmark.load --setup --stub http://127.0.0.1:9000 --rate 200 --duration 30
+
+--setup 通过管理接口创建(或更新)压测用的审批定义配置，检查、执行节点同步调用替身服务的业务方接口。
+--other-node 按比例发送检查、执行节点之外的任务事件，这些事件不会拉取审批实例详情，结束时输出替身服务收到的飞书接口调用数。
+加密密钥和审批助手 user id 取自本地配置文件，需要与被测服务一致。
+
+运行: python -m benchmark.load
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+import orjson
+
+from benchmark import common
+from benchmark import lark_stub
+from src.lib import const
+from src.lib import enum
+from src.lib.config import settings
+
+
+def _make_event(approval_code: str, user_id: str, node: str) -> dict:
+    """构造一个审批任务事件，每次的实例和事件 id 都不同."""
+    instance_code = os.urandom(16).hex()
+    return {
+        "uuid": os.urandom(16).hex(),
+        "token": settings.lark.verification_token,
+        "ts": f"{time.time():.7f}",
+        "type": "event_callback",
+        "event": {
+            "app_id": settings.lark.app_id,
+            "approval_code": approval_code,
+            "instance_code": instance_code,
+            "task_id": f"{instance_code}-task",
+            "user_id": user_id,
+            "status": const.LARK_CALLBACK_APPROVAL_TASK_STATUS,
+            "type": const.LARK_EVENT_TYPE_APPROVAL_TASK,
+            "operate_time": str(int(time.time() * 1000)),
+            "def_key": node,
+            "custom_key": node,
+        },
+    }
+
+
+def _make_payloads(args: argparse.Namespace) -> tuple[list[bytes], int]:
+    """预先生成加密后的请求体，避免加密开销影响发送速率.
+
+    Returns:
+        (请求体列表, 需要处理的事件数).
+    """
+    total = int(args.rate * args.duration)
+    payloads = []
+    relevant = 0
+    for _ in range(total):
+        noise = random.random() < args.noise
+        other_node = not noise and random.random() < args.other_node
+        user_id = "benchmark-other-user" if noise else settings.lark.assistant_user_id
+        node = lark_stub.OTHER_NODE if other_node else args.node
+        relevant += not noise and not other_node
+        encrypted = common.encrypt(
+            settings.lark.encrypt_key, orjson.dumps(_make_event(args.approval_code, user_id, node)).decode()
+        )
+        payloads.append(orjson.dumps({"encrypt": encrypted}))
+    return payloads, relevant
+
+
+async def _setup(client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+    """创建或更新压测用的审批定义配置."""
+    node = {"is_open": True, "call_type": enum.APICallType.SYNC.value}
+    body = {
+        "approval_code": args.approval_code,
+        "name": "benchmark",
+        "check": {**node, "url": f"{args.stub}/webhook/check"},
+        "execute": {**node, "url": f"{args.stub}/webhook/execute"},
+        "field": {"is_open": False, "data": []},
+        "relation": {"is_open": False, "data": []},
+    }
+    url = f"{args.url}/api/v1/web/config"
+    response = await client.post(url, json=body)
+    if response.json().get("retcode") != enum.HTTPBusinessStatusCode.SUCCESS.value:
+        response = await client.put(url, json=body)
+    response.raise_for_status()
+    print(f"# setup {args.approval_code}: {response.json()}")
+
+
+async def _completed(client: httpx.AsyncClient, stub: str) -> int:
+    """替身服务收到的同意、拒绝请求数."""
+    stats = (await client.get(f"{stub}/stats")).json()
+    return stats.get("task_approve", 0) + stats.get("task_reject", 0)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    """执行压测."""
+    payloads, relevant = _make_payloads(args)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if args.setup:
+            await _setup(client, args)
+        if args.stub:
+            await client.post(f"{args.stub}/stats/reset")
+
+        url = f"{args.url}/api/v1/lark/callback"
+        headers = {"content-type": "application/json"}
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+        errors = 0
+
+        async def _send(payload: bytes, scheduled: float) -> None:
+            nonlocal errors
+            async with semaphore:
+                try:
+                    response = await client.post(url, content=payload, headers=headers)
+                    if response.status_code != 200 or response.json().get("msg") != "success":
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+            latencies.append(time.perf_counter() - scheduled)
+
+        start = time.perf_counter()
+        tasks = []
+        for index, payload in enumerate(payloads):
+            scheduled = start + index / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(_send(payload, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        ms = [latency * 1000 for latency in latencies]
+        print(
+            f"# callbacks rate {args.rate}/s duration {args.duration}s noise {args.noise:.0%} "
+            f"other node {args.other_node:.0%}"
+        )
+        print(
+            f"sent={len(payloads)} errors={errors} throughput={len(payloads) / elapsed:.1f}/s "
+            f"mean={statistics.fmean(ms):.2f}ms p50={common.percentile(ms, 50):.2f}ms "
+            f"p90={common.percentile(ms, 90):.2f}ms p99={common.percentile(ms, 99):.2f}ms max={max(ms):.2f}ms"
+        )
+
+        if not args.stub:
+            return
+        # 回调在后台任务中处理，等待替身服务收到全部同意、拒绝请求或超时
+        completed = await _completed(client, args.stub)
+        deadline = time.perf_counter() + args.wait
+        while completed < relevant and time.perf_counter() < deadline:
+            await asyncio.sleep(0.2)
+            completed = await _completed(client, args.stub)
+        total = time.perf_counter() - start
+        print(f"completed={completed}/{relevant} in {total:.1f}s end-to-end throughput={completed / total:.1f}/s")
+        stats = (await client.get(f"{args.stub}/stats")).json()
+        print(
+            f"lark api calls: instance_get={stats.get('instance_get', 0)} approval_get={stats.get('approval_get', 0)}"
+        )
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=f"http://127.0.0.1:{settings.basic.port}", help="被测服务地址")
+    parser.add_argument("--rate", type=float, default=100, help="每秒发送的回调数")
+    parser.add_argument("--duration", type=float, default=10, help="发送时长(秒)")
+    parser.add_argument("--concurrency", type=int, default=200, help="最大并发请求数")
+    parser.add_argument("--timeout", type=float, default=10, help="单个请求超时时间(秒)")
+    parser.add_argument("--noise", type=float, default=0.0, help="其他审批人事件的比例，取值 0-1")
+    parser.add_argument(
+        "--other-node", type=float, default=0.0, help="审批助手在检查、执行节点之外的任务事件比例，取值 0-1"
+    )
+    parser.add_argument(
+        "--node",
+        default=const.LARK_CHECK_NODE_NAME,
+        choices=[const.LARK_CHECK_NODE_NAME, const.LARK_EXECUTE_NODE_NAME],
+        help="事件中的节点 id，需要与替身服务的 --node 一致",
+    )
+    parser.add_argument("--approval-code", default=lark_stub.APPROVAL_CODE, help="事件所属的审批定义 code")
+    parser.add_argument("--stub", default="", help="替身服务地址，指定后统计端到端完成数")
+    parser.add_argument("--setup", action="store_true", help="压测前创建压测用的审批定义配置，需要同时指定 --stub")
+    parser.add_argument("--wait", type=float, default=30, help="发送结束后等待端到端完成的最长时间(秒)")
+    args = parser.parse_args()
+
+    if args.setup and not args.stub:
+        parser.error("--setup requires --stub")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""worker 内存基准测试.
+
+模拟 gunicorn 的 fork 模型，比较每个 worker 的内存占用:
+    no-preload      -- 每个 worker 在 fork 后各自导入应用和飞书 SDK(默认模式)
+    preload         -- 主进程导入后再 fork(preload_app = true，但不冻结 gc)
+    preload+freeze  -- 主进程导入并 gc.freeze() 后再 fork(preload_app = true)
+
+worker 创建应用、飞书客户端并执行一次完整 gc 后测量，不需要数据库。
+rss 包含与主进程共享的内存页，应重点关注 pss 和 uss。
+
+运行: python -m benchmark.memory
+"""
+
+import argparse
+import gc
+import os
+import signal
+import statistics
+import subprocess
+import sys
+
+import orjson
+
+from src.lib import metrics
+
+
+MODES = ["no-preload", "preload", "preload+freeze"]
+
+
+def _load() -> None:
+    """导入应用和飞书 SDK."""
+    import src.app  # noqa: F401
+    from src.lib.call import lark_api
+
+    lark_api.import_sdk()
+
+
+def _worker(preload: bool, ready: int) -> None:
+    """模拟 worker: 初始化后通知主进程并等待被结束.
+
+    Args:
+        preload: 主进程是否已经导入.
+        ready: 通知主进程的管道写端.
+    """
+    if not preload:
+        _load()
+    from src.app import make_app
+    from src.lib.call import lark_api
+
+    make_app()
+    lark_api._load_sdk()
+    gc.collect()
+    os.write(ready, b"1")
+    signal.pause()
+
+
+def _run_mode(mode: str, workers: int) -> dict[str, float]:
+    """按指定模式 fork worker 并测量内存.
+
+    Args:
+        mode: 模式.
+        workers: worker 数.
+
+    Returns:
+        每个 worker 的平均内存(MB).
+    """
+    preload = mode != "no-preload"
+    if preload:
+        _load()
+        if mode == "preload+freeze":
+            gc.freeze()
+
+    read, write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            _worker(preload, write)
+            os._exit(0)
+        pids.append(pid)
+    os.close(write)
+
+    for _ in pids:
+        os.read(read, 1)
+    usages = [metrics.read_process_memory(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    return {kind: round(statistics.fmean(usage[kind] for usage in usages) / 2**20, 1) for kind in ("rss", "pss", "uss")}
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-w", "--workers", type=int, default=4, help="worker 数")
+    parser.add_argument("--mode", choices=MODES, help="只运行指定模式并输出 JSON，供内部调用")
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        print(orjson.dumps(_run_mode(args.mode, args.workers)).decode())
+        return
+
+    if not metrics.read_process_memory():
+        print("需要 Linux 的 /proc/<pid>/smaps_rollup")
+        return
+
+    print(f"# workers {args.workers}, average per worker")
+    for mode in MODES:
+        # 每种模式在新的进程中运行，避免相互影响
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmark.memory", "--mode", mode, "--workers", str(args.workers)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = orjson.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<16} rss={result['rss']:7.1f}MB pss={result['pss']:7.1f}MB uss={result['uss']:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""中间件基准测试.
+
+对比 BaseHTTPMiddleware 与纯 ASGI 实现的请求耗时和吞吐:
+    none   -- 不加中间件，作为基线
+    before -- 基于 BaseHTTPMiddleware 的旧实现
+    after  -- 纯 ASGI 实现(src.lib.middleware)
+
+被测接口为 /api/v1/lark/callback 的桩实现，只解析请求体并返回固定响应，
+以便排除解密、数据库等开销，单独体现中间件本身的成本。
+
+运行: python -m benchmark.middleware
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.base import RequestResponseEndpoint
+from starlette.responses import Response
+
+from benchmark import common
+from src.lib import exceptions
+from src.lib import middleware
+from src.lib import util
+
+
+class LegacyResponseTimeMiddleware(BaseHTTPMiddleware):
+    """优化前的请求响应时间中间件."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Any:
+        """处理请求并记录响应时间."""
+        start_time = time.time()
+        response = await call_next(request)
+        if request.url.path != "/healthcheck" and "form-data" not in request.headers.get("content-type", ""):
+            logger.info(
+                f"response: Method {request.method} - {request.url.path} - "
+                f"code: {response.status_code} "
+                f"{(time.time() - start_time) * 1000:.2f}ms"
+            )
+        return response
+
+
+class LegacyCatchExceptionsMiddleware(BaseHTTPMiddleware):
+    """优化前的异常捕获中间件."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        """处理请求并捕获异常."""
+        try:
+            return await call_next(request)
+        except Exception as e:
+            if not isinstance(e, exceptions.IgnoreException):
+                logger.exception(e)
+            return ORJSONResponse(util.make_response_not_ok(str(e)))
+
+
+def _make_app(response_time: type | None, catch_exceptions: type | None) -> FastAPI:
+    """构造只包含回调桩接口的应用.
+
+    Args:
+        response_time: 响应时间中间件类.
+        catch_exceptions: 异常捕获中间件类.
+
+    Returns:
+        FastAPI 实例.
+    """
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.post("/api/v1/lark/callback")
+    async def callback(request: Request) -> dict[str, Any]:
+        await request.body()
+        return util.make_response_ok()
+
+    if catch_exceptions is not None:
+        app.add_middleware(catch_exceptions)
+    if response_time is not None:
+        app.add_middleware(response_time)
+    return app
+
+
+async def _run(app: FastAPI, total: int, concurrency: int) -> tuple[float, list[float]]:
+    """并发请求回调接口.
+
+    Args:
+        app: 被测应用.
+        total: 总请求数.
+        concurrency: 并发数.
+
+    Returns:
+        (每秒请求数, 每个请求的耗时(秒)).
+    """
+    body = b'{"encrypt": "' + b"x" * 512 + b'"}'
+    samples: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def worker(count: int) -> None:
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/lark/callback", content=body, headers={"content-type": "application/json"}
+                )
+                samples.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        # 预热
+        await worker(min(total, 200))
+        samples.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return len(samples) / elapsed, samples
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--number", type=int, default=10000, help="每组请求数")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 32], help="并发数")
+    args = parser.parse_args()
+
+    # 只比较中间件本身的开销，不输出日志
+    logger.remove()
+
+    apps = {
+        "none": _make_app(None, None),
+        "before (BaseHTTPMiddleware)": _make_app(LegacyResponseTimeMiddleware, LegacyCatchExceptionsMiddleware),
+        "after  (pure ASGI)": _make_app(middleware.ResponseTimeMiddleware, middleware.CatchExceptionsMiddleware),
+    }
+    for concurrency in args.concurrency:
+        print(f"# concurrency {concurrency}")
+        for title, app in apps.items():
+            rps, samples = asyncio.run(_run(app, args.number, concurrency))
+            common.report(f"{title:<28} {rps:8.0f} req/s", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""关联字段映射基准测试.
+
+对比优化前后从大表单中取出关联字段的开销:
+    before -- 遍历全部控件，每个控件都重新构造 code -> api_key 字典
+    after  -- 使用随配置缓存的映射计划，全部找到后提前结束
+
+运行: python -m benchmark.relation
+"""
+
+import argparse
+from types import SimpleNamespace
+from typing import Any
+
+import orjson
+
+from benchmark import common
+from src.lib import schema
+from src.lib.relation import RelationPlan
+
+
+def _make_form(components: int, rows: int) -> str:
+    """构造审批表单，末尾为一个多行的明细控件.
+
+    Args:
+        components: 普通控件数.
+        rows: 明细控件的行数.
+
+    Returns:
+        表单 JSON 字符串.
+    """
+    form: list[dict[str, Any]] = [
+        {"id": f"widget{index}", "name": f"控件{index}", "type": "input", "value": f"value{index}"}
+        for index in range(components)
+    ]
+    form.append(
+        {
+            "id": "detail",
+            "name": "明细",
+            "type": "fieldList",
+            "value": [
+                [{"id": f"child{column}", "type": "input", "value": f"{row}-{column}"} for column in range(5)]
+                for row in range(rows)
+            ],
+        }
+    )
+    return orjson.dumps(form).decode()
+
+
+def _relation_before(relation: schema.RelationConfig, instance: Any) -> dict[str, Any]:
+    """优化前的关联字段映射实现."""
+    metadata: dict[str, Any] = {}
+    for component in orjson.loads(instance.form):
+        _relation = {item.code: item.api_key for item in relation.data}
+        if component.get("id") in _relation:
+            metadata[_relation.get(component.get("id"), "")] = component
+    return metadata
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--number", type=int, default=2000, help="每组执行次数")
+    parser.add_argument("--relations", type=int, default=20, help="关联字段数")
+    parser.add_argument("--rows", type=int, default=50, help="明细控件的行数")
+    args = parser.parse_args()
+
+    for components in (50, 200, 800):
+        instance = SimpleNamespace(form=_make_form(components, args.rows), serial_number="202401010001")
+        # 关联字段分布在表单前部，与常见的表单布局一致
+        items = [{"code": f"widget{index}", "api_key": f"key{index}"} for index in range(args.relations)]
+        relation = schema.RelationConfig(is_open=True, data=items)
+        nested = schema.RelationConfig(
+            is_open=True,
+            data=[
+                *items,
+                {"code": "detail.child0", "api_key": "amounts", "value_only": True},
+                {"code": "$serial_number", "api_key": "serial_number"},
+            ],
+        )
+        print(f"# components {components} relations {args.relations} form {len(instance.form)} bytes")
+        common.report(
+            "before (dict per component)",
+            common.timeit(
+                lambda relation=relation, instance=instance: _relation_before(relation, instance), args.number
+            ),
+        )
+        common.report(
+            "after  (compiled plan)",
+            common.timeit(lambda relation=relation, instance=instance: relation.plan.apply(instance), args.number),
+        )
+        common.report(
+            "after  (plan + fieldList + $attr)",
+            common.timeit(lambda nested=nested, instance=instance: nested.plan.apply(instance), args.number),
+        )
+        common.report(
+            "after  (plan compiled per call)",
+            common.timeit(
+                lambda relation=relation, instance=instance: RelationPlan(relation.data).apply(instance), args.number
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
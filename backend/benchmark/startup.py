@@ -0,0 +1,123 @@
+"""启动耗时基准测试.
+
+每轮在新的子进程中测量，避免模块缓存影响结果:
+    import         -- 导入 src.app
+    lark_oapi      -- 导入飞书 SDK 及审批 v4 模块，即延迟导入前每个 worker 启动时额外承担的耗时
+    first request  -- 从进程启动到 /healthcheck 首个请求返回(导入 + make_app + 请求)
+    lifespan       -- 应用启动阶段(建表或表结构版本比对、选主等)，需要可用的 MySQL，通过 --lifespan 开启
+
+运行: python -m benchmark.startup
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+import orjson
+
+
+_IMPORT = """
+import time
+start = time.perf_counter()
+import src.app
+print(time.perf_counter() - start)
+"""
+
+_LARK_OAPI = """
+import time
+start = time.perf_counter()
+import lark_oapi
+from lark_oapi.api.approval import v4
+print(time.perf_counter() - start)
+"""
+
+_FIRST_REQUEST = """
+import time
+start = time.perf_counter()
+import asyncio
+import httpx
+from src.app import make_app
+
+async def main():
+    app = make_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        (await client.get("/healthcheck")).raise_for_status()
+
+asyncio.run(main())
+print(time.perf_counter() - start)
+"""
+
+_LIFESPAN = """
+import asyncio
+import time
+from src.app import make_app
+
+async def main():
+    app = make_app()
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        print(time.perf_counter() - start)
+
+asyncio.run(main())
+"""
+
+
+def _measure(code: str, rounds: int) -> list[float]:
+    """在子进程中多次执行并收集耗时.
+
+    Args:
+        code: 输出一行耗时(秒)的 Python 代码.
+        rounds: 执行次数.
+
+    Returns:
+        每次耗时(秒).
+    """
+    samples = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def _report(title: str, samples: list[float]) -> dict[str, float]:
+    """打印耗时统计，单位毫秒.
+
+    Args:
+        title: 标题.
+        samples: 每次耗时(秒).
+
+    Returns:
+        统计结果.
+    """
+    ms = [sample * 1000 for sample in samples]
+    result = {"median_ms": round(statistics.median(ms), 1), "min_ms": round(min(ms), 1), "max_ms": round(max(ms), 1)}
+    print(
+        f"{title:<16} n={len(ms):<4} median={result['median_ms']:8.1f}ms "
+        f"min={result['min_ms']:8.1f}ms max={result['max_ms']:8.1f}ms"
+    )
+    return result
+
+
+def main() -> None:
+    """程序入口函数."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=5, help="每项执行次数")
+    parser.add_argument("--lifespan", action="store_true", help="同时测量应用启动阶段，需要可用的 MySQL")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果，便于记录和对比")
+    args = parser.parse_args()
+
+    results = {
+        "import": _report("import", _measure(_IMPORT, args.rounds)),
+        "lark_oapi": _report("lark_oapi", _measure(_LARK_OAPI, args.rounds)),
+        "first_request": _report("first request", _measure(_FIRST_REQUEST, args.rounds)),
+    }
+    if args.lifespan:
+        results["lifespan"] = _report("lifespan", _measure(_LIFESPAN, args.rounds))
+    if args.json:
+        print(orjson.dumps(results).decode())
+
+
+if __name__ == "__main__":
+    main()
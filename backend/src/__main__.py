@@ -11,6 +11,10 @@ import uvicorn
 from src.lib import const
 from src.lib.config import settings
 from src.lib.gunicorn_runner import GunicornApplication
+from src.lib.gunicorn_runner import child_exit
+from src.lib.gunicorn_runner import post_fork
+from src.lib.gunicorn_runner import pre_fork
+from src.lib.gunicorn_runner import prepare_metrics_dir
 
 
 def main():
@@ -27,6 +31,8 @@ def main():
             factory=const.UVICORN_PARAM_FACTORY,
         )
     else:
+        # 多进程共享指标目录
+        prepare_metrics_dir(settings.metrics.multiproc_dir)
         # 启动 Gunicorn 服务器
         GunicornApplication(
             app=const.BASIC_MAIN_APP_PATH,
@@ -36,6 +42,11 @@ def main():
             worker_class="src.lib.gunicorn_runner.UvicornWorker",
             loglevel=settings.loguru.level,
             factory=const.GUNICORN_PARAM_FACTORY,
+            preload_app=settings.basic.preload_app,
+            graceful_timeout=const.GUNICORN_GRACEFUL_TIMEOUT_SECONDS,
+            pre_fork=pre_fork,
+            post_fork=post_fork,
+            child_exit=child_exit,
         ).run()
 
 
@@ -1,8 +1,6 @@
 """路由模块."""
 
-from asyncer import asyncify
 from fastapi import APIRouter
-from fastapi import BackgroundTasks
 from fastapi import Depends
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,8 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.api.lark import service
 from src.db.base import get_db_session
 from src.db.config import ConfigModel
+from src.db.event import EventModel
 from src.lib import const
+from src.lib import job
+from src.lib import log
+from src.lib import metrics
 from src.lib import schema
+from src.lib import tracing
 from src.lib import util
 
 
@@ -20,22 +23,23 @@ router = APIRouter()
 
 @router.post("/callback")
 async def callback(
-    background_tasks: BackgroundTasks,
     encryption_body: schema.LarkEncryptRequest,
     session: AsyncSession = Depends(get_db_session),
 ) -> dict[str, str]:
     """处理来自飞书的回调请求.
 
     Args:
-        background_tasks: 后台任务.
         encryption_body: 加密请求体.
         session: 数据库会话.
 
     Returns:
         dict[str, str]: 返回处理结果.
     """
-    body: schema.LarkEventContext = await asyncify(util.decrypt)(encryption_body.encrypt)
-    logger.info(f"[lark][received callback]: {body}")
+    with metrics.timer("decrypt") as labels:
+        body: schema.LarkEventContext = await util.decrypt_async(encryption_body.encrypt)
+        labels["approval_code"] = body.event.get("approval_code", "")
+    tracing.set_attribute("approval_code", labels["approval_code"])
+    logger.opt(lazy=True).info("[lark][received callback]: {}", lambda: log.payload(body))
     if body.type == const.LARK_URL_VERIFICATION:
         return {"challenge": body.challenge or ""}
 
@@ -46,9 +50,25 @@ async def callback(
     else:
         body.type = body.event.get("type")
 
+    # 预过滤无需处理的事件，不访问数据库
+    reason = service.prefilter(body)
+    if reason is not None:
+        tracing.set_attribute("filter_reason", reason.value)
+        logger.debug(f"[lark][ignore event] type: {body.type} reason: {reason.value}")
+        return {"msg": "success"}
+
     # 检查授权
-    if await ConfigModel.exists(session, body.event.get("approval_code", "")):
-        background_tasks.add_task(getattr(service, f"callback_{body.type}"), session, body)
+    kind = f"{const.JOB_KIND_LARK_CALLBACK_PREFIX}{body.type}"
+    if await ConfigModel.get_cached(session, body.event.get("approval_code", "")) is not None:
+        # 飞书超时重试会重复投递同一事件
+        event_id = body.header.event_id if body.header else body.uuid
+        if not event_id:
+            await job.enqueue(session, kind, body)
+        elif await EventModel.claim(session, event_id):
+            await job.enqueue(session, kind, body)
+            EventModel.remember(event_id)
+        else:
+            logger.info(f"[lark][ignore duplicate event] event_id: {event_id}")
     else:
         logger.info(f"[lark][ignore unauthorized approvals] approval_code: {body.event.get('approval_code', '')}")
 
@@ -56,37 +76,71 @@ async def callback(
 
 
 @router.post("/check/callback", response_model=schema.HTTPResponse)
-async def check_callback(background_tasks: BackgroundTasks, params: schema.LarkCheckOrExecuteCallback):
+async def check_callback(params: schema.LarkCheckOrExecuteCallback, session: AsyncSession = Depends(get_db_session)):
     """检查节点回调.
 
     Args:
-        background_tasks: 后台任务.
         params: 请求参数.
+        session: 数据库会话.
 
     Returns:
         schema.HTTPResponse: 返回 HTTP 响应.
     """
-    logger.info(f"[lark][received check callback]: {params}")
-    background_tasks.add_task(service.check_callback, params)
+    logger.opt(lazy=True).info("[lark][received check callback]: {}", lambda: log.payload(params))
+    await job.enqueue(session, const.JOB_KIND_CHECK_CALLBACK, params)
     return util.make_response_ok()
 
 
 @router.post("/execute/callback", response_model=schema.HTTPResponse)
-async def execute_callback(background_tasks: BackgroundTasks, params: schema.LarkCheckOrExecuteCallback):
+async def execute_callback(params: schema.LarkCheckOrExecuteCallback, session: AsyncSession = Depends(get_db_session)):
     """执行节点回调.
 
     Args:
-        background_tasks: 后台任务.
         params: 请求参数.
+        session: 数据库会话.
 
     Returns:
         schema.HTTPResponse: 返回 HTTP 响应.
     """
-    logger.info(f"[received execute callback]: {params}")
-    background_tasks.add_task(service.execute_callback, params)
+    logger.opt(lazy=True).info("[received execute callback]: {}", lambda: log.payload(params))
+    await job.enqueue(session, const.JOB_KIND_EXECUTE_CALLBACK, params)
     return util.make_response_ok()
 
 
+@router.post("/check/callback/batch", response_model=schema.HTTPResponse)
+async def check_callback_batch(params: schema.LarkCheckOrExecuteBatchCallback):
+    """批量检查节点回调.
+
+    与逐条回调不同，在请求内以有限并发调用飞书接口，并返回每个工单的处理结果.
+
+    Args:
+        params: 请求参数.
+
+    Returns:
+        schema.HTTPResponse: 返回 HTTP 响应，resp.results 为与请求顺序一致的处理结果.
+    """
+    logger.opt(lazy=True).info("[lark][received batch check callback]: {}", lambda: log.payload(params))
+    results = await service.batch_callback(service.check_callback, params.items)
+    return util.make_response_ok({"results": [result.model_dump() for result in results]})
+
+
+@router.post("/execute/callback/batch", response_model=schema.HTTPResponse)
+async def execute_callback_batch(params: schema.LarkCheckOrExecuteBatchCallback):
+    """批量执行节点回调.
+
+    与逐条回调不同，在请求内以有限并发调用飞书接口，并返回每个工单的处理结果.
+
+    Args:
+        params: 请求参数.
+
+    Returns:
+        schema.HTTPResponse: 返回 HTTP 响应，resp.results 为与请求顺序一致的处理结果.
+    """
+    logger.opt(lazy=True).info("[lark][received batch execute callback]: {}", lambda: log.payload(params))
+    results = await service.batch_callback(service.execute_callback, params.items)
+    return util.make_response_ok({"results": [result.model_dump() for result in results]})
+
+
 @router.post("/field/{approval_code}/{field_code}")
 async def external_field(
     approval_code: str,
@@ -105,5 +159,5 @@ async def external_field(
     Returns:
         飞书所需的字段格式.
     """
-    logger.info(f"[lark][received external field]: {params}")
+    logger.opt(lazy=True).info("[lark][received external field]: {}", lambda: log.payload(params))
     return await service.external_field(session, approval_code, field_code, params)
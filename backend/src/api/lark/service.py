@@ -1,117 +1,397 @@
 """路由处理逻辑."""
 
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
 from typing import Any
 
-import orjson
+from loguru import logger
+from pydantic import BaseModel
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.config import ConfigModel
+from src.db.event import EventModel
+from src.db.instance import ClosedInstanceModel
+from src.db.ticket import TicketModel
+from src.db.webhook import WebhookPostModel
 from src.lib import const
+from src.lib import job
+from src.lib import metrics
 from src.lib import schema
-from src.lib import util
+from src.lib import ticket
+from src.lib import tracing
+from src.lib.call import external_field as external_field_api
 from src.lib.call import lark_api
+from src.lib.call import webhook
 from src.lib.config import enum
 from src.lib.config import settings
-from src.lib.extension import handle_exceptions
+from src.lib.exceptions import BulkheadFullException
+from src.lib.exceptions import CircuitOpenException
+from src.lib.exceptions import IgnoreException
 
 
-@handle_exceptions
-async def callback_approval_task(session: AsyncSession, body: schema.LarkEventContext):
+batch_items = metrics.Counter("lark_ticket_batch_callback_items_total", "批量检查、执行回调处理的工单数", ["result"])
+filtered_events = metrics.Counter("lark_ticket_filtered_events_total", "预过滤阶段丢弃的飞书事件数", ["reason"])
+skipped_tasks = metrics.Counter(
+    "lark_ticket_skipped_tasks_total", "后台任务中未拉取审批实例详情即跳过的审批任务事件数", ["reason"]
+)
+instance_fetches = metrics.Counter(
+    "lark_ticket_instance_detail_fetches_total", "处理审批任务事件时拉取审批实例详情的次数", ["reason"]
+)
+
+EventClassifier = Callable[[Any], enum.EventFilterReason | None]
+EventHandler = Callable[[AsyncSession, Any], Awaitable[Any]]
+
+# 事件类型 -> (事件详情结构, 分类函数)
+_events: dict[str, tuple[type[BaseModel], EventClassifier]] = {}
+
+
+def on_event(
+    event_type: str, model: type[BaseModel], classify: EventClassifier
+) -> Callable[[EventHandler], EventHandler]:
+    """注册飞书事件处理函数的装饰器.
+
+    处理函数注册为 callback_{事件类型} 后台任务，任务参数仍为完整的回调内容(兼容已入队的任务)，
+    执行时把事件详情校验为 model 后传给处理函数. 回调入口用 classify 仅根据事件详情判断是否需要处理.
+
+    Args:
+        event_type: 事件类型.
+        model: 事件详情结构.
+        classify: 分类函数，返回丢弃原因，需要处理时返回 None.
+
+    Returns:
+        原处理函数.
+    """
+
+    def decorator(handler: EventHandler) -> EventHandler:
+        async def _run(session: AsyncSession, body: schema.LarkEventContext) -> Any:
+            return await handler(session, model.model_validate(body.event))
+
+        _events[event_type] = (model, classify)
+        job.register(f"{const.JOB_KIND_LARK_CALLBACK_PREFIX}{event_type}", schema.LarkEventContext)(_run)
+        return handler
+
+    return decorator
+
+
+def prefilter(body: schema.LarkEventContext) -> enum.EventFilterReason | None:
+    """仅根据解密后的事件内容判断是否需要处理，不访问数据库.
+
+    大部分事件是其他审批人的任务，在这里丢弃可以省去配置查询、去重登记和后台任务.
+    被丢弃的事件按原因计数.
+
+    Args:
+        body: 已兼容 v1、v2 格式的回调内容.
+
+    Returns:
+        丢弃原因，需要处理时返回 None.
+    """
+    entry = _events.get(body.type or "")
+    if entry is None:
+        reason = enum.EventFilterReason.UNSUPPORTED_TYPE
+    else:
+        model, classify = entry
+        try:
+            reason = classify(model.model_validate(body.event))
+        except ValidationError:
+            reason = enum.EventFilterReason.INVALID_EVENT
+    if reason is None and ConfigModel.known_missing(body.event.get("approval_code", "")):
+        reason = enum.EventFilterReason.UNKNOWN_APPROVAL
+
+    if reason is not None:
+        filtered_events.labels(reason=reason.value).inc()
+    return reason
+
+
+def classify_approval_task(event: schema.LarkApprovalTaskEvent) -> enum.EventFilterReason | None:
+    """仅处理"审批助手"和"审批中"的任务."""
+    if event.user_id != settings.lark.assistant_user_id:
+        return enum.EventFilterReason.OTHER_USER
+    if event.status != const.LARK_CALLBACK_APPROVAL_TASK_STATUS:
+        return enum.EventFilterReason.NOT_PENDING
+    # 仅读取进程内缓存，其他 worker 登记的实例由后台任务查询数据库确认
+    if ClosedInstanceModel.known_closed(event.instance_code):
+        return enum.EventFilterReason.INSTANCE_CLOSED
+    return None
+
+
+def classify_approval_instance(event: schema.LarkApprovalInstanceEvent) -> enum.EventFilterReason | None:
+    """仅处理结束的审批实例."""
+    if event.status not in const.LARK_INSTANCE_CLOSED_STATUSES:
+        return enum.EventFilterReason.INSTANCE_NOT_CLOSED
+    return None
+
+
+async def _task_node_name(event: schema.LarkApprovalTaskEvent) -> str | None:
+    """根据事件中的节点 id 从审批定义中查找任务所在节点的名称.
+
+    审批定义使用进程内缓存，通常不需要调用飞书接口.
+
+    Returns:
+        节点名称，事件中没有节点 id、审批定义中找不到该节点或获取审批定义失败时返回 None.
+    """
+    if not event.def_key and not event.custom_key:
+        return None
+    try:
+        approval = await lark_api.get_approval_detail(event.approval_code)
+    except Exception as e:
+        logger.warning(f"[lark][get approval detail failed] approval_code: {event.approval_code} error: {e!r}")
+        return None
+    for node in approval.node_list or []:
+        if (event.def_key and node.node_id == event.def_key) or (
+            event.custom_key and node.custom_node_id == event.custom_key
+        ):
+            return node.name
+    return None
+
+
+@on_event(const.LARK_EVENT_TYPE_APPROVAL_TASK, schema.LarkApprovalTaskEvent, classify_approval_task)
+async def callback_approval_task(session: AsyncSession, event: schema.LarkApprovalTaskEvent):
     """处理审批任务状态变更的回调.
 
+    先根据事件中的节点 id 判断任务所在节点，不在检查、执行节点的任务不拉取审批实例详情；
+    只有无法确定节点或关联字段需要表单、实例属性时才调用飞书接口获取审批实例详情.
+    由后台任务执行，抛出异常时任务会被重试.
+
     Args:
         session: 数据库会话.
-        body: 状态结构.
+        event: 事件详情.
     """
-    # 仅处理"审批助手"和"审批中"的消息
-    if (
-        body.event.get("user_id", "") == settings.lark.assistant_user_id
-        and body.event.get("status") == const.LARK_CALLBACK_APPROVAL_TASK_STATUS
-    ):
-        metadata: dict[str, Any] = {}
-
-        approval_instance_detail = await lark_api.get_approval_instance_detail(body.event.get("instance_code", ""))
-
-        config: schema.Config = await ConfigModel.get(session, approval_instance_detail.approval_code)
-
-        # 通过关联字段进行转换
-        if config.relation.is_open:
-            for component in orjson.loads(approval_instance_detail.form):
-                _relation = {item.code: item.api_key for item in config.relation.data}
-                if component.get("id") in _relation:
-                    metadata[_relation.get(component.get("id"), "")] = component
-
-        task = approval_instance_detail.task_list[-1]
-
-        ticket_id = (
-            f"{approval_instance_detail.approval_code}"
-            f"{const.LARK_TICKET_ID_DELIMITER}"
-            f"{approval_instance_detail.instance_code}"
-            f"{const.LARK_TICKET_ID_DELIMITER}"
-            f"{task.id}"
-        )
-        metadata["ticket_id"] = ticket_id
-
-        # 检查节点
-        if task.node_name == const.LARK_CHECK_NODE_NAME and task.status == const.LARK_CHECK_NODE_TASK_STATUS:
-            if config.check.is_open:
-                if config.check.call_type == enum.APICallType.SYNC:
-                    await check_callback(await util.do_post(config.check.url, metadata))
-                elif config.check.call_type == enum.APICallType.ASYNC:
-                    await util.do_post(config.check.url, metadata)
-            else:
-                await check_callback(
-                    schema.LarkCheckOrExecuteCallback(ticket_id=ticket_id, result=True, msg="", error="")
-                )
-        # 执行节点
-        elif task.node_name == const.LARK_EXECUTE_NODE_NAME and task.status == const.LARK_EXECUTE_NODE_TASK_STATUS:
-            if config.execute.is_open:
-                if config.execute.call_type == enum.APICallType.SYNC:
-                    await check_callback(await util.do_post(config.execute.url, metadata))
-                elif config.execute.call_type == enum.APICallType.ASYNC:
-                    await util.do_post(config.execute.url, metadata)
-            else:
-                await execute_callback(
-                    schema.LarkCheckOrExecuteCallback(ticket_id=ticket_id, result=True, msg="", error="")
-                )
-
-
-@handle_exceptions
+    # 回调入口已预过滤，这里兜底处理过滤规则上线前入队的任务以及入队后结束的实例
+    reason = classify_approval_task(event)
+    if reason is None and await ClosedInstanceModel.is_closed(session, event.instance_code):
+        reason = enum.EventFilterReason.INSTANCE_CLOSED
+    if reason is not None:
+        if reason == enum.EventFilterReason.INSTANCE_CLOSED:
+            skipped_tasks.labels(reason=reason.value).inc()
+        return
+
+    config: schema.Config | None = await ConfigModel.get_cached(session, event.approval_code)
+    if config is None:
+        return
+
+    node_name = await _task_node_name(event)
+    if node_name is not None and node_name not in (const.LARK_CHECK_NODE_NAME, const.LARK_EXECUTE_NODE_NAME):
+        skipped_tasks.labels(reason=enum.EventFilterReason.OTHER_NODE.value).inc()
+        return
+
+    task_id = event.task_id
+    plan = config.relation.plan if config.relation.is_open else None
+    approval_instance_detail = None
+    if node_name is None or (plan is not None and plan.needs_instance):
+        instance_fetches.labels(reason="unknown_node" if node_name is None else "relation").inc()
+        approval_instance_detail = await lark_api.get_approval_instance_detail(event.instance_code)
+        if node_name is None:
+            task = next(
+                (item for item in approval_instance_detail.task_list if item.id == event.task_id),
+                approval_instance_detail.task_list[-1],
+            )
+            if task.status != const.LARK_CHECK_NODE_TASK_STATUS:
+                return
+            node_name, task_id = task.node_name, task.id
+
+    # 通过关联字段进行转换，映射计划随配置缓存，只在配置更新后重新编译
+    metadata: dict[str, Any] = (
+        plan.apply(approval_instance_detail) if plan is not None and approval_instance_detail is not None else {}
+    )
+
+    ticket_id = (
+        f"{event.approval_code}{const.LARK_TICKET_ID_DELIMITER}{event.instance_code}"
+        f"{const.LARK_TICKET_ID_DELIMITER}{task_id}"
+    )
+    metadata["ticket_id"] = ticket_id
+    tracing.set_attribute("ticket_id", ticket_id)
+    if node_name in (const.LARK_CHECK_NODE_NAME, const.LARK_EXECUTE_NODE_NAME):
+        ticket.recorder.record(ticket_id, enum.TicketStatus.PENDING, node=node_name)
+
+    # 检查节点
+    if node_name == const.LARK_CHECK_NODE_NAME:
+        if config.check.is_open:
+            await _call_webhook(session, const.JOB_KIND_CHECK_CALLBACK, config.check, metadata, config.approval_code)
+        else:
+            await check_callback(schema.LarkCheckOrExecuteCallback(ticket_id=ticket_id, result=True, msg="", error=""))
+    # 执行节点
+    elif node_name == const.LARK_EXECUTE_NODE_NAME:
+        if config.execute.is_open:
+            await _call_webhook(
+                session, const.JOB_KIND_EXECUTE_CALLBACK, config.execute, metadata, config.approval_code
+            )
+        else:
+            await execute_callback(
+                schema.LarkCheckOrExecuteCallback(ticket_id=ticket_id, result=True, msg="", error="")
+            )
+
+
+async def _call_webhook(
+    session: AsyncSession,
+    kind: str,
+    node: schema.CheckConfig | schema.ExecuteConfig,
+    metadata: dict[str, Any],
+    approval_code: str,
+) -> None:
+    """调用检查、执行节点的业务方接口，后台任务重新执行时不会再次请求.
+
+    执行节点的业务方接口通常不是幂等的：请求前先在 tb_webhook_post 登记工单并单独提交，
+    任务被取消(进程退出)、租约到期或失败后重新执行时发现已登记则直接放弃；请求发出后的失败只记录日志.
+    只有熔断器打开、并发名额用尽这两种尚未发出请求的快速失败会撤销登记并抛出原异常，由后台任务稍后重试.
+    同步调用的结果作为独立的后台任务提交给飞书，飞书接口失败时只重试该任务，不会重新请求业务方接口.
+    注意节点重试策略(node.retry)的 max_attempts 大于 1 时，超时等失败会在本次调用内重新发送同一请求，
+    业务方接口需要按 ticket_id 去重.
+
+    Args:
+        session: 数据库会话.
+        kind: 同步调用结果的后台任务类型.
+        node: 检查或执行节点配置.
+        metadata: 请求体数据.
+        approval_code: 审批定义 code.
+
+    Raises:
+        CircuitOpenException: 熔断器打开.
+        BulkheadFullException: 并发名额用尽.
+        IgnoreException: 工单已经请求过，或请求已发出后失败.
+    """
+    ticket_id = metadata["ticket_id"]
+    if not await WebhookPostModel.claim(session, ticket_id):
+        raise IgnoreException(f"webhook: {node.url} ticket_id: {ticket_id} has already been posted!")
+
+    try:
+        result = await webhook.post(node.url, metadata, approval_code, node.retry)
+    except (CircuitOpenException, BulkheadFullException):
+        await WebhookPostModel.release(session, ticket_id)
+        raise
+    except Exception as e:
+        raise IgnoreException(f"webhook: {node.url} ticket_id: {metadata['ticket_id']} failed: {e!r}") from e
+
+    if node.call_type == enum.APICallType.SYNC:
+        try:
+            await job.enqueue(session, kind, result)
+        except Exception as e:
+            raise IgnoreException(f"enqueue {kind} ticket_id: {result.ticket_id} failed: {e!r}") from e
+
+
+@on_event(const.LARK_EVENT_TYPE_APPROVAL_INSTANCE, schema.LarkApprovalInstanceEvent, classify_approval_instance)
+async def callback_approval_instance(session: AsyncSession, event: schema.LarkApprovalInstanceEvent):
+    """处理审批实例结束的回调，不调用飞书接口.
+
+    登记已结束的实例(所有 worker 可见)，之后到达的该实例任务事件直接跳过；
+    台账中该实例审批中的工单标记为已取消，仍在台账缓冲区中的工单在写入时取消(见 TicketModel.upsert).
+
+    Args:
+        session: 数据库会话.
+        event: 事件详情.
+    """
+    await ClosedInstanceModel.add(session, event.instance_code, event.approval_code, event.status)
+    canceled = await TicketModel.cancel_pending(session, event.instance_code)
+    await session.commit()
+    ClosedInstanceModel.remember(event.instance_code)
+    if canceled:
+        logger.info(f"[lark][instance closed] instance_code: {event.instance_code} canceled tickets: {canceled}")
+
+
 async def check_callback(params: schema.LarkCheckOrExecuteCallback):
     """处理检查回调."""
     approval_code, instance_code, task_id = params.ticket_id.split(const.LARK_TICKET_ID_DELIMITER)
+    tracing.set_attribute("ticket_id", params.ticket_id)
 
     # 检查成功: 审批通过
     if params.result:
-        await lark_api.approval_task_approve(
-            approval_code, instance_code, task_id, params.msg or const.LARK_CHECK_SUCCESS_DEFAULT_COMMENT
-        )
+        comment = params.msg or const.LARK_CHECK_SUCCESS_DEFAULT_COMMENT
+        await lark_api.approval_task_approve(approval_code, instance_code, task_id, comment)
+        ticket.recorder.record(params.ticket_id, enum.TicketStatus.APPROVED, comment=comment)
     # 检查失败: 审批拒绝
     else:
-        await lark_api.approval_task_reject(
-            approval_code, instance_code, task_id, params.error or const.LARK_CHECK_FAILURE_DEFAULT_COMMENT
-        )
+        comment = params.error or const.LARK_CHECK_FAILURE_DEFAULT_COMMENT
+        await lark_api.approval_task_reject(approval_code, instance_code, task_id, comment)
+        ticket.recorder.record(params.ticket_id, enum.TicketStatus.REJECTED, comment=comment)
 
 
-@handle_exceptions
 async def execute_callback(params: schema.LarkCheckOrExecuteCallback):
     """处理执行回调."""
     approval_code, instance_code, task_id = params.ticket_id.split(const.LARK_TICKET_ID_DELIMITER)
+    tracing.set_attribute("ticket_id", params.ticket_id)
 
     # 执行成功: 审批通过
     if params.result:
-        await lark_api.approval_task_approve(
-            approval_code, instance_code, task_id, params.msg or const.LARK_CHECK_SUCCESS_DEFAULT_COMMENT
-        )
+        comment = params.msg or const.LARK_CHECK_SUCCESS_DEFAULT_COMMENT
+        await lark_api.approval_task_approve(approval_code, instance_code, task_id, comment)
+        ticket.recorder.record(params.ticket_id, enum.TicketStatus.APPROVED, comment=comment)
     # 执行失败: 审批拒绝
     else:
-        await lark_api.approval_task_reject(
-            approval_code, instance_code, task_id, params.error or const.LARK_CHECK_FAILURE_DEFAULT_COMMENT
-        )
+        comment = params.error or const.LARK_CHECK_FAILURE_DEFAULT_COMMENT
+        await lark_api.approval_task_reject(approval_code, instance_code, task_id, comment)
+        ticket.recorder.record(params.ticket_id, enum.TicketStatus.REJECTED, comment=comment)
+
+
+async def batch_callback(
+    handler: Callable[[schema.LarkCheckOrExecuteCallback], Awaitable[None]],
+    items: list[schema.LarkCheckOrExecuteCallback],
+) -> list[schema.LarkCheckOrExecuteBatchResult]:
+    """以有限并发同步处理批量回调.
+
+    单个工单失败不影响其他工单，失败原因逐条返回，由调用方决定是否重试.
+
+    Args:
+        handler: 单个回调的处理函数，check_callback 或 execute_callback.
+        items: 回调列表.
+
+    Returns:
+        与 items 顺序一致的处理结果.
+    """
+    semaphore = asyncio.Semaphore(const.LARK_BATCH_CALLBACK_CONCURRENCY)
+
+    async def _handle(item: schema.LarkCheckOrExecuteCallback) -> schema.LarkCheckOrExecuteBatchResult:
+        async with semaphore:
+            with tracing.span("batch callback item", ticket_id=item.ticket_id):
+                try:
+                    await handler(item)
+                except Exception as e:
+                    logger.warning(f"[lark][batch callback failed] ticket_id: {item.ticket_id} error: {e!r}")
+                    return schema.LarkCheckOrExecuteBatchResult(ticket_id=item.ticket_id, success=False, error=str(e))
+        return schema.LarkCheckOrExecuteBatchResult(ticket_id=item.ticket_id, success=True)
+
+    results = await asyncio.gather(*(_handle(item) for item in items))
+    batch_items.labels(result="success").inc(sum(result.success for result in results))
+    batch_items.labels(result="failure").inc(sum(not result.success for result in results))
+    return results
+
+
+@job.register(const.JOB_KIND_CHECK_CALLBACK, schema.LarkCheckOrExecuteCallback)
+async def check_callback_job(_: AsyncSession, params: schema.LarkCheckOrExecuteCallback):
+    """检查回调后台任务."""
+    await check_callback(params)
+
+
+@job.register(const.JOB_KIND_EXECUTE_CALLBACK, schema.LarkCheckOrExecuteCallback)
+async def execute_callback_job(_: AsyncSession, params: schema.LarkCheckOrExecuteCallback):
+    """执行回调后台任务."""
+    await execute_callback(params)
+
+
+@job.every(const.LARK_EVENT_PURGE_INTERVAL_SECONDS)
+async def purge_events(session: AsyncSession):
+    """清理去重窗口之外的飞书事件记录."""
+    await EventModel.purge(session, const.LARK_EVENT_DEDUP_WINDOW_SECONDS)
+
+
+@job.every(const.WEBHOOK_POST_PURGE_INTERVAL_SECONDS)
+async def purge_webhook_posts(session: AsyncSession):
+    """清理保留期之外的业务方接口请求记录."""
+    await WebhookPostModel.purge(session, const.WEBHOOK_POST_RETENTION_DAYS)
+
+
+@job.every(const.LARK_CLOSED_INSTANCE_PURGE_INTERVAL_SECONDS)
+async def purge_closed_instances(session: AsyncSession):
+    """清理保留期之外的已结束审批实例记录."""
+    await ClosedInstanceModel.purge(session, const.LARK_CLOSED_INSTANCE_RETENTION_DAYS)
 
 
 async def external_field(session: AsyncSession, approval_code: str, field_code: str, params: schema.LarkExternalField):
     """获取外部字段数据."""
-    config: schema.Config = await ConfigModel.get(session, approval_code)
-    _field_map = {item.code: item.url for item in config.field.data}
-    return util.do_post(_field_map.get(field_code, ""), params.dict())
+    config: schema.Config | None = await ConfigModel.get_cached(session, approval_code)
+    if config is None:
+        raise IgnoreException(f"approval_code: {approval_code} does not exist!")
+    field = next((item for item in config.field.data if item.code == field_code), None)
+    if field is None:
+        raise IgnoreException(f"field_code: {field_code} does not exist!")
+    return await external_field_api.get(approval_code, field, params)
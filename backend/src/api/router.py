@@ -1,10 +1,12 @@
 """主路由模块."""
 
 from fastapi import APIRouter
+from fastapi import Response
 
 from src.api.lark.router import router as lark_router_api_v1
 from src.api.web.router import router as web_router_api_v1
 from src.lib import enum
+from src.lib import metrics
 
 
 api_router = APIRouter()
@@ -17,3 +19,9 @@ api_router.include_router(web_router_api_v1, prefix=f"/api/v{enum.ApiVersion.VER
 async def healthcheck() -> dict[str, str]:
     """健康检查."""
     return {"status": "ok"}
+
+
+@api_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """Prometheus 指标."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
@@ -2,11 +2,14 @@
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Query
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.web import service
 from src.db.base import get_db_session
+from src.lib import const
+from src.lib import enum
 from src.lib import schema
 from src.lib import util
 
@@ -15,17 +18,25 @@ router = APIRouter()
 
 
 @router.get("/configs", response_model=schema.HTTPResponse)
-async def get_configs(session: AsyncSession = Depends(get_db_session)):
-    """获取所有审批定义配置.
+async def get_configs(
+    keyword: str | None = None,
+    cursor: str | None = None,
+    page_size: int = Query(const.HTTP_PAGE_SIZE_DEFAULT, ge=1, le=const.HTTP_PAGE_SIZE_MAX),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """分页获取审批定义配置列表.
 
     Args:
+        keyword: 按名称或审批定义 code 前缀搜索.
+        cursor: 上一页返回的 next_cursor，第一页不填.
+        page_size: 每页条数.
         session: 数据库会话.
 
     Returns:
-        包含所有配置的数据.
+        配置列表，next_cursor 为空表示没有下一页.
     """
-    logger.info("[web][received get configs]")
-    return util.make_response_ok(await service.get_configs(session))
+    logger.info(f"[web][received get configs] keyword: {keyword}")
+    return util.make_response_ok(await service.get_configs(session, page_size, cursor, keyword))
 
 
 @router.get("/config/{approval_code}", response_model=schema.HTTPResponse)
@@ -92,14 +103,60 @@ async def delete_config(approval_code: str, session: AsyncSession = Depends(get_
 
 
 @router.get("/lark/approval/fields", response_model=schema.HTTPResponse)
-async def get_lark_approval_fields(approval_code: str):
+async def get_lark_approval_fields(approval_code: str, refresh: bool = False):
     """获取飞书审批定义 form 字段信息.
 
     Args:
         approval_code: 审批定义 code.
+        refresh: 是否跳过缓存，直接从飞书获取.
 
     Returns:
         具体的配置.
     """
     logger.info(f"[web][received get lark approval fields] approval_code: {approval_code}")
-    return util.make_response_ok(await service.get_lark_approval_fields(approval_code))
+    return util.make_response_ok(await service.get_lark_approval_fields(approval_code, refresh))
+
+
+@router.get("/tickets", response_model=schema.HTTPResponse)
+async def get_tickets(
+    approval_code: str | None = None,
+    status: enum.TicketStatus | None = None,
+    instance_code: str | None = None,
+    cursor: str | None = None,
+    page_size: int = Query(const.HTTP_PAGE_SIZE_DEFAULT, ge=1, le=const.HTTP_PAGE_SIZE_MAX),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """分页查询工单台账.
+
+    Args:
+        approval_code: 审批定义 code.
+        status: 工单状态.
+        instance_code: 审批实例 code.
+        cursor: 上一页返回的 next_cursor，第一页不填.
+        page_size: 每页条数.
+        session: 数据库会话.
+
+    Returns:
+        按创建时间倒序的工单，next_cursor 为空表示没有下一页.
+    """
+    logger.info(
+        f"[web][received get tickets] approval_code: {approval_code} status: {status} instance_code: {instance_code}"
+    )
+    return util.make_response_ok(
+        await service.get_tickets(session, page_size, cursor, approval_code, status, instance_code)
+    )
+
+
+@router.get("/ticket/{ticket_id}", response_model=schema.HTTPResponse)
+async def get_ticket(ticket_id: str, session: AsyncSession = Depends(get_db_session)):
+    """获取指定工单.
+
+    Args:
+        ticket_id: 工单标识符.
+        session: 数据库会话.
+
+    Returns:
+        工单数据.
+    """
+    logger.info(f"[web][received get ticket] ticket_id: {ticket_id}")
+    return util.make_response_ok(await service.get_ticket(session, ticket_id))
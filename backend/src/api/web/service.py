@@ -1,32 +1,44 @@
 """路由处理逻辑."""
 
+from datetime import datetime
 from typing import Any
 
 import orjson
 from sqlalchemy import delete
 from sqlalchemy import insert
-from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.config import ConfigModel
+from src.db.ticket import TicketModel
+from src.lib import const
+from src.lib import enum
 from src.lib import schema
+from src.lib import util
 from src.lib.call import lark_api
 from src.lib.exceptions import IgnoreException
 
 
-async def get_configs(session: AsyncSession) -> dict[str, str]:
-    """获取所有审批定义配置."""
-    entries_stmt = (
-        select(ConfigModel.approval_code, ConfigModel.name)
-        .filter(ConfigModel.id != -1)
-        .order_by(ConfigModel.create_time)
-    )
+async def get_configs(
+    session: AsyncSession, page_size: int, cursor: str | None = None, keyword: str | None = None
+) -> dict[str, Any]:
+    """分页获取审批定义配置列表."""
+    after = None
+    if cursor:
+        try:
+            after = int(util.decode_cursor(cursor)[0])
+        except (IndexError, TypeError, ValueError):
+            raise IgnoreException(f"cursor: {cursor} is invalid!")
 
-    response: dict[str, Any] = {"body": []}
+    entries = await ConfigModel.page(session, page_size, after=after, keyword=keyword)
 
-    for entry in await session.execute(entries_stmt):
-        response["body"].append({"approval_code": entry.approval_code, "name": entry.name})
+    response: dict[str, Any] = {
+        "body": [
+            {"approval_code": entry.approval_code, "name": entry.name, "last_update_time": entry.last_update_time}
+            for entry in entries
+        ],
+        "next_cursor": util.encode_cursor(entries[-1].id) if len(entries) == page_size else None,
+    }
 
     return response
 
@@ -50,8 +62,19 @@ async def get_config(session: AsyncSession, approval_code: str) -> dict[str, Any
     return response
 
 
+def _check_retry_policy(body: schema.Config) -> None:
+    """检查节点重试策略的最长耗时不能超过 WEBHOOK_RETRY_BUDGET_SECONDS."""
+    for name, node in (("check", body.check), ("execute", body.execute)):
+        if node.retry.worst_case_seconds > const.WEBHOOK_RETRY_BUDGET_SECONDS:
+            raise IgnoreException(
+                f"{name}.retry: worst case {node.retry.worst_case_seconds:g}s exceeds "
+                f"{const.WEBHOOK_RETRY_BUDGET_SECONDS}s!"
+            )
+
+
 async def create_config(session: AsyncSession, body: schema.Config):
     """创建审批定义配置."""
+    _check_retry_policy(body)
     if await ConfigModel.exists(session, body.approval_code):
         raise IgnoreException(f"approval_code: {body.approval_code} already exists!")
 
@@ -69,10 +92,12 @@ async def create_config(session: AsyncSession, body: schema.Config):
     await lark_api.subscribe_approval_callback_event(body.approval_code)
 
     await session.commit()
+    ConfigModel.invalidate(body.approval_code)
 
 
 async def update_config(session: AsyncSession, body: schema.Config):
     """更新审批定义配置."""
+    _check_retry_policy(body)
     if not await ConfigModel.exists(session, body.approval_code):
         raise IgnoreException(f"approval_code: {body.approval_code} does not exist!")
 
@@ -86,10 +111,12 @@ async def update_config(session: AsyncSession, body: schema.Config):
                 "execute": body.execute.dict(),
                 "field": body.field.dict(),
                 "relation": body.relation.dict(),
+                "version": ConfigModel.version + 1,
             }
         )
     )
     await session.commit()
+    ConfigModel.invalidate(body.approval_code)
 
 
 async def delete_config(session: AsyncSession, approval_code: str) -> None:
@@ -102,9 +129,62 @@ async def delete_config(session: AsyncSession, approval_code: str) -> None:
     await lark_api.unsubscribe_approval_callback_event(approval_code)
 
     await session.commit()
+    ConfigModel.invalidate(approval_code)
+
+
+async def get_lark_approval_fields(approval_code: str, refresh: bool = False):
+    """获取飞书审批定义 form 字段信息，包括明细中的子控件和可以关联的审批实例属性."""
+    response = await lark_api.get_approval_detail(approval_code, use_cache=not refresh)
+    body = []
+    for field in orjson.loads(response.form):
+        body.append({"label": field.get("name"), "value": field.get("id")})
+        for child in field.get("children") or []:
+            body.append(
+                {
+                    "label": f"{field.get('name')} / {child.get('name')}",
+                    "value": f"{field.get('id')}{const.RELATION_NESTED_DELIMITER}{child.get('id')}",
+                }
+            )
+    for attribute, name in const.RELATION_INSTANCE_ATTRIBUTES.items():
+        body.append({"label": f"审批实例 / {name}", "value": f"{const.RELATION_COMPUTED_PREFIX}{attribute}"})
+    return {"body": body}
+
+
+async def get_tickets(
+    session: AsyncSession,
+    page_size: int,
+    cursor: str | None = None,
+    approval_code: str | None = None,
+    status: enum.TicketStatus | None = None,
+    instance_code: str | None = None,
+) -> dict[str, Any]:
+    """按创建时间倒序分页查询工单台账."""
+    after = None
+    if cursor:
+        try:
+            create_time, id_ = util.decode_cursor(cursor)
+            after = (datetime.fromisoformat(create_time), int(id_))
+        except (TypeError, ValueError):
+            raise IgnoreException(f"cursor: {cursor} is invalid!")
+
+    entries = await TicketModel.page(
+        session,
+        page_size,
+        after=after,
+        approval_code=approval_code,
+        status=status,
+        instance_code=instance_code,
+    )
+
+    next_cursor = None
+    if len(entries) == page_size:
+        next_cursor = util.encode_cursor(entries[-1].create_time.isoformat(), entries[-1].id)
+    return {"body": [entry.to_dict() for entry in entries], "next_cursor": next_cursor}
 
 
-async def get_lark_approval_fields(approval_code: str):
-    """获取飞书审批定义 form 字段信息."""
-    response = await lark_api.get_approval_detail(approval_code)
-    return {"body": [{"label": field.get("name"), "value": field.get("id")} for field in orjson.loads(response.form)]}
+async def get_ticket(session: AsyncSession, ticket_id: str) -> dict[str, Any]:
+    """获取指定工单."""
+    entry = await TicketModel.get(session, ticket_id)
+    if entry is None:
+        raise IgnoreException(f"ticket_id: {ticket_id} does not exist!")
+    return entry.to_dict()
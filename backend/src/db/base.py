@@ -2,31 +2,35 @@
 
 import contextlib
 import importlib
-import os
+import time
 from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
+from sqlalchemy import event
+from sqlalchemy import exc
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import ConnectionPoolEntry
 from sqlalchemy.schema import CreateTable
 
 from src.lib import const
+from src.lib import metrics
 from src.lib.config import settings
 
 
 def init():
-    """动态加载所有表."""
-    for table in os.listdir(os.path.dirname(__file__)):
-        if table.endswith(const.BASIC_PYTHON_FILE_SUFFIX) and table not in const.DATABASE_EXCLUDE_FILE:
-            table_name = table.split(const.BASIC_PYTHON_FILE_SUFFIX)[0]
-            importlib.import_module(f"{const.DATABASE_ROOT}.{table_name}")
+    """加载所有表，新增的表需要登记在 const.DATABASE_MODELS 中."""
+    for table_name in const.DATABASE_MODELS:
+        importlib.import_module(f"{const.DATABASE_ROOT}.{table_name}")
 
 
 class Base(DeclarativeBase):
@@ -66,22 +70,105 @@ class HasLastUpdateTimeMixin:
     )
 
 
+pool_connections = metrics.Gauge(
+    "lark_ticket_db_pool_connections",
+    "数据库连接池中的连接数",
+    ["state"],
+    multiprocess_mode=const.METRICS_GAUGE_MULTIPROCESS_MODE,
+)
+pool_overflow_checkouts = metrics.Counter(
+    "lark_ticket_db_pool_overflow_checkouts_total", "超出 pool_size 时借出的连接数(使用了 max_overflow)"
+)
+pool_timeouts = metrics.Counter("lark_ticket_db_pool_timeouts_total", "等待空闲连接超时的次数")
+pool_pings = metrics.Counter("lark_ticket_db_pool_pings_total", "连接空闲后使用前的 ping 次数", ["result"])
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """记录连接获取耗时(包括排队等待和新建连接)、占用情况和溢出事件的连接池."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        """从连接池获取连接."""
+        try:
+            with metrics.timer("db_session"):
+                entry = super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        if self.checkedout() > self.size():
+            pool_overflow_checkouts.inc()
+        self._update_gauges()
+        return entry
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        """归还连接."""
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        """更新连接数指标."""
+        pool_connections.labels(state="in_use").set(self.checkedout())
+        pool_connections.labels(state="idle").set(self.checkedin())
+
+
+def _listen_idle_pre_ping(engine: AsyncEngine, idle_seconds: float) -> None:
+    """连接空闲超过指定时间后，使用前先 ping.
+
+    相比 pool_pre_ping 每次借出都多一次往返，繁忙时连接几乎不会空闲，基本不需要 ping.
+    ping 失败时抛出 DisconnectionError，连接池会丢弃该连接并重新获取.
+
+    Args:
+        engine: 数据库引擎.
+        idle_seconds: 空闲时间阈值(秒).
+    """
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(_: Any, record: ConnectionPoolEntry) -> None:
+        record.info[const.DATABASE_POOL_CHECKIN_TIME_KEY] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection: Any, record: ConnectionPoolEntry, _: Any) -> None:
+        checkin_time = record.info.get(const.DATABASE_POOL_CHECKIN_TIME_KEY)
+        if checkin_time is None or time.monotonic() - checkin_time < idle_seconds:
+            return
+        try:
+            dbapi_connection.ping(False)
+        except Exception as e:
+            pool_pings.labels(result="disconnected").inc()
+            raise exc.DisconnectionError() from e
+        pool_pings.labels(result="ok").inc()
+
+
 class DatabaseSessionManager:
-    """会话管理."""
+    """会话管理.
 
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] | None):
+    引擎在 open 时才创建，由每个 worker 进程在启动时调用，
+    gunicorn preload 模式下主进程不会持有连接池，fork 出的 worker 之间不会共享连接.
+    """
+
+    def __init__(self, host: str, engine_kwargs: dict[str, Any] | None, pre_ping_idle_seconds: float = -1):
         """初始化数据库会话管理器.
 
         Args:
             host: 数据库连接地址.
             engine_kwargs: 创建引擎时的附加参数.
+            pre_ping_idle_seconds: 连接空闲超过该时间(秒)才在使用前 ping，小于等于 0 时不启用.
         """
-        if engine_kwargs is None:
-            engine_kwargs = {}
+        self.host = host
+        self.engine_kwargs = engine_kwargs or {}
+        self.pre_ping_idle_seconds = pre_ping_idle_seconds
+        self.engine: AsyncEngine | None = None
+        self._sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+    def open(self) -> None:
+        """创建引擎和会话工厂，已创建时不做处理."""
+        if self.engine is not None:
+            return
         self.engine = create_async_engine(
-            host,
-            **engine_kwargs,
+            self.host,
+            **self.engine_kwargs,
         )
+        if self.pre_ping_idle_seconds > 0:
+            _listen_idle_pre_ping(self.engine, self.pre_ping_idle_seconds)
         self._sessionmaker = async_sessionmaker(
             autocommit=const.DATABASE_SESSION_PARAM_AUTOCOMMIT,
             bind=self.engine,
@@ -89,6 +176,11 @@ class DatabaseSessionManager:
             expire_on_commit=const.DATABASE_SESSION_PARAM_EXPIRE_ON_COMMIT,
         )
 
+    def after_fork(self) -> None:
+        """在 fork 出的子进程中丢弃从父进程继承的连接池，不关闭父进程仍在使用的连接."""
+        if self.engine is not None:
+            self.engine.sync_engine.dispose(close=False)
+
     async def close(self):
         """关闭数据库连接."""
         if self.engine is None:
@@ -127,14 +219,21 @@ class DatabaseSessionManager:
             await session.close()
 
 
+_pool_size, _max_overflow = settings.mysql.pool_limits(settings.basic.workers_count)
+
 sessionmanager = DatabaseSessionManager(
     settings.mysql.dsn,
     {
         "echo": settings.basic.debug,
-        "pool_size": const.DATABASE_SESSION_PARAM_POOL_SIZE,
-        "max_overflow": const.DATABASE_SESSION_PARAM_MAX_OVERFLOW,
-        "pool_pre_ping": const.DATABASE_SESSION_PARAM_POOL_PRE_PING,
+        "poolclass": TimedQueuePool,
+        "pool_size": _pool_size,
+        "max_overflow": _max_overflow,
+        "pool_timeout": settings.mysql.pool_timeout,
+        "pool_recycle": settings.mysql.pool_recycle,
+        # 为 0 时每次借出都 ping，大于 0 时由 _listen_idle_pre_ping 按空闲时间 ping
+        "pool_pre_ping": settings.mysql.pool_pre_ping_idle_seconds == 0,
     },
+    pre_ping_idle_seconds=settings.mysql.pool_pre_ping_idle_seconds,
 )
 
 
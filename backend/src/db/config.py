@@ -1,9 +1,13 @@
 """配置表模块."""
 
 from sqlalchemy import JSON
+from sqlalchemy import Index
+from sqlalchemy import Row
 from sqlalchemy import String
 from sqlalchemy import exists
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
@@ -12,13 +16,21 @@ from src.db.base import Base
 from src.db.base import HasCreateTimeMixin
 from src.db.base import HasIdMixin
 from src.db.base import HasLastUpdateTimeMixin
+from src.lib import const
+from src.lib import metrics
 from src.lib import schema
+from src.lib.cache import TTLCache
+
+
+# 已解析配置的进程内缓存: approval_code -> (配置, (主键, 配置版本)), 配置不存在时两者均为 None.
+_cache = TTLCache(const.DATABASE_CONFIG_CACHE_TTL_SECONDS, const.DATABASE_CONFIG_CACHE_MAXSIZE)
 
 
 class ConfigModel(HasIdMixin, HasCreateTimeMixin, HasLastUpdateTimeMixin, Base):
     """配置表定义."""
 
     __tablename__ = "tb_config"
+    __table_args__ = (Index("idx_name", "name"),)
 
     approval_code: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, comment="审批定义 code")
     name: Mapped[str] = mapped_column(String(255), nullable=False, unique=False, comment="审批配置名称")
@@ -26,6 +38,7 @@ class ConfigModel(HasIdMixin, HasCreateTimeMixin, HasLastUpdateTimeMixin, Base):
     execute: Mapped[schema.ExecuteConfig] = mapped_column(JSON, nullable=False, comment="执行节点配置")
     field: Mapped[schema.FieldConfig] = mapped_column(JSON, nullable=False, comment="外部字段配置")
     relation: Mapped[schema.RelationConfig] = mapped_column(JSON, nullable=False, comment="关联字段配置")
+    version: Mapped[int] = mapped_column(nullable=False, server_default=text("0"), comment="配置版本，每次更新加一")
 
     @classmethod
     async def get(cls, session: AsyncSession, approval_code: str) -> schema.Config:
@@ -48,6 +61,113 @@ class ConfigModel(HasIdMixin, HasCreateTimeMixin, HasLastUpdateTimeMixin, Base):
             relation=entry.relation,
         )
 
+    @classmethod
+    async def get_cached(cls, session: AsyncSession, approval_code: str) -> schema.Config | None:
+        """根据审批定义 code 检索配置，优先读取进程内缓存.
+
+        缓存过期后仅查询主键和 version 做版本比对，未变化则直接续期，
+        以便其他 worker 修改配置后本进程能在一个 TTL 内感知到.
+        version 每次更新都会加一，同一秒内的多次修改也能被区分；
+        删除后重新创建的配置 version 从 0 开始，但主键不同，同样会被识别为已变更.
+
+        Args:
+            session: 数据库会话.
+            approval_code: 审批定义 code.
+
+        Returns:
+            schema.Config: 指定审批代码的配置，不存在时返回 None.
+        """
+        with metrics.timer("config_lookup", approval_code):
+            return await cls._get_cached(session, approval_code)
+
+    @classmethod
+    async def _get_cached(cls, session: AsyncSession, approval_code: str) -> schema.Config | None:
+        """get_cached 的实现."""
+        cached = _cache.get(approval_code)
+        if cached is not None:
+            return cached[0]
+
+        expired = _cache.get_expired(approval_code)
+        if expired is not None:
+            row = (await session.execute(select(cls.id, cls.version).where(cls.approval_code == approval_code))).first()
+            if (tuple(row) if row is not None else None) == expired[1]:
+                _cache.set(
+                    approval_code,
+                    expired,
+                    ttl=None if row is not None else const.DATABASE_CONFIG_NEGATIVE_CACHE_TTL_SECONDS,
+                )
+                return expired[0]
+
+        entry = await session.scalar(select(cls).where(cls.approval_code == approval_code))
+        if entry is None:
+            _cache.set(approval_code, (None, None), ttl=const.DATABASE_CONFIG_NEGATIVE_CACHE_TTL_SECONDS)
+            return None
+
+        config = schema.Config(
+            approval_code=entry.approval_code,
+            name=entry.name,
+            check=entry.check,
+            execute=entry.execute,
+            field=entry.field,
+            relation=entry.relation,
+        )
+        _cache.set(approval_code, (config, (entry.id, entry.version)))
+        return config
+
+    @classmethod
+    def known_missing(cls, approval_code: str) -> bool:
+        """仅根据进程内缓存判断审批定义是否没有配置，不访问数据库.
+
+        回调入口据此预过滤事件；其他 worker 新建配置后，本进程最多在
+        DATABASE_CONFIG_NEGATIVE_CACHE_TTL_SECONDS 内仍认为配置不存在.
+
+        Args:
+            approval_code: 审批定义 code.
+
+        Returns:
+            True: 缓存未过期且配置不存在
+            False: 配置存在或缓存中没有记录
+        """
+        cached = _cache.get(approval_code)
+        return cached is not None and cached[0] is None
+
+    @classmethod
+    def invalidate(cls, approval_code: str) -> None:
+        """使指定审批定义 code 的缓存失效.
+
+        Args:
+            approval_code: 审批定义 code.
+        """
+        _cache.pop(approval_code)
+
+    @classmethod
+    async def page(
+        cls, session: AsyncSession, limit: int, after: int | None = None, keyword: str | None = None
+    ) -> list[Row]:
+        """按 id 顺序分页查询配置列表，只返回列表展示需要的字段，不读取 JSON 配置.
+
+        使用上一页最后一行的 id 作为游标，翻页代价与页码无关；
+        关键字按名称或审批定义 code 前缀匹配，分别走 idx_name 和 approval_code 唯一索引.
+
+        Args:
+            session: 数据库会话.
+            limit: 返回条数.
+            after: 上一页最后一行的 id，第一页为 None.
+            keyword: 名称或审批定义 code 的前缀.
+
+        Returns:
+            (id, approval_code, name, last_update_time) 列表.
+        """
+        stmt = select(cls.id, cls.approval_code, cls.name, cls.last_update_time)
+        if keyword:
+            # 在 Python 中拼接好前缀模式，保证 LIKE 的右侧是常量，可以使用索引范围扫描
+            pattern = keyword.replace("/", "//").replace("%", "/%").replace("_", "/_") + "%"
+            stmt = stmt.where(or_(cls.name.like(pattern, escape="/"), cls.approval_code.like(pattern, escape="/")))
+        if after is not None:
+            stmt = stmt.where(cls.id > after)
+        stmt = stmt.order_by(cls.id).limit(limit)
+        return list(await session.execute(stmt))
+
     @classmethod
     async def exists(cls, session: AsyncSession, approval_code: str) -> bool:
         """检查指定的审批定义 code 是否存在.
@@ -0,0 +1,94 @@
+"""飞书事件去重表模块."""
+
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+from src.lib import const
+from src.lib import metrics
+from src.lib.cache import TTLCache
+
+
+# 已处理事件的进程内缓存，命中时无需访问数据库.
+_seen = TTLCache(const.LARK_EVENT_DEDUP_WINDOW_SECONDS, const.LARK_EVENT_DEDUP_CACHE_MAXSIZE)
+
+duplicate_events = metrics.Counter("lark_ticket_duplicate_events_total", "被去重丢弃的飞书重复事件数", ["layer"])
+
+
+class EventModel(HasIdMixin, HasCreateTimeMixin, Base):
+    """飞书事件去重表定义.
+
+    只保留去重窗口内的事件 id，过期数据由定时任务清理。
+    """
+
+    __tablename__ = "tb_event"
+    __table_args__ = (Index("idx_create_time", "create_time"),)
+
+    event_id: Mapped[str] = mapped_column(
+        String(64), nullable=False, unique=True, comment="飞书事件 id(v2 为 header.event_id，v1 为 uuid)"
+    )
+
+    @classmethod
+    async def claim(cls, session: AsyncSession, event_id: str) -> bool:
+        """登记事件，判断是否为首次投递.
+
+        登记在当前事务中完成，需要调用方提交；提交成功后调用 remember 写入进程内缓存。
+        多个 worker 同时收到同一事件时，由唯一索引保证只有一个能登记成功。
+
+        Args:
+            session: 数据库会话.
+            event_id: 飞书事件 id.
+
+        Returns:
+            True: 首次投递
+            False: 重复投递
+        """
+        if event_id in _seen:
+            duplicate_events.labels(layer="memory").inc()
+            return False
+
+        result = await session.execute(insert(cls).prefix_with("IGNORE").values(event_id=event_id))
+        if result.rowcount == 0:  # type: ignore
+            _seen.set(event_id, True)
+            duplicate_events.labels(layer="database").inc()
+            return False
+        return True
+
+    @classmethod
+    def remember(cls, event_id: str) -> None:
+        """将已提交的事件写入进程内缓存.
+
+        Args:
+            event_id: 飞书事件 id.
+        """
+        _seen.set(event_id, True)
+
+    @classmethod
+    async def purge(cls, session: AsyncSession, window_seconds: int) -> int:
+        """清理去重窗口之外的事件.
+
+        Args:
+            session: 数据库会话.
+            window_seconds: 去重窗口(秒).
+
+        Returns:
+            清理的条数.
+        """
+        result = await session.execute(
+            delete(cls).where(cls.create_time < func.timestampadd(text("SECOND"), -window_seconds, func.now()))
+        )
+        await session.commit()
+        return result.rowcount  # type: ignore
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return f"EventModel(id={self.id!r} event_id={self.event_id!r} create_time={self.create_time!r})"
@@ -0,0 +1,120 @@
+"""已结束审批实例表模块."""
+
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import delete
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+from src.lib import const
+from src.lib.cache import TTLCache
+
+
+# 已确认结束的审批实例的进程内缓存，实例结束后不会再变为审批中，命中时无需访问数据库.
+_closed = TTLCache(const.LARK_CLOSED_INSTANCE_CACHE_TTL_SECONDS, const.LARK_CLOSED_INSTANCE_CACHE_MAXSIZE)
+
+
+class ClosedInstanceModel(HasIdMixin, HasCreateTimeMixin, Base):
+    """已结束审批实例表定义.
+
+    由审批实例状态变更事件写入，所有 worker 处理审批任务事件和写入工单台账时据此跳过已结束的实例，
+    过期数据由定时任务清理。
+    """
+
+    __tablename__ = "tb_closed_instance"
+    __table_args__ = (Index("idx_create_time", "create_time"),)
+
+    instance_code: Mapped[str] = mapped_column(String(128), nullable=False, unique=True, comment="审批实例 code")
+    approval_code: Mapped[str] = mapped_column(String(255), nullable=False, comment="审批定义 code")
+    status: Mapped[str] = mapped_column(String(16), nullable=False, comment="审批实例结束时的状态")
+
+    @classmethod
+    async def add(cls, session: AsyncSession, instance_code: str, approval_code: str, status: str) -> None:
+        """登记已结束的审批实例，重复登记时忽略.
+
+        登记在当前事务中完成，需要调用方提交；提交成功后调用 remember 写入进程内缓存。
+
+        Args:
+            session: 数据库会话.
+            instance_code: 审批实例 code.
+            approval_code: 审批定义 code.
+            status: 审批实例状态.
+        """
+        await session.execute(
+            insert(cls)
+            .prefix_with("IGNORE")
+            .values(instance_code=instance_code, approval_code=approval_code, status=status)
+        )
+
+    @classmethod
+    def remember(cls, instance_code: str) -> None:
+        """将已提交的审批实例写入进程内缓存.
+
+        Args:
+            instance_code: 审批实例 code.
+        """
+        _closed.set(instance_code, True)
+
+    @classmethod
+    async def is_closed(cls, session: AsyncSession, instance_code: str) -> bool:
+        """判断审批实例是否已结束，优先读取进程内缓存.
+
+        Args:
+            session: 数据库会话.
+            instance_code: 审批实例 code.
+
+        Returns:
+            True: 已结束
+            False: 未登记
+        """
+        if cls.known_closed(instance_code):
+            return True
+        if await session.scalar(exists().where(cls.instance_code == instance_code).select()):
+            cls.remember(instance_code)
+            return True
+        return False
+
+    @classmethod
+    def known_closed(cls, instance_code: str) -> bool:
+        """仅根据进程内缓存判断审批实例是否已结束，不访问数据库.
+
+        Args:
+            instance_code: 审批实例 code.
+
+        Returns:
+            True: 已结束
+            False: 未结束或缓存中没有记录
+        """
+        return instance_code in _closed
+
+    @classmethod
+    async def purge(cls, session: AsyncSession, retention_days: int) -> int:
+        """清理保留期之外的记录.
+
+        Args:
+            session: 数据库会话.
+            retention_days: 保留天数.
+
+        Returns:
+            清理的条数.
+        """
+        result = await session.execute(
+            delete(cls).where(cls.create_time < func.timestampadd(text("DAY"), -retention_days, func.now()))
+        )
+        await session.commit()
+        return result.rowcount  # type: ignore
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return (
+            f"ClosedInstanceModel(id={self.id!r} instance_code={self.instance_code!r} status={self.status!r} "
+            f"create_time={self.create_time!r})"
+        )
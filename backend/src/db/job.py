@@ -0,0 +1,50 @@
+"""后台任务表模块."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import Text
+from sqlalchemy import text
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+from src.db.base import HasLastUpdateTimeMixin
+from src.lib import const
+from src.lib import enum
+
+
+class JobModel(HasIdMixin, HasCreateTimeMixin, HasLastUpdateTimeMixin, Base):
+    """后台任务表定义.
+
+    执行成功的任务会被删除，表中只保留待执行、执行中和最终失败的任务。
+    """
+
+    __tablename__ = "tb_job"
+    __table_args__ = (Index("idx_status_available_time", "status", "available_time"),)
+
+    kind: Mapped[str] = mapped_column(String(64), nullable=False, comment="任务类型")
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, comment="任务参数")
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, server_default=enum.JobStatus.PENDING.value, comment="任务状态"
+    )
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default=text("0"), comment="已执行次数")
+    available_time: Mapped[datetime] = mapped_column(
+        server_default=text(const.DATABASE_FIELD_CREATETIME_SERVER_DEFAULT), comment="最早可执行时间"
+    )
+    locked_by: Mapped[str | None] = mapped_column(String(128), nullable=True, comment="执行者标识")
+    locked_time: Mapped[datetime | None] = mapped_column(nullable=True, comment="开始执行时间")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="最后一次执行的错误信息")
+    traceparent: Mapped[str | None] = mapped_column(String(64), nullable=True, comment="入队时的链路上下文")
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return (
+            f"JobModel(id={self.id!r} kind={self.kind!r} status={self.status!r} attempts={self.attempts!r} "
+            f"payload={self.payload!r})"
+        )
@@ -0,0 +1,29 @@
+"""租约表模块."""
+
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasIdMixin
+from src.db.base import HasLastUpdateTimeMixin
+
+
+class LeaseModel(HasIdMixin, HasLastUpdateTimeMixin, Base):
+    """租约表定义.
+
+    每个租约一行，持有者需要在到期前续约，到期后其他进程可以抢占。
+    到期时间使用数据库时间，不受各主机时钟偏差影响。
+    """
+
+    __tablename__ = "tb_lease"
+
+    name: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, comment="租约名称")
+    holder: Mapped[str] = mapped_column(String(128), nullable=False, comment="持有者标识")
+    expire_time: Mapped[datetime] = mapped_column(nullable=False, comment="到期时间")
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return f"LeaseModel(id={self.id!r} name={self.name!r} holder={self.holder!r} expire_time={self.expire_time!r})"
@@ -0,0 +1,77 @@
+"""数据库结构版本表模块."""
+
+import hashlib
+
+from sqlalchemy import String
+from sqlalchemy import exc
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.schema import CreateTable
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+from src.lib import const
+
+
+class SchemaVersionModel(HasIdMixin, HasCreateTimeMixin, Base):
+    """数据库结构版本表定义.
+
+    每次表结构变化后记录一行，最新一行为当前版本。
+    启动时只需比对版本，一致时无需执行 create_all 逐表检查。
+    """
+
+    __tablename__ = "tb_schema_version"
+
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False, comment="表结构指纹")
+
+    @classmethod
+    def fingerprint_of_models(cls) -> str:
+        """根据已加载的表定义计算表结构指纹.
+
+        Returns:
+            所有表的 CREATE TABLE / CREATE INDEX 语句的 sha256.
+        """
+        dialect = mysql.dialect()
+        digest = hashlib.sha256()
+        for table in Base.metadata.sorted_tables:
+            digest.update(str(CreateTable(table).compile(dialect=dialect)).encode(const.UTF_8))
+            for index in sorted(table.indexes, key=lambda index: index.name or ""):
+                digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode(const.UTF_8))
+        return digest.hexdigest()
+
+    @classmethod
+    async def current(cls, conn: AsyncConnection) -> str | None:
+        """获取数据库中记录的表结构指纹.
+
+        Args:
+            conn: 数据库连接.
+
+        Returns:
+            最新的表结构指纹，版本表不存在或没有记录时返回 None.
+        """
+        try:
+            return await conn.scalar(select(cls.fingerprint).order_by(cls.id.desc()).limit(1))
+        except exc.ProgrammingError:
+            # 版本表不存在
+            await conn.rollback()
+            return None
+
+    @classmethod
+    async def record(cls, conn: AsyncConnection, fingerprint: str) -> None:
+        """记录新的表结构指纹，需要调用方提交.
+
+        Args:
+            conn: 数据库连接.
+            fingerprint: 表结构指纹.
+        """
+        await conn.execute(insert(cls).values(fingerprint=fingerprint))
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return f"SchemaVersionModel(id={self.id!r} fingerprint={self.fingerprint!r} create_time={self.create_time!r})"
@@ -0,0 +1,192 @@
+"""工单台账表模块."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import and_
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+from src.db.base import HasLastUpdateTimeMixin
+from src.db.instance import ClosedInstanceModel
+from src.lib import enum
+
+
+class TicketModel(HasIdMixin, HasCreateTimeMixin, HasLastUpdateTimeMixin, Base):
+    """工单台账表定义.
+
+    每个检查、执行节点的审批任务一行，ticket_id 与回调中的工单标识符相同。
+    """
+
+    __tablename__ = "tb_ticket"
+    __table_args__ = (
+        Index("idx_approval_code_status_create_time", "approval_code", "status", "create_time"),
+        Index("idx_instance_code", "instance_code"),
+        Index("idx_create_time", "create_time"),
+    )
+
+    ticket_id: Mapped[str] = mapped_column(String(512), nullable=False, unique=True, comment="工单标识符")
+    approval_code: Mapped[str] = mapped_column(String(255), nullable=False, comment="审批定义 code")
+    instance_code: Mapped[str] = mapped_column(String(128), nullable=False, comment="审批实例 code")
+    task_id: Mapped[str] = mapped_column(String(128), nullable=False, comment="审批任务 id")
+    node: Mapped[str] = mapped_column(String(64), nullable=False, server_default="", comment="审批节点名称")
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, server_default=enum.TicketStatus.PENDING.value, comment="工单状态"
+    )
+    comment: Mapped[str] = mapped_column(String(1024), nullable=False, server_default="", comment="审批意见")
+
+    @classmethod
+    async def upsert(cls, session: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        """批量写入或更新工单，不提交事务.
+
+        只更新行中给出的字段；已经结束的工单不会被改回审批中，
+        以免不同 worker 的写入先后顺序与实际顺序不一致.
+        实例已结束(见 tb_closed_instance)时，写入的审批中工单在同一事务中标记为已取消，
+        缓冲区中晚于实例结束写入的工单也不会一直处于审批中.
+
+        Args:
+            session: 数据库会话.
+            rows: 工单字段，同一批次中各行的字段需要相同.
+        """
+        stmt = insert(cls).values(rows)
+        values = {key: stmt.inserted[key] for key in rows[0] if key != "ticket_id"}
+        if "status" in values:
+            values["status"] = func.if_(cls.status == enum.TicketStatus.PENDING.value, values["status"], cls.status)
+        await session.execute(stmt.on_duplicate_key_update(values))
+        if "status" in values:
+            await session.execute(
+                update(cls)
+                .where(
+                    cls.ticket_id.in_([row["ticket_id"] for row in rows]),
+                    cls.status == enum.TicketStatus.PENDING.value,
+                    cls.instance_code.in_(select(ClosedInstanceModel.instance_code)),
+                )
+                .values(status=enum.TicketStatus.CANCELED.value)
+            )
+
+    @classmethod
+    async def get(cls, session: AsyncSession, ticket_id: str) -> "TicketModel | None":
+        """根据工单标识符检索工单.
+
+        Args:
+            session: 数据库会话.
+            ticket_id: 工单标识符.
+
+        Returns:
+            工单，不存在时返回 None.
+        """
+        return await session.scalar(select(cls).where(cls.ticket_id == ticket_id))
+
+    @classmethod
+    async def page(
+        cls,
+        session: AsyncSession,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        approval_code: str | None = None,
+        status: enum.TicketStatus | None = None,
+        instance_code: str | None = None,
+    ) -> list["TicketModel"]:
+        """按创建时间倒序分页查询工单.
+
+        使用上一页最后一行的 (create_time, id) 作为游标，翻页代价与页码无关；
+        按审批定义和状态查询时走 idx_approval_code_status_create_time，按实例查询时走 idx_instance_code.
+
+        Args:
+            session: 数据库会话.
+            limit: 返回条数.
+            after: 上一页最后一行的 (create_time, id)，第一页为 None.
+            approval_code: 审批定义 code.
+            status: 工单状态.
+            instance_code: 审批实例 code.
+
+        Returns:
+            工单列表.
+        """
+        stmt = select(cls)
+        if approval_code is not None:
+            stmt = stmt.where(cls.approval_code == approval_code)
+        if status is not None:
+            stmt = stmt.where(cls.status == status.value)
+        if instance_code is not None:
+            stmt = stmt.where(cls.instance_code == instance_code)
+        if after is not None:
+            create_time, id_ = after
+            stmt = stmt.where(or_(cls.create_time < create_time, and_(cls.create_time == create_time, cls.id < id_)))
+        stmt = stmt.order_by(cls.create_time.desc(), cls.id.desc()).limit(limit)
+        return list(await session.scalars(stmt))
+
+    @classmethod
+    async def cancel_pending(cls, session: AsyncSession, instance_code: str) -> int:
+        """把审批实例中审批中的工单标记为已取消，不提交事务.
+
+        Args:
+            session: 数据库会话.
+            instance_code: 审批实例 code.
+
+        Returns:
+            更新的条数.
+        """
+        result = await session.execute(
+            update(cls)
+            .where(cls.instance_code == instance_code, cls.status == enum.TicketStatus.PENDING.value)
+            .values(status=enum.TicketStatus.CANCELED.value)
+        )
+        return result.rowcount
+
+    @classmethod
+    async def purge(cls, session: AsyncSession, retention_days: int, batch_size: int) -> int:
+        """分批清理保留期之外的工单，避免一次删除大量数据长时间持有锁.
+
+        Args:
+            session: 数据库会话.
+            retention_days: 保留天数.
+            batch_size: 每批删除的条数.
+
+        Returns:
+            清理的条数.
+        """
+        deleted = 0
+        expired = cls.create_time < func.timestampadd(text("DAY"), -retention_days, func.now())
+        while True:
+            ids = list(await session.scalars(select(cls.id).where(expired).limit(batch_size)))
+            if ids:
+                await session.execute(delete(cls).where(cls.id.in_(ids)))
+                await session.commit()
+                deleted += len(ids)
+            if len(ids) < batch_size:
+                return deleted
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为接口返回的格式."""
+        return {
+            "ticket_id": self.ticket_id,
+            "approval_code": self.approval_code,
+            "instance_code": self.instance_code,
+            "task_id": self.task_id,
+            "node": self.node,
+            "status": self.status,
+            "comment": self.comment,
+            "create_time": self.create_time,
+            "last_update_time": self.last_update_time,
+        }
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return (
+            f"TicketModel(id={self.id!r} ticket_id={self.ticket_id!r} node={self.node!r} status={self.status!r} "
+            f"create_time={self.create_time!r})"
+        )
@@ -0,0 +1,76 @@
+"""业务方接口请求记录表模块."""
+
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+from src.db.base import Base
+from src.db.base import HasCreateTimeMixin
+from src.db.base import HasIdMixin
+
+
+class WebhookPostModel(HasIdMixin, HasCreateTimeMixin, Base):
+    """业务方接口请求记录表定义.
+
+    请求检查、执行节点的业务方接口之前登记工单并单独提交，任务被取消或租约到期后重新执行时，
+    据此判断请求可能已经发出，不再重复请求。过期数据由定时任务清理。
+    """
+
+    __tablename__ = "tb_webhook_post"
+    __table_args__ = (Index("idx_create_time", "create_time"),)
+
+    ticket_id: Mapped[str] = mapped_column(String(512), nullable=False, unique=True, comment="工单标识符")
+
+    @classmethod
+    async def claim(cls, session: AsyncSession, ticket_id: str) -> bool:
+        """登记工单并提交事务，判断是否为首次请求.
+
+        Args:
+            session: 数据库会话.
+            ticket_id: 工单标识符.
+
+        Returns:
+            True: 首次请求
+            False: 已经登记过，请求可能已经发出
+        """
+        result = await session.execute(insert(cls).prefix_with("IGNORE").values(ticket_id=ticket_id))
+        await session.commit()
+        return result.rowcount > 0  # type: ignore
+
+    @classmethod
+    async def release(cls, session: AsyncSession, ticket_id: str) -> None:
+        """删除登记并提交事务，仅在确认请求没有发出时调用.
+
+        Args:
+            session: 数据库会话.
+            ticket_id: 工单标识符.
+        """
+        await session.execute(delete(cls).where(cls.ticket_id == ticket_id))
+        await session.commit()
+
+    @classmethod
+    async def purge(cls, session: AsyncSession, retention_days: int) -> int:
+        """清理保留期之外的记录.
+
+        Args:
+            session: 数据库会话.
+            retention_days: 保留天数.
+
+        Returns:
+            清理的条数.
+        """
+        result = await session.execute(
+            delete(cls).where(cls.create_time < func.timestampadd(text("DAY"), -retention_days, func.now()))
+        )
+        await session.commit()
+        return result.rowcount  # type: ignore
+
+    def __repr__(self) -> str:
+        """打印时的字符串格式."""
+        return f"WebhookPostModel(id={self.id!r} ticket_id={self.ticket_id!r} create_time={self.create_time!r})"
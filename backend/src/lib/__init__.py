@@ -1,5 +1,6 @@
 """封装的项目公共包.
 
+cache            -- 进程内缓存
 config           -- 配置
 const            -- 常量
 enum             -- 枚举
@@ -7,7 +8,16 @@ event            -- FastAPI 事件 hook
 exceptions       -- 自定义异常
 extension        -- 拓展,如日志、Sentry 等
 gunicorn_runner  -- gunicorn 初始化
+job              -- 持久化后台任务
+leader           -- 跨主机互斥与选主
+log              -- 结构化日志
+metrics          -- 指标
 middleware       -- FastAPI 中间件
+ratelimit        -- 限流
+relation         -- 关联字段映射
+resilience       -- 容错: 熔断、并发隔离
 schema           -- 结构体
+ticket           -- 工单台账
+tracing          -- 链路追踪
 util             -- 工具
 """
@@ -0,0 +1,132 @@
+"""进程内缓存模块.
+
+每个 gunicorn worker 各自持有一份，不跨进程共享。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from typing import Any
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """带过期时间和容量上限的 LRU 缓存."""
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        """初始化缓存.
+
+        Args:
+            ttl: 默认过期时间(秒).
+            maxsize: 最大条目数，超出后淘汰最久未使用的条目.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取未过期的缓存值.
+
+        Args:
+            key: 缓存键.
+            default: 未命中时的返回值.
+
+        Returns:
+            缓存值，未命中或已过期时返回 default.
+        """
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+
+        expires_at, value = item  # type: ignore
+        if expires_at <= time.monotonic():
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def get_expired(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，忽略是否过期.
+
+        用于过期后的再校验，比如比对版本号后续期.
+
+        Args:
+            key: 缓存键.
+            default: 未命中时的返回值.
+
+        Returns:
+            缓存值，未命中时返回 default.
+        """
+        item = self._data.get(key, _MISSING)
+        return default if item is _MISSING else item[1]  # type: ignore
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """写入缓存.
+
+        Args:
+            key: 缓存键.
+            value: 缓存值.
+            ttl: 过期时间(秒)，默认使用初始化时的 ttl.
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """删除缓存.
+
+        Args:
+            key: 缓存键.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存."""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """判断是否存在未过期的缓存."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        """缓存条目数(包含已过期但未淘汰的条目)."""
+        return len(self._data)
+
+
+class SingleFlight:
+    """合并同一个键的并发调用.
+
+    同一时刻相同键只会执行一次，其余调用者等待并共享结果或异常。
+    """
+
+    def __init__(self) -> None:
+        """初始化."""
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行或等待正在执行的调用.
+
+        调用者被取消不会影响共享的调用.
+
+        Args:
+            key: 合并的键.
+            func: 实际执行的协程函数.
+
+        Returns:
+            func 的返回值.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(func())
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(call)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """判断相同键的调用是否正在执行."""
+        return key in self._calls
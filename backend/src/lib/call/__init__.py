@@ -1,4 +1,6 @@
 """与第三方接口的交互包.
 
-1. lark_api  -- 飞书 SDK 封装
+1. lark_api        -- 飞书 SDK 封装
+2. webhook         -- 检查、执行节点的业务方接口调用
+3. external_field  -- 外部字段的业务方接口调用
 """
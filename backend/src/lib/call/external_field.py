@@ -0,0 +1,111 @@
+"""外部字段的业务方接口调用.
+
+飞书在用户输入、翻页时会反复请求同一个外部选项，业务方接口通常较慢，而飞书的超时时间很短。
+按 (审批定义, 字段, 搜索词, 联动参数, 分页标记) 缓存业务方的响应，缓存时间按字段配置；
+返回了下一页分页标记时在后台预取下一页，用户翻页时直接命中缓存。
+"""
+
+import asyncio
+from typing import Any
+
+import orjson
+from loguru import logger
+
+from src.lib import const
+from src.lib import metrics
+from src.lib import schema
+from src.lib import util
+from src.lib.cache import SingleFlight
+from src.lib.cache import TTLCache
+
+
+_cache = TTLCache(const.EXTERNAL_FIELD_CACHE_DEFAULT_TTL_SECONDS, const.EXTERNAL_FIELD_CACHE_MAXSIZE)
+_single_flight = SingleFlight()
+_prefetches: set[asyncio.Task[Any]] = set()
+
+field_requests = metrics.Counter(
+    "lark_ticket_external_field_requests_total", "外部字段请求的缓存使用情况", ["approval_code", "result"]
+)
+
+
+def _key(approval_code: str, field_code: str, params: schema.LarkExternalField) -> tuple[str, ...]:
+    """缓存键，联动参数按键排序后序列化，不包含每次都相同的校验 token."""
+    return (
+        approval_code,
+        field_code,
+        params.query or "",
+        orjson.dumps(params.linkage_params, option=orjson.OPT_SORT_KEYS).decode(),
+        params.page_token or "",
+    )
+
+
+def _next_page_token(response: Any) -> str | None:
+    """从业务方响应中取出下一页的分页标记，没有下一页时返回 None."""
+    if not isinstance(response, dict):
+        return None
+    result = (response.get("data") or {}).get("result") or {}
+    if not isinstance(result, dict) or not result.get("hasMore"):
+        return None
+    return result.get("nextPageToken") or None
+
+
+async def get(approval_code: str, field: schema.FieldItem, params: schema.LarkExternalField) -> dict[str, Any]:
+    """获取外部字段数据.
+
+    同一个键的并发请求只会调用一次业务方接口.
+
+    Args:
+        approval_code: 审批定义 code.
+        field: 字段配置.
+        params: 飞书的请求参数.
+
+    Returns:
+        业务方接口的原始响应.
+    """
+    key = _key(approval_code, field.code, params)
+    cached = _cache.get(key)
+    if cached is not None:
+        field_requests.labels(approval_code=approval_code, result="hit").inc()
+        response = cached
+    else:
+        field_requests.labels(approval_code=approval_code, result="shared" if key in _single_flight else "miss").inc()
+        response = await _single_flight.do(key, lambda: _fetch(key, approval_code, field, params))
+    _prefetch(approval_code, field, params, response)
+    return response
+
+
+async def _fetch(
+    key: tuple[str, ...], approval_code: str, field: schema.FieldItem, params: schema.LarkExternalField
+) -> dict[str, Any]:
+    """调用业务方接口，按字段配置写入缓存."""
+    with metrics.timer("external_field", approval_code):
+        response = await util.do_post_json(field.url, params.model_dump(), timeout=const.EXTERNAL_FIELD_TIMEOUT_SECONDS)
+    if field.cache_ttl > 0:
+        _cache.set(key, response, ttl=field.cache_ttl)
+    return response
+
+
+def _prefetch(
+    approval_code: str, field: schema.FieldItem, params: schema.LarkExternalField, response: dict[str, Any]
+) -> None:
+    """有下一页时在后台预取，缓存关闭、已缓存或正在获取时不处理."""
+    page_token = _next_page_token(response)
+    if page_token is None or field.cache_ttl <= 0 or len(_prefetches) >= const.EXTERNAL_FIELD_PREFETCH_MAX_TASKS:
+        return
+
+    next_params = params.model_copy(update={"page_token": page_token})
+    key = _key(approval_code, field.code, next_params)
+    if key in _single_flight or _cache.get(key) is not None:
+        return
+
+    field_requests.labels(approval_code=approval_code, result="prefetch").inc()
+    task = asyncio.create_task(_single_flight.do(key, lambda: _fetch(key, approval_code, field, next_params)))
+    _prefetches.add(task)
+    task.add_done_callback(_on_prefetch_done)
+
+
+def _on_prefetch_done(task: asyncio.Task[Any]) -> None:
+    """预取结束，失败时只记录日志，用户翻页时会重新请求."""
+    _prefetches.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"[external field][prefetch failed] {task.exception()!r}")
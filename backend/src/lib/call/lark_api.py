@@ -1,37 +1,267 @@
 """飞书 SDK 封装."""
 
-import lark_oapi as lark
-from lark_oapi.api.approval.v4 import ApproveTaskRequest
-from lark_oapi.api.approval.v4 import ApproveTaskResponse
-from lark_oapi.api.approval.v4 import GetApprovalRequest
-from lark_oapi.api.approval.v4 import GetApprovalResponse
-from lark_oapi.api.approval.v4 import GetApprovalResponseBody
-from lark_oapi.api.approval.v4 import GetInstanceRequest
-from lark_oapi.api.approval.v4 import GetInstanceResponse
-from lark_oapi.api.approval.v4 import GetInstanceResponseBody
-from lark_oapi.api.approval.v4 import RejectTaskRequest
-from lark_oapi.api.approval.v4 import RejectTaskResponse
-from lark_oapi.api.approval.v4 import SubscribeApprovalRequest
-from lark_oapi.api.approval.v4 import SubscribeApprovalResponse
-from lark_oapi.api.approval.v4 import TaskApprove
-from lark_oapi.api.approval.v4 import UnsubscribeApprovalRequest
-from lark_oapi.api.approval.v4 import UnsubscribeApprovalResponse
-
+import asyncio
+import random
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from typing import Any
+
+from asyncer import asyncify
+from loguru import logger
+
+from src.lib import const
+from src.lib import enum
+from src.lib import metrics
+from src.lib import tracing
+from src.lib import util
+from src.lib.cache import SingleFlight
+from src.lib.cache import TTLCache
 from src.lib.config import settings
+from src.lib.exceptions import LarkAPIException
+from src.lib.ratelimit import TokenBucket
+
+
+if TYPE_CHECKING:
+    from lark_oapi.api.approval.v4 import GetApprovalResponseBody
+    from lark_oapi.api.approval.v4 import GetInstanceResponseBody
+    from lark_oapi.core.model import BaseResponse
+
+
+# lark_oapi 连同审批 v4 模块的导入耗时以秒计，延迟到启动后在后台线程中导入(见 preload)，
+# 首次使用时如果还未导入完成则等待.
+_sdk: tuple[Any, Any] | None = None
+_sdk_single_flight = SingleFlight()
+_preload_tasks: set[asyncio.Task[Any]] = set()
+
+
+def import_sdk() -> tuple[Any, Any]:
+    """只导入 SDK 模块，不创建客户端.
+
+    gunicorn preload 模式下由主进程调用，模块所占内存由各 worker 共享.
+
+    Returns:
+        (lark_oapi 模块, lark_oapi.api.approval.v4 模块).
+    """
+    import lark_oapi as lark
+    from lark_oapi.api.approval import v4
+
+    return lark, v4
+
+
+def _load_sdk() -> tuple[Any, Any]:
+    """导入 SDK 并创建客户端.
+
+    tenant_access_token 由 TenantAccessToken 管理，SDK 内置的获取方式是同步请求，会阻塞事件循环.
+
+    Returns:
+        (SDK 客户端, lark_oapi.api.approval.v4 模块).
+    """
+    lark, v4 = import_sdk()
+    client = (
+        lark.Client.builder()
+        .app_id(settings.lark.app_id)
+        .app_secret(settings.lark.app_secret)
+        .domain(settings.lark.domain)
+        .enable_set_token(True)
+        .log_level(lark.LogLevel.DEBUG)
+        .build()
+    )
+    return client, v4
 
 
-_client = (
-    lark.Client.builder()
-    .app_id(settings.lark.app_id)
-    .app_secret(settings.lark.app_secret)
-    .log_level(lark.LogLevel.DEBUG)
-    .build()
+async def _get_sdk() -> tuple[Any, Any]:
+    """获取 SDK 客户端和审批 v4 模块，未导入时在线程池中导入，不阻塞事件循环."""
+    global _sdk
+    if _sdk is None:
+        _sdk = await _sdk_single_flight.do(None, asyncify(_load_sdk))
+    return _sdk
+
+
+def preload() -> None:
+    """在后台导入 SDK，由应用启动时调用，避免首个回调承担导入耗时."""
+    if _sdk is None and not _preload_tasks:
+        task = asyncio.create_task(_get_sdk())
+        _preload_tasks.add(task)
+        task.add_done_callback(_preload_tasks.discard)
+
+
+token_requests = metrics.Counter("lark_ticket_lark_token_requests_total", "tenant_access_token 的使用情况", ["result"])
+throttled_calls = metrics.Counter(
+    "lark_ticket_lark_api_throttled_total", "被本地令牌桶延迟的飞书接口调用数", ["family"]
+)
+retried_calls = metrics.Counter("lark_ticket_lark_api_retries_total", "被飞书限流后重试的调用数", ["family"])
+instance_requests = metrics.Counter(
+    "lark_ticket_lark_instance_requests_total", "获取审批实例详情的调用情况", ["result"]
 )
+approval_cache_requests = metrics.Counter(
+    "lark_ticket_lark_approval_cache_requests_total", "审批定义缓存的命中情况", ["result"]
+)
+
+
+class TenantAccessToken:
+    """自建应用 tenant_access_token 管理.
+
+    进程内复用 token，在过期前提前刷新；并发请求同一时刻只会发起一次获取。
+    """
+
+    def __init__(self, app_id: str, app_secret: str) -> None:
+        """初始化.
+
+        Args:
+            app_id: 应用 id.
+            app_secret: 应用密钥.
+        """
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self._token = ""
+        self._refresh_at = 0.0
+        self._single_flight = SingleFlight()
+
+    async def get(self) -> str:
+        """获取可用的 token.
+
+        Returns:
+            tenant_access_token.
+        """
+        if self._token and time.monotonic() < self._refresh_at:
+            token_requests.labels(result="hit").inc()
+            return self._token
+        return await self._single_flight.do(self.app_id, self._fetch)
+
+    def invalidate(self, token: str) -> None:
+        """使 token 失效，下次使用时重新获取.
+
+        Args:
+            token: 被判定无效的 token，已经被其他协程刷新过时不做处理.
+        """
+        if self._token == token:
+            self._token = ""
+            self._refresh_at = 0.0
+
+    async def _fetch(self) -> str:
+        """向飞书获取新的 token.
+
+        Raises:
+            LarkAPIException: 如果请求失败，则抛出异常.
+        """
+        url = f"{settings.lark.domain}{const.LARK_TENANT_ACCESS_TOKEN_URI}"
+        r = await util.http_clients.get(url).post(url, json={"app_id": self.app_id, "app_secret": self.app_secret})
+        # 网关错误时响应可能不是 JSON，错误码使用 HTTP 状态码，以便调用方按限流等情况处理
+        if r.status_code not in const.HTTP_SUCCESS_STATUS_CODE:
+            token_requests.labels(result="error").inc()
+            raise LarkAPIException("get_tenant_access_token", r.status_code, r.text[: const.LARK_ERROR_BODY_MAX_LENGTH])
+        try:
+            data: dict[str, Any] = r.json()
+        except ValueError:
+            token_requests.labels(result="error").inc()
+            raise LarkAPIException(
+                "get_tenant_access_token", r.status_code, r.text[: const.LARK_ERROR_BODY_MAX_LENGTH]
+            ) from None
+        if data.get("code") != 0:
+            token_requests.labels(result="error").inc()
+            raise LarkAPIException("get_tenant_access_token", data.get("code"), data.get("msg"))
+
+        token_requests.labels(result="fetch").inc()
+        self._token = data["tenant_access_token"]
+        self._refresh_at = time.monotonic() + max(0, data["expire"] - const.LARK_TOKEN_REFRESH_AHEAD_SECONDS)
+        logger.info(f"[lark][fetched tenant_access_token] expire: {data['expire']}s")
+        return self._token
+
+
+_tenant_access_token = TenantAccessToken(settings.lark.app_id, settings.lark.app_secret)
+
+
+_buckets = {
+    family: TokenBucket(
+        const.LARK_RATE_LIMITS[family.value][0] / settings.basic.workers_count,
+        max(1, const.LARK_RATE_LIMITS[family.value][1] // settings.basic.workers_count),
+    )
+    for family in enum.LarkAPIFamily
+}
+
+
+# 表示被限流的飞书错误码和 HTTP 状态码
+_RATE_LIMIT_ERROR_CODES = {*const.LARK_RATE_LIMIT_CODES, const.LARK_RATE_LIMIT_HTTP_STATUS}
+
+
+def _is_rate_limited(response: "BaseResponse") -> bool:
+    """判断是否被飞书限流."""
+    return response.code in const.LARK_RATE_LIMIT_CODES or (
+        response.raw is not None and response.raw.status_code == const.LARK_RATE_LIMIT_HTTP_STATUS
+    )
+
+
+async def _call(family: enum.LarkAPIFamily, method: Callable[..., Awaitable[Any]], request: Any) -> Any:
+    """经过限流，携带 tenant_access_token 调用 SDK 方法.
+
+    同一分组的调用共享一个令牌桶；被飞书限流(包括获取 token 被限流)时清空令牌桶，按指数退避加随机抖动重试.
+    token 被飞书判定为无效时(比如被其他进程刷新后提前作废)重新获取并重试一次.
 
+    Args:
+        family: 接口分组.
+        method: SDK 的异步方法，如 client.approval.v4.instance.aget.
+        request: 请求对象.
+
+    Returns:
+        SDK 响应对象，重试耗尽时返回最后一次的响应.
+    """
+    with tracing.span(f"lark {method.__qualname__}", enum.SpanKind.CLIENT, family=family.value) as span:
+        response = await _call_with_retry(family, method, request)
+        span.set_attribute("code", response.code)
+        return response
+
+
+async def _call_with_retry(family: enum.LarkAPIFamily, method: Callable[..., Awaitable[Any]], request: Any) -> Any:
+    """_call 的实现."""
+    from lark_oapi.core.model import RequestOption
+
+    bucket = _buckets[family]
+    token_retried = False
+    attempt = 0
+    while True:
+        if await bucket.acquire() > 0:
+            throttled_calls.labels(family=family.value).inc()
+
+        try:
+            token = await _tenant_access_token.get()
+        except LarkAPIException as e:
+            # 获取 token 被限流时与接口限流一样退避重试
+            if e.code not in _RATE_LIMIT_ERROR_CODES or attempt >= const.LARK_RATE_LIMIT_MAX_RETRIES:
+                raise
+        else:
+            response = await method(request, RequestOption.builder().tenant_access_token(token).build())
+
+            if response.code in const.LARK_INVALID_TOKEN_CODES and not token_retried:
+                token_retried = True
+                _tenant_access_token.invalidate(token)
+                continue
+
+            if not _is_rate_limited(response) or attempt >= const.LARK_RATE_LIMIT_MAX_RETRIES:
+                return response
+
+        backoff = random.uniform(
+            0, min(const.LARK_RATE_LIMIT_BACKOFF_MAX_SECONDS, const.LARK_RATE_LIMIT_BACKOFF_SECONDS * 2**attempt)
+        )
+        attempt += 1
+        retried_calls.labels(family=family.value).inc()
+        tracing.set_attribute("retries", attempt)
+        logger.warning(f"[lark][rate limited] family: {family.value} attempt: {attempt} backoff: {backoff:.2f}s")
+        bucket.penalize(backoff)
+        await asyncio.sleep(backoff)
 
-async def get_approval_instance_detail(instance_id: str) -> GetInstanceResponseBody:
+
+_instance_cache = TTLCache(const.LARK_INSTANCE_CACHE_TTL_SECONDS, const.LARK_INSTANCE_CACHE_MAXSIZE)
+_instance_single_flight = SingleFlight()
+
+
+async def get_approval_instance_detail(instance_id: str) -> "GetInstanceResponseBody":
     """获取审批实例的详细信息.
 
+    同一实例的并发调用只会向飞书发起一次请求；LARK_INSTANCE_CACHE_TTL_SECONDS
+    大于 0 时，结果会在该时间内被复用.
+
     Args:
         instance_id: 审批实例的 ID.
 
@@ -39,16 +269,38 @@ async def get_approval_instance_detail(instance_id: str) -> GetInstanceResponseB
         GetInstanceResponseBody: 审批实例的详细信息.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: GetInstanceRequest = GetInstanceRequest.builder().instance_id(instance_id).build()
-    response: GetInstanceResponse = await _client.approval.v4.instance.aget(request)
+    cached = _instance_cache.get(instance_id)
+    if cached is not None:
+        instance_requests.labels(result="cache").inc()
+        return cached
 
-    if not response.success():
-        raise Exception(
-            f"[get_approval_instance_detail failed] code: {response.code}, msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}"
-        )
+    instance_requests.labels(result="shared" if instance_id in _instance_single_flight else "fetch").inc()
+    return await _instance_single_flight.do(instance_id, lambda: _fetch_approval_instance_detail(instance_id))
+
+
+async def _fetch_approval_instance_detail(instance_id: str) -> "GetInstanceResponseBody":
+    """从飞书获取审批实例的详细信息.
+
+    Args:
+        instance_id: 审批实例的 ID.
+
+    Returns:
+        GetInstanceResponseBody: 审批实例的详细信息.
+
+    Raises:
+        LarkAPIException: 如果请求失败，则抛出异常.
+    """
+    client, v4 = await _get_sdk()
+    request = v4.GetInstanceRequest.builder().instance_id(instance_id).build()
+    with metrics.timer("lark_instance_fetch") as labels:
+        response = await _call(enum.LarkAPIFamily.INSTANCE, client.approval.v4.instance.aget, request)
+        if not response.success():
+            raise LarkAPIException("get_approval_instance_detail", response.code, response.msg, response.get_log_id())
+        labels["approval_code"] = response.data.approval_code or ""
+    if const.LARK_INSTANCE_CACHE_TTL_SECONDS > 0:
+        _instance_cache.set(instance_id, response.data)
     return response.data
 
 
@@ -62,13 +314,14 @@ async def approval_task_approve(approval_code: str, instance_code: str, task_id:
         comment: 评论.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: ApproveTaskRequest = (
-        ApproveTaskRequest.builder()
+    client, v4 = await _get_sdk()
+    request = (
+        v4.ApproveTaskRequest.builder()
         .user_id_type("user_id")
         .request_body(
-            TaskApprove.builder()
+            v4.TaskApprove.builder()
             .approval_code(approval_code)
             .instance_code(instance_code)
             .user_id(settings.lark.assistant_user_id)
@@ -79,12 +332,10 @@ async def approval_task_approve(approval_code: str, instance_code: str, task_id:
         .build()
     )
 
-    response: ApproveTaskResponse = await _client.approval.v4.task.aapprove(request)
-    if not response.success():
-        raise Exception(
-            f"[approval_task_approve failed] code: {response.code}, msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}"
-        )
+    with metrics.timer("lark_task_approve", approval_code):
+        response = await _call(enum.LarkAPIFamily.TASK, client.approval.v4.task.aapprove, request)
+        if not response.success():
+            raise LarkAPIException("approval_task_approve", response.code, response.msg, response.get_log_id())
 
 
 async def approval_task_reject(approval_code: str, instance_code: str, task_id: str, comment: str):
@@ -97,13 +348,14 @@ async def approval_task_reject(approval_code: str, instance_code: str, task_id:
         comment: 评论.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: RejectTaskRequest = (
-        RejectTaskRequest.builder()
+    client, v4 = await _get_sdk()
+    request = (
+        v4.RejectTaskRequest.builder()
         .user_id_type("user_id")
         .request_body(
-            TaskApprove.builder()
+            v4.TaskApprove.builder()
             .approval_code(approval_code)
             .instance_code(instance_code)
             .user_id(settings.lark.assistant_user_id)
@@ -113,16 +365,62 @@ async def approval_task_reject(approval_code: str, instance_code: str, task_id:
         )
         .build()
     )
-    response: RejectTaskResponse = await _client.approval.v4.task.areject(request)
-    if not response.success():
-        raise Exception(
-            f"[approval_task_reject failed] code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}"
-        )
+    with metrics.timer("lark_task_reject", approval_code):
+        response = await _call(enum.LarkAPIFamily.TASK, client.approval.v4.task.areject, request)
+        if not response.success():
+            raise LarkAPIException("approval_task_reject", response.code, response.msg, response.get_log_id())
+
+
+_approval_cache = TTLCache(const.LARK_APPROVAL_CACHE_STALE_SECONDS, const.LARK_APPROVAL_CACHE_MAXSIZE)
+_approval_single_flight = SingleFlight()
+_background_refreshes: set[asyncio.Task[Any]] = set()
 
 
-async def get_approval_detail(approval_code: str) -> GetApprovalResponseBody:
+async def get_approval_detail(approval_code: str, use_cache: bool = True) -> "GetApprovalResponseBody":
     """获取审批定义详情.
 
+    审批定义很少变化，默认使用进程内缓存: 缓存新鲜时直接返回；过期但仍在
+    LARK_APPROVAL_CACHE_STALE_SECONDS 内时先返回旧数据，同时在后台刷新.
+
+    Args:
+        approval_code: 审批定义 code.
+        use_cache: 是否使用缓存，False 时强制从飞书获取并更新缓存.
+
+    Returns:
+        GetApprovalResponseBody: 审批详情.
+
+    Raises:
+        LarkAPIException: 如果请求失败，则抛出异常.
+    """
+    cached = _approval_cache.get(approval_code) if use_cache else None
+    if cached is None:
+        approval_cache_requests.labels(result="miss").inc()
+        return await _approval_single_flight.do(approval_code, lambda: _fetch_approval_detail(approval_code))
+
+    fetched_at, data = cached
+    if time.monotonic() - fetched_at < const.LARK_APPROVAL_CACHE_TTL_SECONDS:
+        approval_cache_requests.labels(result="hit").inc()
+    else:
+        approval_cache_requests.labels(result="stale").inc()
+        if approval_code not in _approval_single_flight:
+            task = asyncio.create_task(
+                _approval_single_flight.do(approval_code, lambda: _fetch_approval_detail(approval_code))
+            )
+            _background_refreshes.add(task)
+            task.add_done_callback(_on_background_refresh_done)
+    return data
+
+
+def _on_background_refresh_done(task: asyncio.Task[Any]) -> None:
+    """后台刷新结束，失败时记录日志，继续使用旧数据."""
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"[lark][refresh approval detail failed] {task.exception()!r}")
+
+
+async def _fetch_approval_detail(approval_code: str) -> "GetApprovalResponseBody":
+    """从飞书获取审批定义详情并写入缓存.
+
     Args:
         approval_code: 审批定义 code.
 
@@ -130,14 +428,14 @@ async def get_approval_detail(approval_code: str) -> GetApprovalResponseBody:
         GetApprovalResponseBody: 审批详情.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: GetApprovalRequest = GetApprovalRequest.builder().approval_code(approval_code).build()
-    response: GetApprovalResponse = await _client.approval.v4.approval.aget(request)
+    client, v4 = await _get_sdk()
+    request = v4.GetApprovalRequest.builder().approval_code(approval_code).build()
+    response = await _call(enum.LarkAPIFamily.APPROVAL, client.approval.v4.approval.aget, request)
     if not response.success():
-        raise Exception(
-            f"[get_approval_detail failed] code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}"
-        )
+        raise LarkAPIException("get_approval_detail", response.code, response.msg, response.get_log_id())
+    _approval_cache.set(approval_code, (time.monotonic(), response.data))
     return response.data
 
 
@@ -148,15 +446,13 @@ async def subscribe_approval_callback_event(approval_code: str):
         approval_code: 审批定义 code.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: SubscribeApprovalRequest = SubscribeApprovalRequest.builder().approval_code(approval_code).build()
-    response: SubscribeApprovalResponse = await _client.approval.v4.approval.asubscribe(request)
+    client, v4 = await _get_sdk()
+    request = v4.SubscribeApprovalRequest.builder().approval_code(approval_code).build()
+    response = await _call(enum.LarkAPIFamily.APPROVAL, client.approval.v4.approval.asubscribe, request)
     if not response.success():
-        raise Exception(
-            f"[subscribe_approval_callback_event failed] code: {response.code}, msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}"
-        )
+        raise LarkAPIException("subscribe_approval_callback_event", response.code, response.msg, response.get_log_id())
 
 
 async def unsubscribe_approval_callback_event(approval_code: str):
@@ -166,12 +462,12 @@ async def unsubscribe_approval_callback_event(approval_code: str):
         approval_code: 审批定义 code.
 
     Raises:
-        Exception: 如果请求失败，则抛出异常.
+        LarkAPIException: 如果请求失败，则抛出异常.
     """
-    request: UnsubscribeApprovalRequest = UnsubscribeApprovalRequest.builder().approval_code(approval_code).build()
-    response: UnsubscribeApprovalResponse = _client.approval.v4.approval.unsubscribe(request)
+    client, v4 = await _get_sdk()
+    request = v4.UnsubscribeApprovalRequest.builder().approval_code(approval_code).build()
+    response = await _call(enum.LarkAPIFamily.APPROVAL, client.approval.v4.approval.aunsubscribe, request)
     if not response.success():
-        raise Exception(
-            f"[unsubscribe_approval_callback_event failed] code: {response.code}, msg: {response.msg}, "
-            f"log_id: {response.get_log_id()}"
+        raise LarkAPIException(
+            "unsubscribe_approval_callback_event", response.code, response.msg, response.get_log_id()
         )
@@ -0,0 +1,103 @@
+"""检查、执行节点的业务方接口调用.
+
+每个目标 host 一个熔断器，每个审批定义一个并发隔离，
+一个业务方接口变慢或不可用时不会拖垮其他审批定义。
+"""
+
+import asyncio
+import time
+
+from loguru import logger
+
+from src.lib import const
+from src.lib import metrics
+from src.lib import schema
+from src.lib import tracing
+from src.lib import util
+from src.lib.exceptions import CircuitOpenException
+from src.lib.resilience import Bulkhead
+from src.lib.resilience import CircuitBreaker
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_bulkheads: dict[str, Bulkhead] = {}
+
+webhook_requests = metrics.Counter(
+    "lark_ticket_webhook_requests_total", "检查、执行节点业务方接口的请求数", ["approval_code", "outcome"]
+)
+
+
+def _get_breaker(url: str) -> CircuitBreaker:
+    """获取目标 host 的熔断器."""
+    host = util.http_clients.key(url)
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            host, const.WEBHOOK_CIRCUIT_FAILURE_THRESHOLD, const.WEBHOOK_CIRCUIT_RESET_SECONDS
+        )
+    return breaker
+
+
+def _get_bulkhead(approval_code: str) -> Bulkhead:
+    """获取审批定义的并发隔离."""
+    bulkhead = _bulkheads.get(approval_code)
+    if bulkhead is None:
+        bulkhead = _bulkheads[approval_code] = Bulkhead(
+            approval_code, const.WEBHOOK_BULKHEAD_MAX_CONCURRENCY, const.WEBHOOK_BULKHEAD_MAX_WAIT_SECONDS
+        )
+    return bulkhead
+
+
+async def post(
+    url: str, data: dict, approval_code: str, retry: schema.RetryPolicy
+) -> schema.LarkCheckOrExecuteCallback:
+    """调用业务方接口.
+
+    熔断器打开或并发名额用尽时直接抛出异常，由后台任务稍后重试，不占用协程等待.
+    按重试策略重试时总耗时不超过 WEBHOOK_RETRY_BUDGET_SECONDS.
+
+    Args:
+        url: 业务方接口地址.
+        data: 请求体数据.
+        approval_code: 审批定义 code.
+        retry: 重试策略.
+
+    Returns:
+        LarkCheckOrExecuteCallback 对象.
+
+    Raises:
+        CircuitOpenException: 熔断器打开，只在尚未发出请求时抛出.
+        BulkheadFullException: 并发名额用尽.
+    """
+    breaker = _get_breaker(url)
+    deadline = time.monotonic() + const.WEBHOOK_RETRY_BUDGET_SECONDS
+    async with _get_bulkhead(approval_code).acquire():
+        attempt = 0
+        last_error: Exception | None = None
+        while True:
+            attempt += 1
+            try:
+                async with breaker.guard():
+                    with (
+                        metrics.timer("webhook", approval_code),
+                        tracing.span("webhook", approval_code=approval_code, attempt=attempt),
+                    ):
+                        result = await util.do_post(url, data, timeout=retry.timeout)
+            except CircuitOpenException:
+                webhook_requests.labels(approval_code=approval_code, outcome="circuit_open").inc()
+                # 已经发出过请求时抛出请求的错误，调用方据此不再重试
+                if last_error is not None:
+                    raise last_error from None
+                raise
+            except Exception as e:
+                webhook_requests.labels(approval_code=approval_code, outcome="failure").inc()
+                last_error = e
+                delay = retry.backoff * 2 ** (attempt - 1)
+                # 超出耗时上限的重试不再进行，避免任务执行时间超过后台任务的租约
+                if attempt >= retry.max_attempts or time.monotonic() + delay + retry.timeout > deadline:
+                    raise
+                logger.warning(f"[webhook][retry] url: {url} attempt: {attempt} error: {e!r}")
+                await asyncio.sleep(delay)
+            else:
+                webhook_requests.labels(approval_code=approval_code, outcome="success").inc()
+                return result
@@ -20,6 +20,7 @@ class Basic(BaseModel):
     port: int
     workers_count: int
     debug: bool
+    preload_app: bool = False
 
 
 class Loguru(BaseModel):
@@ -30,22 +31,84 @@ class Loguru(BaseModel):
     level: str
     rotation: str
     format: str
+    serialize: bool = False
+    queue_size: int = 10000
+    max_payload_length: int = 2048
+    payload_sample_rate: float = 1.0
 
 
 class MySQL(BaseModel):
-    """MySQL 数据库配置."""
+    """MySQL 数据库配置.
+
+    连接池参数均为单个 worker 的值；pool_size、max_overflow 未配置时按 max_connections 在各 worker 间均分。
+    """
 
     dsn: str
+    schema_mode: enum.SchemaMode = enum.SchemaMode.AUTO
+    max_connections: int = 60
+    pool_size: int | None = None
+    max_overflow: int | None = None
+    pool_timeout: float = 30
+    pool_recycle: int = 3600
+    pool_pre_ping_idle_seconds: float = 30
+
+    def pool_limits(self, workers_count: int) -> tuple[int, int]:
+        """计算单个 worker 的连接池大小.
+
+        Args:
+            workers_count: worker 数.
+
+        Returns:
+            (pool_size, max_overflow).
+        """
+        per_worker = max(2, self.max_connections // max(1, workers_count))
+        pool_size = self.pool_size if self.pool_size is not None else max(1, per_worker * 2 // 3)
+        max_overflow = self.max_overflow if self.max_overflow is not None else max(0, per_worker - pool_size)
+        return pool_size, max_overflow
 
 
-class SchedulerLock(BaseModel):
-    """锁配置.
+class Http(BaseModel):
+    """出站 HTTP 请求配置.
 
-    当前是使用端口占用的方式实现，主要用途是多进程时定时任务和初始化表的锁。
+    连接池按目标 host 区分，以下限制均为单个 host 的限制。
     """
 
-    host: str
-    port: int
+    timeout: float = 5
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60
+    http2: bool = False
+
+
+class Job(BaseModel):
+    """后台任务配置.
+
+    回调任务持久化到数据库，由每个 worker 进程内的协程池领取执行。
+    """
+
+    concurrency: int = 20
+    batch_size: int = 10
+    poll_interval: float = 1
+    lease_seconds: int = 300
+    max_attempts: int = 5
+    retry_delay: int = 10
+
+
+class Metrics(BaseModel):
+    """指标配置."""
+
+    multiproc_dir: str = "/tmp/lark-ticket-metrics"
+
+
+class Tracing(BaseModel):
+    """链路追踪配置."""
+
+    enabled: bool = False
+    sample_rate: float = 1.0
+    exporter: enum.TracingExporter = enum.TracingExporter.FILE
+    path: str = "/opt/log/lark-ticket/traces.jsonl"
+    endpoint: str = "http://127.0.0.1:4318/v1/traces"
+    buffer_size: int = 10000
 
 
 class Alarm(BaseModel):
@@ -67,6 +130,7 @@ class Lark(BaseModel):
     app_secret: str
     encrypt_key: str
     verification_token: str
+    domain: str = const.LARK_DOMAIN
 
 
 class App(BaseModel):
@@ -75,11 +139,19 @@ class App(BaseModel):
     basic: Basic
     loguru: Loguru
     mysql: MySQL
-    scheduler_lock: SchedulerLock
+    http: Http
+    job: Job
+    metrics: Metrics
+    tracing: Tracing
     alarm: Alarm
     lark: Lark
 
 
+def _optional_section(config: configparser.ConfigParser, section: str) -> dict[str, str]:
+    """读取可选的配置部分，不存在时使用模型默认值."""
+    return dict(config[section]) if config.has_section(section) else {}
+
+
 def read_config(file_path: str) -> App:
     """读取配置文件并返回 APP 配置对象."""
     config = configparser.ConfigParser()
@@ -97,9 +169,13 @@ def read_config(file_path: str) -> App:
             loguru=Loguru(**config["LOGURU"]),
             mysql=MySQL(
                 dsn=f"{mysql_config.get('scheme', '')}://{mysql_config.get('user', '')}:{mysql_config.get('password', '')}@"
-                f"{mysql_config.get('host', '')}:{mysql_config.get('port', '')}/{mysql_config.get('db', '')}"
+                f"{mysql_config.get('host', '')}:{mysql_config.get('port', '')}/{mysql_config.get('db', '')}",
+                **{key: value for key, value in mysql_config.items() if key in MySQL.model_fields and key != "dsn"},
             ),
-            scheduler_lock=SchedulerLock(**config["SCHEDULERLOCK"]),
+            http=Http(**_optional_section(config, "HTTP")),
+            job=Job(**_optional_section(config, "JOB")),
+            metrics=Metrics(**_optional_section(config, "METRICS")),
+            tracing=Tracing(**_optional_section(config, "TRACING")),
             alarm=Alarm(**config["ALARM"]),
             lark=Lark(**config["LARK"]),
         )
@@ -12,8 +12,6 @@ UTF_8 = "UTF-8"
 BASIC_CONFIG_PATH = os.path.join("etc", "lark-ticket.conf")
 # 初始化 FastAPI 实例的函数路径
 BASIC_MAIN_APP_PATH = "src.app:make_app"
-# Python 文件后缀
-BASIC_PYTHON_FILE_SUFFIX = ".py"
 
 #######################################
 # HTTP
@@ -22,10 +20,88 @@ BASIC_PYTHON_FILE_SUFFIX = ".py"
 HTTP_MAKE_RESPONSE_OK_MSG = "success"
 # JSON 请求头
 HTTP_JSON_HEADER = {"Content-Type": "application/json"}
-# 请求超时时间(秒)
-HTTP_REQUEST_TIMEOUT_SECONDS = 5
 # 成功状态码
 HTTP_SUCCESS_STATUS_CODE = [200]
+# 开启 HTTP/2 但未安装 h2 时的提示信息
+HTTP_H2_NOT_INSTALLED_PROMPT_MESSAGE = "已开启 http2 但未安装 h2，回退为 HTTP/1.1。可通过 httpx[http2] 安装。"
+# 分页查询默认每页条数
+HTTP_PAGE_SIZE_DEFAULT = 20
+# 分页查询每页最大条数
+HTTP_PAGE_SIZE_MAX = 200
+
+#######################################
+# WEBHOOK
+#######################################
+# 检查、执行节点接口连续失败多少次后打开熔断器(按目标 host)
+WEBHOOK_CIRCUIT_FAILURE_THRESHOLD = 5
+# 熔断器打开后的冷却时间(秒)，之后放行一个试探请求
+WEBHOOK_CIRCUIT_RESET_SECONDS = 30
+# 同一审批定义同时调用检查、执行节点接口的最大并发数(每个进程)
+WEBHOOK_BULKHEAD_MAX_CONCURRENCY = 5
+# 并发名额用尽时的最长等待时间(秒)，超时后快速失败由后台任务稍后重试
+WEBHOOK_BULKHEAD_MAX_WAIT_SECONDS = 1
+# 一次调用(含重试策略中的全部重试和等待)的最长耗时(秒)，需要小于 [JOB] lease_seconds
+WEBHOOK_RETRY_BUDGET_SECONDS = 120
+# 业务方接口请求记录的保留天数，期间重新执行的任务不会再次请求
+WEBHOOK_POST_RETENTION_DAYS = 7
+# 清理过期请求记录的间隔时间(秒)
+WEBHOOK_POST_PURGE_INTERVAL_SECONDS = 60 * 60
+
+#######################################
+# EXTERNAL FIELD
+#######################################
+# 外部字段响应缓存的最大条目数
+EXTERNAL_FIELD_CACHE_MAXSIZE = 10000
+# 外部字段响应缓存的默认过期时间(秒)，实际按字段配置的 cache_ttl
+EXTERNAL_FIELD_CACHE_DEFAULT_TTL_SECONDS = 60
+# 调用外部字段业务方接口的超时时间(秒)，需要小于飞书的超时时间
+EXTERNAL_FIELD_TIMEOUT_SECONDS = 3
+# 同时在后台预取下一页的最大数量(每个进程)
+EXTERNAL_FIELD_PREFETCH_MAX_TASKS = 100
+
+#######################################
+# RELATION
+#######################################
+# 关联字段 code 的前缀，表示审批实例的属性
+RELATION_COMPUTED_PREFIX = "$"
+# 关联字段 code 中明细控件与子控件的分隔符
+RELATION_NESTED_DELIMITER = "."
+# 可以作为关联字段的审批实例属性及名称
+RELATION_INSTANCE_ATTRIBUTES = {
+    "approval_name": "审批名称",
+    "instance_code": "审批实例 code",
+    "serial_number": "审批编号",
+    "user_id": "发起人 user_id",
+    "open_id": "发起人 open_id",
+    "department_id": "发起部门 id",
+    "start_time": "发起时间",
+}
+
+#######################################
+# METRICS
+#######################################
+# prometheus_client 多进程模式的目录环境变量
+METRICS_MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+# 多进程模式下 Gauge 的汇总方式: 存活进程求和
+METRICS_GAUGE_MULTIPROCESS_MODE = "livesum"
+# 进程内存指标的采集间隔(秒)
+METRICS_MEMORY_SAMPLE_INTERVAL_SECONDS = 15
+# 各阶段耗时直方图的分桶(秒)
+METRICS_STAGE_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#######################################
+# TRACING
+#######################################
+# 传递链路上下文的请求头
+TRACING_TRACEPARENT_HEADER = "traceparent"
+# 不记录 span 的请求路径
+TRACING_EXCLUDE_PATHS = ("/healthcheck", "/metrics")
+# 单次导出的最大 span 数
+TRACING_EXPORT_BATCH_SIZE = 512
+# 导出间隔(秒)
+TRACING_EXPORT_INTERVAL_SECONDS = 5
+# 导出到 OTLP 收集器的超时时间(秒)
+TRACING_EXPORT_TIMEOUT_SECONDS = 10
 
 #######################################
 # UVICORN
@@ -46,14 +122,16 @@ UVICORN_PARAM_FACTORY = True
 GUNICORN_PARAM_FACTORY = True
 # uvicorn 主类
 GUNICORN_WORKER_CLASS = "src.lib.gunicorn_runner.UvicornWorker"
+# worker 收到退出信号后的最长退出时间(秒)，超时后被强制结束
+GUNICORN_GRACEFUL_TIMEOUT_SECONDS = 30
 
 #######################################
 # DATABASE
 #######################################
 # 数据库包根路径
 DATABASE_ROOT = "src.db"
-# 插件需要排除的文件列表
-DATABASE_EXCLUDE_FILE = ["__init__.py", "base.py"]
+# 所有表模块，启动时按此列表加载，不再扫描目录
+DATABASE_MODELS = ["config", "event", "instance", "job", "lease", "schema_version", "ticket", "webhook"]
 # 主键
 DATABASE_FIELD_ID_PRIMARY_KEY = True
 # id 自增
@@ -65,33 +143,91 @@ DATABASE_FIELD_CREATETIME_SERVER_DEFAULT = "CURRENT_TIMESTAMP"
 # 创建时间字段优先级
 DATABASE_FIELD_CREATETIME_SORT_ORDER = 99
 # 最后一次更新时间，触发器。
-DATABASE_FIELD_LASTUPDATETIME_SERVER_DEFAULT = "CURRENT_TIMESTAMP ON UPDATE " "CURRENT_TIMESTAMP"
+DATABASE_FIELD_LASTUPDATETIME_SERVER_DEFAULT = "CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
 # 最后一次更新时间字段优先级
 DATABASE_FIELD_LASTUPDATETIME_SORT_ORDER = 100
 # 事务自动提交开关
 DATABASE_SESSION_PARAM_AUTOCOMMIT = False
 # 控制提交后实例是否过期。如果设置为 True，在提交后，实例的属性将被标记为过期，需要从数据库中刷新数据。
 DATABASE_SESSION_PARAM_EXPIRE_ON_COMMIT = False
-# 连接池中保留的连接数量
-DATABASE_SESSION_PARAM_POOL_SIZE = 20
-# 允许连接池在需要时超出 pool_size 指定数量的额外连接数
-DATABASE_SESSION_PARAM_MAX_OVERFLOW = 10
-# 使用连接之前先检查其是否有效开关
-DATABASE_SESSION_PARAM_POOL_PRE_PING = True
+# 连接归还时间在连接记录 info 中的键
+DATABASE_POOL_CHECKIN_TIME_KEY = "lark_ticket_checkin_time"
 # 会话未被初始化的报错信息
 DATABASE_SESSION_NOT_INITIALIZED_EXCEPTION_PROMPT_MESSAGE = "数据库会话未被初始化。"
+# 审批配置缓存过期时间(秒)，过期后通过主键和 version 校验是否变更
+DATABASE_CONFIG_CACHE_TTL_SECONDS = 30
+# 审批配置不存在的缓存过期时间(秒)，回调预过滤会据此丢弃事件，因此比配置缓存短
+DATABASE_CONFIG_NEGATIVE_CACHE_TTL_SECONDS = 5
+# 审批配置缓存最大条目数
+DATABASE_CONFIG_CACHE_MAXSIZE = 4096
+# 建表时持有的 MySQL 命名锁
+DATABASE_SCHEMA_LOCK_NAME = "lark-ticket:schema"
+# 等待建表锁的超时时间(秒)
+DATABASE_SCHEMA_LOCK_TIMEOUT_SECONDS = 60
+
+#######################################
+# TICKET
+#######################################
+# 等待写入台账的最大工单数
+TICKET_BUFFER_SIZE = 50000
+# 单条 SQL 写入的最大工单数
+TICKET_FLUSH_BATCH_SIZE = 500
+# 台账写入间隔(秒)
+TICKET_FLUSH_INTERVAL_SECONDS = 1
+# 审批意见最大长度
+TICKET_COMMENT_MAX_LENGTH = 1024
+# 台账保留天数
+TICKET_RETENTION_DAYS = 90
+# 清理过期台账的间隔时间(秒)
+TICKET_PURGE_INTERVAL_SECONDS = 60 * 60
+# 每批清理的条数
+TICKET_PURGE_BATCH_SIZE = 5000
+
+#######################################
+# JOB
+#######################################
+# 飞书事件回调任务类型前缀，完整类型为 callback_{事件类型}
+JOB_KIND_LARK_CALLBACK_PREFIX = "callback_"
+# 检查节点回调任务类型
+JOB_KIND_CHECK_CALLBACK = "check_callback"
+# 执行节点回调任务类型
+JOB_KIND_EXECUTE_CALLBACK = "execute_callback"
+# 检查租约到期任务的间隔时间(秒)
+JOB_REQUEUE_INTERVAL_SECONDS = 30
+# 执行中的任务在每个租约期内的续约次数
+JOB_HEARTBEAT_PER_LEASE = 3
+# 退出时等待执行中任务完成的最长时间(秒)，需要小于 GUNICORN_GRACEFUL_TIMEOUT_SECONDS
+JOB_SHUTDOWN_TIMEOUT_SECONDS = 20
 
 #######################################
-# SCHEDULER
+# LEADER
 #######################################
-# 检测间隔时间(秒)
-SCHEDULER_DETECTION_INTERVAL_SECOND = 1
+# 定时任务选主的租约名称
+LEADER_LEASE_NAME = "lark-ticket:periodic"
+# 租约有效期(秒)
+LEADER_LEASE_SECONDS = 15
+# 续约间隔(秒)
+LEADER_RENEW_INTERVAL_SECONDS = 5
 
 #######################################
 # LARK
 #######################################
 # 飞书首次验证的类型
 LARK_URL_VERIFICATION = "url_verification"
+# 审批任务状态变更事件类型
+LARK_EVENT_TYPE_APPROVAL_TASK = "approval_task"
+# 审批实例状态变更事件类型
+LARK_EVENT_TYPE_APPROVAL_INSTANCE = "approval_instance"
+# 审批实例结束的状态，实例中审批中的任务不会再被处理(不含 APPROVED，通过时任务都已处理)
+LARK_INSTANCE_CLOSED_STATUSES = ("REJECTED", "CANCELED", "DELETED", "REVERTED")
+# 已结束审批实例的进程内缓存时间(秒)，命中时无需查询 tb_closed_instance
+LARK_CLOSED_INSTANCE_CACHE_TTL_SECONDS = 60 * 60
+# 已结束审批实例的进程内缓存最大条数
+LARK_CLOSED_INSTANCE_CACHE_MAXSIZE = 10000
+# 已结束审批实例记录的保留天数
+LARK_CLOSED_INSTANCE_RETENTION_DAYS = 7
+# 清理过期的已结束审批实例记录的间隔时间(秒)
+LARK_CLOSED_INSTANCE_PURGE_INTERVAL_SECONDS = 60 * 60
 # 审批进行中状态
 LARK_CALLBACK_APPROVAL_TASK_STATUS = "PENDING"
 # 检查节点名称
@@ -102,6 +238,56 @@ LARK_CHECK_NODE_TASK_STATUS = "PENDING"
 LARK_EXECUTE_NODE_NAME = "execute_node"
 # 审批任务进行中状态
 LARK_EXECUTE_NODE_TASK_STATUS = "PENDING"
+# 回调内容小于该长度时直接在事件循环中解密，否则放到线程池
+LARK_DECRYPT_INLINE_MAX_LENGTH = 16 * 1024
+# 解密器缓存数量，按密钥缓存
+LARK_DECRYPT_CIPHER_CACHE_SIZE = 4
+# 事件去重窗口(秒)，飞书重试投递的时间范围内
+LARK_EVENT_DEDUP_WINDOW_SECONDS = 24 * 60 * 60
+# 事件去重进程内缓存最大条目数
+LARK_EVENT_DEDUP_CACHE_MAXSIZE = 10000
+# 清理过期去重记录的间隔时间(秒)
+LARK_EVENT_PURGE_INTERVAL_SECONDS = 10 * 60
+# 批量检查、执行回调单次请求的最大条数
+LARK_BATCH_CALLBACK_MAX_ITEMS = 500
+# 批量检查、执行回调同时调用飞书接口的最大数量
+LARK_BATCH_CALLBACK_CONCURRENCY = 10
+# 飞书开放平台地址，默认值，可通过配置 [LARK] domain 指向本地替身服务
+LARK_DOMAIN = "https://open.feishu.cn"
+# 获取自建应用 tenant_access_token 的地址
+LARK_TENANT_ACCESS_TOKEN_URI = "/open-apis/auth/v3/tenant_access_token/internal"
+# 获取 token 失败时错误信息中保留的响应内容长度
+LARK_ERROR_BODY_MAX_LENGTH = 200
+# tenant_access_token 提前刷新的时间(秒)
+LARK_TOKEN_REFRESH_AHEAD_SECONDS = 10 * 60
+# token 无效时的错误码，遇到时重新获取 token 并重试
+LARK_INVALID_TOKEN_CODES = [99991661, 99991663]
+# 各接口分组在整个应用维度的限流: (每秒请求数, 突发请求数)，每个 worker 按 workers_count 均分
+LARK_RATE_LIMITS = {
+    "instance": (50, 50),
+    "task": (20, 20),
+    "approval": (10, 10),
+}
+# 飞书限流错误码
+LARK_RATE_LIMIT_CODES = [99991400]
+# 飞书限流的 HTTP 状态码
+LARK_RATE_LIMIT_HTTP_STATUS = 429
+# 被飞书限流后的最大重试次数
+LARK_RATE_LIMIT_MAX_RETRIES = 5
+# 被飞书限流后的重试基础等待时间(秒)，按指数增长并加入随机抖动
+LARK_RATE_LIMIT_BACKOFF_SECONDS = 0.5
+# 被飞书限流后的重试最长等待时间(秒)
+LARK_RATE_LIMIT_BACKOFF_MAX_SECONDS = 10
+# 审批实例详情的缓存时间(秒)，0 表示只合并并发请求、不缓存结果
+LARK_INSTANCE_CACHE_TTL_SECONDS = 0
+# 审批实例详情缓存最大条目数
+LARK_INSTANCE_CACHE_MAXSIZE = 1024
+# 审批定义缓存的新鲜时间(秒)，超过后返回旧数据并在后台刷新
+LARK_APPROVAL_CACHE_TTL_SECONDS = 5 * 60
+# 审批定义缓存的最长使用时间(秒)，超过后必须重新获取
+LARK_APPROVAL_CACHE_STALE_SECONDS = 24 * 60 * 60
+# 审批定义缓存最大条目数
+LARK_APPROVAL_CACHE_MAXSIZE = 1024
 # 工单 ID 分隔符
 LARK_TICKET_ID_DELIMITER = "|"
 # 检查成功默认文案
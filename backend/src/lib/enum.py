@@ -52,3 +52,114 @@ class APICallType(str, Enum):
     def __str__(self):
         """返回 API 调用类型的字符串表示形式."""
         return f"api call type {self.value}"
+
+
+@unique
+class JobStatus(str, Enum):
+    """后台任务状态枚举."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+
+    def __str__(self):
+        """返回后台任务状态的字符串表示形式."""
+        return f"job status {self.value}"
+
+
+@unique
+class LarkAPIFamily(str, Enum):
+    """飞书接口分组枚举，同一分组共享限流."""
+
+    INSTANCE = "instance"
+    TASK = "task"
+    APPROVAL = "approval"
+
+    def __str__(self):
+        """返回飞书接口分组的字符串表示形式."""
+        return f"lark api family {self.value}"
+
+
+@unique
+class SpanKind(str, Enum):
+    """链路追踪 span 类型枚举."""
+
+    INTERNAL = "internal"
+    SERVER = "server"
+    CLIENT = "client"
+
+    def __str__(self):
+        """返回 span 类型的字符串表示形式."""
+        return f"span kind {self.value}"
+
+
+@unique
+class TracingExporter(str, Enum):
+    """链路追踪导出方式枚举."""
+
+    FILE = "file"
+    OTLP = "otlp"
+
+    def __str__(self):
+        """返回链路追踪导出方式的字符串表示形式."""
+        return f"tracing exporter {self.value}"
+
+
+@unique
+class SchemaMode(str, Enum):
+    """启动时表结构同步方式枚举."""
+
+    # 比对表结构版本，不一致时才执行 create_all
+    AUTO = "auto"
+    # 每次启动都执行 create_all
+    CREATE = "create"
+    # 不做任何处理，表结构由外部维护
+    SKIP = "skip"
+
+    def __str__(self):
+        """返回表结构同步方式的字符串表示形式."""
+        return f"schema mode {self.value}"
+
+
+@unique
+class EventFilterReason(str, Enum):
+    """飞书事件过滤原因枚举."""
+
+    # 没有对应处理任务的事件类型
+    UNSUPPORTED_TYPE = "unsupported_type"
+    # 事件详情不符合事件类型的结构
+    INVALID_EVENT = "invalid_event"
+    # 不是审批助手的任务
+    OTHER_USER = "other_user"
+    # 任务不在审批中
+    NOT_PENDING = "not_pending"
+    # 缓存中已确认没有配置的审批定义
+    UNKNOWN_APPROVAL = "unknown_approval"
+    # 任务不在检查、执行节点
+    OTHER_NODE = "other_node"
+    # 审批实例已结束
+    INSTANCE_CLOSED = "instance_closed"
+    # 审批实例没有结束，实例状态变更事件只处理结束的实例
+    INSTANCE_NOT_CLOSED = "instance_not_closed"
+
+    def __str__(self):
+        """返回事件过滤原因的字符串表示形式."""
+        return f"event filter reason {self.value}"
+
+
+@unique
+class TicketStatus(str, Enum):
+    """工单状态枚举."""
+
+    # 等待检查、执行结果
+    PENDING = "pending"
+    # 审批已同意
+    APPROVED = "approved"
+    # 审批已拒绝
+    REJECTED = "rejected"
+    # 审批实例在检查、执行前已结束(拒绝、撤回、删除)
+    CANCELED = "canceled"
+
+    def __str__(self):
+        """返回工单状态的字符串表示形式."""
+        return f"ticket status {self.value}"
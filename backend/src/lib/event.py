@@ -1,18 +1,94 @@
 """FastAPI 事件 hook.
 
-启动时创建数据库表.
-关闭时回收数据库会话.
+启动时创建数据库表，参与选主，启动工单台账写入和后台任务协程池.
+关闭时等待后台任务，释放主身份，写入剩余台账，回收数据库会话和出站 HTTP 连接池.
 """
 
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from loguru import logger
+from sqlalchemy import Connection
+from sqlalchemy import inspect
+from sqlalchemy import text
+from sqlalchemy.schema import CreateColumn
 
 from src.db import base as db
 from src.db.base import Base
 from src.db.base import sessionmanager
+from src.db.schema_version import SchemaVersionModel
+from src.lib import const
+from src.lib import enum
+from src.lib import job
+from src.lib import leader
+from src.lib import metrics
+from src.lib import ticket
+from src.lib import tracing
 from src.lib import util
+from src.lib.call import lark_api
+from src.lib.config import settings
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    """为已存在的表补充新增的字段.
+
+    create_all 会跳过已存在的表，表定义中后来新增的字段需要单独添加，新增字段需要有默认值.
+
+    Args:
+        conn: 同步数据库连接.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                logger.info(f"[db][column added] table: {table.name} column: {column.name}")
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """为已存在的表补建新增的索引.
+
+    create_all 会跳过已存在的表，表定义中后来新增的索引需要单独创建.
+
+    Args:
+        conn: 同步数据库连接.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                logger.info(f"[db][index created] table: {table.name} index: {index.name}")
+
+
+async def _sync_schema() -> None:
+    """按配置同步数据库表结构.
+
+    auto 模式下版本一致时只需一次查询；需要建表时，多个进程、多台主机由数据库命名锁串行执行，
+    已存在的表会被 create_all 跳过.
+    """
+    db.init()
+    if settings.mysql.schema_mode == enum.SchemaMode.SKIP:
+        return
+
+    fingerprint = SchemaVersionModel.fingerprint_of_models()
+    async with sessionmanager.engine.connect() as conn:
+        if settings.mysql.schema_mode == enum.SchemaMode.AUTO and await SchemaVersionModel.current(conn) == fingerprint:
+            return
+
+        async with leader.named_lock(conn, const.DATABASE_SCHEMA_LOCK_NAME, const.DATABASE_SCHEMA_LOCK_TIMEOUT_SECONDS):
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
+            await conn.run_sync(_create_missing_indexes)
+            # 等锁期间可能已被其他进程记录
+            if await SchemaVersionModel.current(conn) != fingerprint:
+                await SchemaVersionModel.record(conn, fingerprint)
+                logger.info(f"[db][schema version changed] fingerprint: {fingerprint}")
+            await conn.commit()
 
 
 @asynccontextmanager
@@ -20,17 +96,45 @@ async def lifespan(app: FastAPI):
     """FastAPI 生命周期."""
     # 在应用启动时执行的操作.
     app.middleware_stack = None
-    if util.scheduler_lock() is False:
-        # 创建数据库表
-        db.init()
-        async with sessionmanager.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+    # 在 worker 进程内创建数据库引擎
+    sessionmanager.open()
+    await _sync_schema()
 
     app.middleware_stack = app.build_middleware_stack()
 
+    # 在后台导入飞书 SDK
+    lark_api.preload()
+
+    # 启动链路追踪导出、工单台账写入、选主和后台任务协程池
+    await tracing.exporter.start()
+    await ticket.recorder.start()
+    await leader.elector.start()
+    await job.worker_pool.start()
+
+    # 记录 worker 启动后的内存占用，preload 模式下 pss、uss 明显低于 rss
+    metrics.start_memory_sampler()
+    logger.info(f"[worker][memory] pid: {os.getpid()} {metrics.read_process_memory()}")
+
     yield
 
+    await metrics.stop_memory_sampler()
+
     # 在应用关闭时执行的操作.
+    # 等待执行中的后台任务
+    await job.worker_pool.stop()
+
+    # 释放主身份
+    await leader.elector.stop()
+
+    # 写入剩余的工单变更
+    await ticket.recorder.stop()
+
+    # 导出剩余的 span
+    await tracing.exporter.stop()
+
+    # 关闭出站 HTTP 连接池
+    await util.http_clients.close()
+
     if sessionmanager.engine is not None:
         # 关闭数据库连接
         await sessionmanager.close()
@@ -5,3 +5,30 @@ class IgnoreException(Exception):
     """自定义忽略异常类."""
 
     pass
+
+
+class LarkAPIException(Exception):
+    """飞书接口调用失败异常."""
+
+    def __init__(self, api: str, code: int | None, msg: str | None, log_id: str | None = None) -> None:
+        """初始化异常.
+
+        Args:
+            api: 调用的接口名称.
+            code: 飞书返回的错误码.
+            msg: 飞书返回的错误信息.
+            log_id: 飞书返回的日志 id，用于排查问题.
+        """
+        self.api = api
+        self.code = code
+        self.msg = msg
+        self.log_id = log_id
+        super().__init__(f"[{api} failed] code: {code}, msg: {msg}, log_id: {log_id}")
+
+
+class CircuitOpenException(Exception):
+    """熔断器打开，请求被快速失败."""
+
+
+class BulkheadFullException(Exception):
+    """并发隔离名额已满，请求被快速失败."""
@@ -1,6 +1,6 @@
 """拓展模块.
 
-loguru 配置.
+loguru 配置，输出由 log.QueueSink 异步写入.
 sentry 配置.
 异常捕获.
 """
@@ -17,6 +17,7 @@ from loguru import logger
 
 from src.lib import enum
 from src.lib import exceptions
+from src.lib import log
 from src.lib.config import settings
 
 
@@ -57,13 +58,18 @@ def _configure_logging():
         logging.getLogger(_log).handlers = [intercept_handler]
 
     logger.remove()
-    logger.add(
+    sink = log.QueueSink(
         os.path.join(settings.loguru.path, settings.loguru.filename),
         rotation=settings.loguru.rotation,
-        enqueue=True,
+        maxsize=settings.loguru.queue_size,
+        serialize=settings.loguru.serialize,
+    )
+    logger.add(
+        sink,
         backtrace=True,
         level=settings.loguru.level.upper(),
-        format=settings.loguru.format,
+        # JSON 输出由 sink 自行序列化，无需再按文本格式渲染
+        format="{message}" if settings.loguru.serialize else settings.loguru.format,
     )
 
 
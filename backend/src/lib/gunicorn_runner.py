@@ -1,5 +1,13 @@
-"""Gunicorn 初始化模块."""
+"""Gunicorn 初始化模块.
 
+preload_app 开启时，主进程导入应用和飞书 SDK 并冻结 gc 后再 fork，
+各 worker 以写时复制的方式共享这部分内存；数据库引擎、出站 HTTP 客户端和飞书客户端
+都在 fork 之后由 worker 自己创建。
+"""
+
+import gc
+import os
+import shutil
 from typing import Any
 
 from gunicorn.app.base import BaseApplication
@@ -50,5 +58,50 @@ class GunicornApplication(BaseApplication):
                 self.cfg.set(key.lower(), value)
 
     def load(self) -> str:
-        """加载应用程序."""
-        return import_app(self.app)
+        """加载应用程序.
+
+        preload_app 开启时在主进程中调用，否则在每个 worker 中调用.
+        """
+        app = import_app(self.app)
+        if self.cfg.preload_app:
+            from src.lib.call import lark_api
+
+            lark_api.import_sdk()
+        return app
+
+
+def prepare_metrics_dir(path: str) -> None:
+    """准备 prometheus_client 多进程模式的目录.
+
+    需要在 worker 导入 prometheus_client 之前调用，清理上次运行遗留的数据.
+
+    Args:
+        path: 目录路径.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ[const.METRICS_MULTIPROC_DIR_ENV] = path
+
+
+def child_exit(_: Any, worker: Any) -> None:
+    """Worker 退出时清理其在多进程目录中的实时数据(如 Gauge)."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def pre_fork(*_: Any) -> None:
+    """在 fork 前冻结主进程中已有的对象.
+
+    被冻结的对象不再参与 gc，worker 中的 gc 不会写这些对象的头部，共享的内存页不会因此被复制.
+    """
+    gc.freeze()
+
+
+def post_fork(*_: Any) -> None:
+    """在 fork 后丢弃从主进程继承的连接，确保每个 worker 使用自己的连接池."""
+    from src.db.base import sessionmanager
+    from src.lib import util
+
+    sessionmanager.after_fork()
+    util.http_clients.after_fork()
@@ -0,0 +1,403 @@
+"""持久化后台任务模块.
+
+回调请求只负责把任务写入 tb_job，由每个 worker 进程内的协程池通过
+SELECT ... FOR UPDATE SKIP LOCKED 批量领取执行，进程重启或崩溃都不会丢失任务。
+
+任务语义为至少执行一次，处理函数需要能够承受重复执行。
+"""
+
+import asyncio
+import os
+import socket
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+
+import sentry_sdk
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.base import sessionmanager
+from src.db.job import JobModel
+from src.lib import const
+from src.lib import enum
+from src.lib import exceptions
+from src.lib import leader
+from src.lib import tracing
+from src.lib.config import settings
+
+
+Handler = Callable[[AsyncSession, Any], Awaitable[Any]]
+PeriodicHandler = Callable[[AsyncSession], Awaitable[Any]]
+
+# 任务类型 -> (处理函数, 参数结构)
+_handlers: dict[str, tuple[Handler, type[BaseModel]]] = {}
+# 定时任务: (间隔时间, 处理函数)
+_periodic: list[tuple[float, PeriodicHandler]] = []
+
+
+def register(kind: str, model: type[BaseModel]) -> Callable[[Handler], Handler]:
+    """注册任务处理函数的装饰器.
+
+    Args:
+        kind: 任务类型.
+        model: 任务参数结构，执行前会用它校验并还原参数.
+
+    Returns:
+        原处理函数.
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        _handlers[kind] = (handler, model)
+        return handler
+
+    return decorator
+
+
+def every(seconds: float) -> Callable[[PeriodicHandler], PeriodicHandler]:
+    """注册定时任务的装饰器.
+
+    随协程池启动，所有进程都会按间隔调度，但只有选主成功的进程会实际执行.
+
+    Args:
+        seconds: 执行间隔(秒).
+
+    Returns:
+        原处理函数.
+    """
+
+    def decorator(handler: PeriodicHandler) -> PeriodicHandler:
+        _periodic.append((seconds, handler))
+        return handler
+
+    return decorator
+
+
+def is_registered(kind: str) -> bool:
+    """判断任务类型是否已注册.
+
+    Args:
+        kind: 任务类型.
+
+    Returns:
+        True: 已注册
+        False: 未注册
+    """
+    return kind in _handlers
+
+
+async def enqueue(session: AsyncSession, kind: str, params: BaseModel) -> None:
+    """写入任务并提交事务.
+
+    会一并提交会话中尚未提交的其他修改.
+
+    Args:
+        session: 数据库会话.
+        kind: 任务类型.
+        params: 任务参数.
+    """
+    await session.execute(
+        insert(JobModel).values(
+            kind=kind, payload=params.model_dump(mode="json", by_alias=True), traceparent=tracing.traceparent()
+        )
+    )
+    await session.commit()
+    worker_pool.wake()
+
+
+class JobWorkerPool:
+    """后台任务协程池."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        batch_size: int,
+        poll_interval: float,
+        lease_seconds: int,
+        max_attempts: int,
+        retry_delay: int,
+    ) -> None:
+        """初始化协程池.
+
+        Args:
+            concurrency: 单个进程内同时执行的最大任务数.
+            batch_size: 单次领取的最大任务数.
+            poll_interval: 没有任务时的轮询间隔(秒).
+            lease_seconds: 任务执行超时时间(秒)，超时未完成的任务会被重新领取.
+            max_attempts: 最大执行次数，超过后标记为失败.
+            retry_delay: 首次重试的延迟时间(秒)，之后按指数增长.
+        """
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._wakeup = asyncio.Event()
+        self._next_requeue_time = 0.0
+        self._loop_task: asyncio.Task[None] | None = None
+        self._periodic_tasks: list[asyncio.Task[None]] = []
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def wake(self) -> None:
+        """唤醒领取协程，立即检查是否有新任务."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """启动协程池."""
+        if self._loop_task is None:
+            self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+            self._loop_task = asyncio.create_task(self._run())
+            self._periodic_tasks = [
+                asyncio.create_task(self._run_periodic(seconds, handler)) for seconds, handler in _periodic
+            ]
+
+    async def stop(self) -> None:
+        """停止领取新任务，并等待执行中的任务完成.
+
+        最多等待 JOB_SHUTDOWN_TIMEOUT_SECONDS，在 gunicorn 强制结束 worker 之前退出；
+        超时的任务被取消并立即置为待执行，由其他进程重新领取，不必等待租约到期.
+        已经请求过业务方接口的工单在重新执行时会被跳过(见 WebhookPostModel)，不会重复请求.
+        """
+        if self._loop_task is None:
+            return
+        for task in [self._loop_task, *self._periodic_tasks]:
+            task.cancel()
+        await asyncio.gather(self._loop_task, *self._periodic_tasks, return_exceptions=True)
+        self._loop_task = None
+        self._periodic_tasks = []
+
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=const.JOB_SHUTDOWN_TIMEOUT_SECONDS)
+        if not pending:
+            return
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            async with sessionmanager.session() as session:
+                result = await session.execute(
+                    update(JobModel)
+                    .where(JobModel.status == enum.JobStatus.RUNNING.value, JobModel.locked_by == self.worker_id)
+                    .values(status=enum.JobStatus.PENDING.value, locked_by=None, locked_time=None)
+                )
+                await session.commit()
+            logger.warning(f"[job][shutdown] canceled: {len(pending)} requeued: {result.rowcount}")
+        except Exception as e:
+            # 未能重置的任务保持执行中，租约到期后会被重新领取
+            logger.exception(e)
+
+    async def _run(self) -> None:
+        """领取并分发任务的主循环."""
+        while True:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._tasks)
+            want = min(free, self.batch_size)
+            claimed = 0
+            if want > 0:
+                try:
+                    # 回收超时任务只需要一个进程执行
+                    if leader.elector.is_leader and time.monotonic() >= self._next_requeue_time:
+                        await self._requeue_expired()
+                        self._next_requeue_time = time.monotonic() + const.JOB_REQUEUE_INTERVAL_SECONDS
+                    jobs = await self._claim(want)
+                except Exception as e:
+                    logger.exception(e)
+                    jobs = []
+                claimed = len(jobs)
+                for job_id, kind, payload, attempts, traceparent in jobs:
+                    task = asyncio.create_task(self._execute(job_id, kind, payload, attempts, traceparent))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._on_done)
+
+            # 领满了说明可能还有积压，立即继续领取
+            if want == 0 or claimed < want:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    async def _run_periodic(self, seconds: float, handler: PeriodicHandler) -> None:
+        """按固定间隔执行定时任务.
+
+        Args:
+            seconds: 执行间隔(秒).
+            handler: 处理函数.
+        """
+        while True:
+            await asyncio.sleep(seconds)
+            if not leader.elector.is_leader:
+                continue
+            try:
+                async with sessionmanager.session() as session:
+                    await handler(session)
+            except Exception as e:
+                logger.exception(e)
+
+    def _on_done(self, task: asyncio.Task[None]) -> None:
+        """任务完成后释放名额并唤醒领取协程."""
+        self._tasks.discard(task)
+        self._wakeup.set()
+
+    async def _claim(self, limit: int) -> list[tuple[int, str, dict[str, Any], int, str | None]]:
+        """领取一批可执行的任务.
+
+        Args:
+            limit: 最大领取数量.
+
+        Returns:
+            (id, 任务类型, 任务参数, 已执行次数, 链路上下文) 列表.
+        """
+        async with sessionmanager.session() as session:
+            rows = (
+                await session.execute(
+                    select(JobModel.id, JobModel.kind, JobModel.payload, JobModel.attempts, JobModel.traceparent)
+                    .where(JobModel.status == enum.JobStatus.PENDING.value, JobModel.available_time <= func.now())
+                    .order_by(JobModel.id)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if rows:
+                await session.execute(
+                    update(JobModel)
+                    .where(JobModel.id.in_([row.id for row in rows]))
+                    .values(
+                        status=enum.JobStatus.RUNNING.value,
+                        locked_by=self.worker_id,
+                        locked_time=func.now(),
+                        attempts=JobModel.attempts + 1,
+                    )
+                )
+            await session.commit()
+        return [(row.id, row.kind, row.payload, row.attempts + 1, row.traceparent) for row in rows]
+
+    async def _requeue_expired(self) -> None:
+        """把租约到期仍未完成的任务(通常是进程崩溃导致)重新置为待执行，执行次数用尽的标记为失败."""
+        expired = (
+            JobModel.status == enum.JobStatus.RUNNING.value,
+            JobModel.locked_time < func.timestampadd(text("SECOND"), -self.lease_seconds, func.now()),
+        )
+        async with sessionmanager.session() as session:
+            await session.execute(
+                update(JobModel)
+                .where(*expired, JobModel.attempts >= self.max_attempts)
+                .values(status=enum.JobStatus.FAILED.value, last_error="lease expired", locked_by=None)
+            )
+            await session.execute(
+                update(JobModel)
+                .where(*expired)
+                .values(status=enum.JobStatus.PENDING.value, locked_by=None, locked_time=None)
+            )
+            await session.commit()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """执行期间定时续约，避免执行时间较长的任务被当作超时任务重新领取.
+
+        Args:
+            job_id: 任务 id.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / const.JOB_HEARTBEAT_PER_LEASE)
+            try:
+                async with sessionmanager.session() as session:
+                    result = await session.execute(
+                        update(JobModel).where(*self._owned(job_id)).values(locked_time=func.now())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"[job][heartbeat failed] id: {job_id} error: {e!r}")
+                continue
+            if result.rowcount == 0:
+                logger.warning(f"[job][lease lost] id: {job_id} worker: {self.worker_id}")
+                return
+
+    def _owned(self, job_id: int) -> tuple[Any, ...]:
+        """本进程仍持有租约的条件，租约被回收后其他进程的状态不会被覆盖."""
+        return (
+            JobModel.id == job_id,
+            JobModel.status == enum.JobStatus.RUNNING.value,
+            JobModel.locked_by == self.worker_id,
+        )
+
+    async def _execute(
+        self, job_id: int, kind: str, payload: dict[str, Any], attempts: int, traceparent: str | None
+    ) -> None:
+        """执行单个任务，成功后删除，失败后按指数退避重试.
+
+        Args:
+            job_id: 任务 id.
+            kind: 任务类型.
+            payload: 任务参数.
+            attempts: 包含本次在内的执行次数.
+            traceparent: 入队时的链路上下文.
+        """
+        error: str | None = None
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            with tracing.span(f"job {kind}", parent=traceparent, job_id=job_id, attempts=attempts):
+                if kind not in _handlers:
+                    raise exceptions.IgnoreException(f"job kind: {kind} is not registered!")
+                handler, model = _handlers[kind]
+                async with sessionmanager.session() as session:
+                    await handler(session, model(**payload))
+        except exceptions.IgnoreException as e:
+            logger.info(f"[job][ignore] id: {job_id} kind: {kind} reason: {e}")
+        except Exception as e:
+            logger.exception(e)
+            sentry_sdk.capture_exception(e)
+            error = repr(e)
+        finally:
+            heartbeat.cancel()
+
+        try:
+            async with sessionmanager.session() as session:
+                if error is None:
+                    result = await session.execute(delete(JobModel).where(*self._owned(job_id)))
+                elif attempts >= self.max_attempts:
+                    logger.error(f"[job][give up] id: {job_id} kind: {kind} attempts: {attempts}")
+                    result = await session.execute(
+                        update(JobModel)
+                        .where(*self._owned(job_id))
+                        .values(status=enum.JobStatus.FAILED.value, last_error=error, locked_by=None)
+                    )
+                else:
+                    delay = self.retry_delay * 2 ** (attempts - 1)
+                    result = await session.execute(
+                        update(JobModel)
+                        .where(*self._owned(job_id))
+                        .values(
+                            status=enum.JobStatus.PENDING.value,
+                            last_error=error,
+                            locked_by=None,
+                            locked_time=None,
+                            available_time=func.timestampadd(text("SECOND"), delay, func.now()),
+                        )
+                    )
+                await session.commit()
+            if result.rowcount == 0:
+                logger.warning(f"[job][lease lost] id: {job_id} kind: {kind} result discarded")
+        except Exception as e:
+            # 状态未能更新时任务保持执行中，租约到期后会被重新领取
+            logger.exception(e)
+
+
+worker_pool = JobWorkerPool(
+    concurrency=settings.job.concurrency,
+    batch_size=settings.job.batch_size,
+    poll_interval=settings.job.poll_interval,
+    lease_seconds=settings.job.lease_seconds,
+    max_attempts=settings.job.max_attempts,
+    retry_delay=settings.job.retry_delay,
+)
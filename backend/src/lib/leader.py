@@ -0,0 +1,163 @@
+"""跨主机的互斥与选主模块.
+
+1. named_lock: 基于 MySQL GET_LOCK 的互斥锁，用于启动时建表等一次性操作
+2. LeaderElection: 基于 tb_lease 租约行和心跳续约的选主，用于只需要一个进程执行的定时任务
+
+两者都以数据库为准，多台主机、多个 pod 之间同样有效。
+"""
+
+import asyncio
+import contextlib
+import os
+import socket
+import time
+from collections.abc import AsyncIterator
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.db.base import sessionmanager
+from src.db.lease import LeaseModel
+from src.lib import const
+from src.lib import metrics
+
+
+is_leader_gauge = metrics.Gauge(
+    "lark_ticket_leader", "当前进程是否为主", ["name"], multiprocess_mode=const.METRICS_GAUGE_MULTIPROCESS_MODE
+)
+
+
+@contextlib.asynccontextmanager
+async def named_lock(conn: AsyncConnection, name: str, timeout: int) -> AsyncIterator[None]:
+    """在数据库连接上持有一个命名锁.
+
+    锁与连接绑定，代码块内需要使用同一个连接；连接断开时 MySQL 会自动释放.
+
+    Args:
+        conn: 数据库连接.
+        name: 锁名称.
+        timeout: 等待锁的超时时间(秒).
+
+    Raises:
+        TimeoutError: 等待超时.
+    """
+    acquired = await conn.scalar(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout})
+    if acquired != 1:
+        raise TimeoutError(f"get lock: {name} timeout after {timeout}s")
+    try:
+        yield
+    finally:
+        await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+class LeaderElection:
+    """基于租约的选主.
+
+    每个进程定时尝试获取或续约同一个租约，成功者在租约有效期内为主。
+    续约失败(比如数据库不可用)时，本地在租约到期前主动放弃，避免出现两个主。
+    """
+
+    def __init__(self, name: str, lease_seconds: int, renew_interval: float) -> None:
+        """初始化.
+
+        Args:
+            name: 租约名称.
+            lease_seconds: 租约有效期(秒).
+            renew_interval: 续约间隔(秒)，需要明显小于租约有效期.
+        """
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._deadline = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        """当前进程是否为主."""
+        return time.monotonic() < self._deadline
+
+    async def start(self) -> None:
+        """立即尝试一次选主，并启动续约协程."""
+        if self._task is None:
+            self.holder = f"{socket.gethostname()}:{os.getpid()}"
+            await self._renew()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止续约，如果是主则释放租约以便其他进程尽快接替."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        if self.is_leader:
+            self._set_deadline(0.0)
+            try:
+                async with sessionmanager.session() as session:
+                    await session.execute(
+                        update(LeaseModel)
+                        .where(LeaseModel.name == self.name, LeaseModel.holder == self.holder)
+                        .values(expire_time=func.now())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.exception(e)
+
+    async def _run(self) -> None:
+        """续约主循环."""
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._renew()
+
+    async def _renew(self) -> None:
+        """获取或续约租约."""
+        started = time.monotonic()
+        try:
+            async with sessionmanager.session() as session:
+                expire_time = func.timestampadd(text("SECOND"), self.lease_seconds, func.now())
+                await session.execute(
+                    insert(LeaseModel)
+                    .prefix_with("IGNORE")
+                    .values(name=self.name, holder=self.holder, expire_time=expire_time)
+                )
+                result = await session.execute(
+                    update(LeaseModel)
+                    .where(
+                        LeaseModel.name == self.name,
+                        (LeaseModel.holder == self.holder) | (LeaseModel.expire_time < func.now()),
+                    )
+                    .values(holder=self.holder, expire_time=expire_time)
+                )
+                await session.commit()
+        except Exception as e:
+            # 保留本地剩余的租约时间，到期后自然失去主身份
+            logger.exception(e)
+            return
+
+        was_leader = self.is_leader
+        if result.rowcount > 0:  # type: ignore
+            # 以发起续约的时间计算，并留出一个续约间隔的余量
+            self._set_deadline(started + self.lease_seconds - self.renew_interval)
+        else:
+            self._set_deadline(0.0)
+        if was_leader != self.is_leader:
+            logger.info(f"[leader][{self.name}] {self.holder} is leader: {self.is_leader}")
+
+    def _set_deadline(self, deadline: float) -> None:
+        """更新本地租约到期时间."""
+        self._deadline = deadline
+        is_leader_gauge.labels(name=self.name).set(1 if self.is_leader else 0)
+
+
+elector = LeaderElection(
+    const.LEADER_LEASE_NAME,
+    lease_seconds=const.LEADER_LEASE_SECONDS,
+    renew_interval=const.LEADER_RENEW_INTERVAL_SECONDS,
+)
@@ -0,0 +1,126 @@
+"""结构化日志模块.
+
+在 loguru 之上提供:
+    1. 请求、响应等大内容的截断和采样，配合 logger.opt(lazy=True) 使用，级别被过滤时不产生任何开销
+    2. 基于 orjson 的 JSON 行格式输出
+    3. 有界队列 + 后台线程写文件，队列满时丢弃日志并计数，写盘慢不会拖慢请求处理
+"""
+
+import copy
+import queue
+import random
+import threading
+import traceback
+from typing import Any
+
+import orjson
+from loguru import logger
+
+from src.lib import metrics
+from src.lib.config import settings
+
+
+dropped_logs = metrics.Counter("lark_ticket_log_dropped_total", "队列已满被丢弃的日志数", ["level"])
+
+
+def payload(value: Any) -> str:
+    """格式化请求体、响应体等可能很大的日志内容.
+
+    超过 max_payload_length 的内容按 payload_sample_rate 采样，
+    采中的截断输出，未采中的只输出长度.
+
+    应放在 logger.opt(lazy=True) 的 lambda 中调用，避免级别被过滤时仍然序列化.
+
+    Args:
+        value: 日志内容.
+
+    Returns:
+        格式化后的字符串.
+    """
+    text = value if isinstance(value, str) else str(value)
+    limit = settings.loguru.max_payload_length
+    if len(text) <= limit:
+        return text
+    if random.random() >= settings.loguru.payload_sample_rate:
+        return f"<{len(text)} chars omitted>"
+    return f"{text[:limit]}...<{len(text) - limit} chars truncated>"
+
+
+def _serialize(record: dict[str, Any]) -> str:
+    """把日志记录序列化为 JSON 行.
+
+    Args:
+        record: loguru 日志记录.
+
+    Returns:
+        以换行结尾的 JSON 字符串.
+    """
+    data = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "process": record["process"].id,
+        "message": record["message"],
+    }
+    if record["extra"]:
+        data["extra"] = record["extra"]
+    if record["exception"] is not None:
+        exc_type, exc_value, exc_traceback = record["exception"]
+        data["exception"] = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+    return orjson.dumps(data, default=str, option=orjson.OPT_APPEND_NEWLINE).decode()
+
+
+class QueueSink:
+    """有界队列日志输出.
+
+    调用线程只负责格式化并放入队列，由后台线程通过独立的 loguru 实例写入文件，
+    文件切割仍由 loguru 负责.
+    """
+
+    def __init__(self, path: str, rotation: str, maxsize: int, serialize: bool) -> None:
+        """初始化并启动写线程.
+
+        需要在 logger.remove() 之后创建，以免复制出的写日志实例带有原有的处理器.
+
+        Args:
+            path: 日志文件路径.
+            rotation: 切割条件，同 loguru.
+            maxsize: 队列容量.
+            serialize: 是否输出 JSON 行.
+        """
+        self.serialize = serialize
+        self._queue: queue.Queue[tuple[str, str] | None] = queue.Queue(maxsize)
+        self._writer = copy.deepcopy(logger)
+        self._writer.add(path, rotation=rotation, level=0, colorize=False)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: Any) -> None:
+        """放入一条已格式化的日志，队列已满时丢弃.
+
+        Args:
+            message: loguru 格式化后的日志消息.
+        """
+        record = message.record
+        line = _serialize(record) if self.serialize else str(message)
+        try:
+            self._queue.put_nowait((record["level"].name, line))
+        except queue.Full:
+            dropped_logs.labels(level=record["level"].name).inc()
+
+    def stop(self) -> None:
+        """写完队列中剩余的日志后停止写线程，由 logger.remove() 调用."""
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.remove()
+
+    def _run(self) -> None:
+        """写线程主循环."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            level, line = item
+            self._writer.opt(raw=True).log(level, line)
@@ -0,0 +1,138 @@
+"""指标模块.
+
+基于 prometheus_client，由 /metrics 暴露。
+gunicorn 多进程部署时由 gunicorn_runner 设置 PROMETHEUS_MULTIPROC_DIR，
+各 worker 把数据写入该目录，/metrics 汇总所有 worker 的数据。
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from collections.abc import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+
+from src.lib import const
+
+
+__all__ = ["CONTENT_TYPE_LATEST", "Counter", "Gauge", "Histogram", "render", "timer"]
+
+
+process_memory = Gauge(
+    "lark_ticket_process_memory_bytes",
+    "进程内存占用，rss: 常驻内存 pss: 按共享进程数均摊后的内存 uss: 进程独占的内存",
+    ["kind"],
+    multiprocess_mode="liveall",
+)
+
+stage_duration = Histogram(
+    "lark_ticket_stage_duration_seconds",
+    "回调处理各阶段耗时",
+    ["stage", "approval_code", "outcome"],
+    buckets=const.METRICS_STAGE_DURATION_BUCKETS,
+)
+
+
+@contextlib.contextmanager
+def timer(stage: str, approval_code: str = "") -> Iterator[dict[str, str]]:
+    """记录一个阶段的耗时.
+
+    代码块抛出异常时 outcome 为 error，否则为 success；
+    可以在代码块内修改返回的标签，比如解密后才知道 approval_code.
+
+    Args:
+        stage: 阶段名称.
+        approval_code: 审批定义 code.
+
+    Yields:
+        标签字典，包含 approval_code 和 outcome.
+    """
+    labels = {"approval_code": approval_code, "outcome": "success"}
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        labels["outcome"] = "error"
+        raise
+    finally:
+        stage_duration.labels(stage=stage, **labels).observe(time.perf_counter() - start)
+
+
+def render() -> bytes:
+    """生成 Prometheus 文本格式的指标数据.
+
+    Returns:
+        指标数据.
+    """
+    if os.environ.get(const.METRICS_MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def read_process_memory(pid: int | str = "self") -> dict[str, int]:
+    """读取进程内存占用.
+
+    fork 出的 worker 与主进程共享未修改的内存页，只看 rss 会重复计算共享部分，
+    pss 和 uss 才能反映每个 worker 的实际开销。仅支持 Linux.
+
+    Args:
+        pid: 进程 id，默认为当前进程.
+
+    Returns:
+        rss、pss、uss，单位字节；无法读取时返回空字典.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+_memory_sampler: asyncio.Task[None] | None = None
+
+
+async def _sample_process_memory(interval: float) -> None:
+    """定时更新当前进程的内存指标."""
+    while True:
+        for kind, value in read_process_memory().items():
+            process_memory.labels(kind=kind).set(value)
+        await asyncio.sleep(interval)
+
+
+def start_memory_sampler(interval: float = const.METRICS_MEMORY_SAMPLE_INTERVAL_SECONDS) -> None:
+    """启动内存指标采集协程.
+
+    Args:
+        interval: 采集间隔(秒).
+    """
+    global _memory_sampler
+    if _memory_sampler is None:
+        _memory_sampler = asyncio.create_task(_sample_process_memory(interval))
+
+
+async def stop_memory_sampler() -> None:
+    """停止内存指标采集协程."""
+    global _memory_sampler
+    if _memory_sampler is not None:
+        _memory_sampler.cancel()
+        await asyncio.gather(_memory_sampler, return_exceptions=True)
+        _memory_sampler = None
@@ -2,6 +2,7 @@
 
 1. 请求响应时间中间件
 2. 异常捕获中间件
+3. 链路追踪中间件
 """
 
 import time
@@ -14,43 +15,142 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import ORJSONResponse
 from loguru import logger
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from starlette.responses import Response
-
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from src.lib import const
 from src.lib import enum
 from src.lib import exceptions
+from src.lib import metrics
+from src.lib import tracing
 from src.lib import util
 from src.lib.config import settings
 
 
-class ResponseTimeMiddleware(BaseHTTPMiddleware):
-    """记录请求响应时间的中间件."""
+http_request_duration = metrics.Histogram(
+    "lark_ticket_http_request_duration_seconds",
+    "HTTP 请求耗时",
+    ["method", "route", "status_code"],
+    buckets=const.METRICS_STAGE_DURATION_BUCKETS,
+)
+
+
+class ResponseTimeMiddleware:
+    """记录请求响应时间的中间件.
+
+    直接实现 ASGI 接口，避免 BaseHTTPMiddleware 为每个请求额外创建任务组和内存流.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """初始化中间件.
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Any:
+        Args:
+            app: 下一层 ASGI 应用.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """处理请求并记录响应时间."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        response = await call_next(request)
-        if request.url.path != "/healthcheck" and "form-data" not in request.headers.get("content-type", ""):
-            logger.info(
-                f"response: Method {request.method} - {request.url.path} - "
-                f"code: {response.status_code} "
-                f"{(time.time() - start_time) * 1000:.2f}ms"
-            )
-        return response
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
 
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-class CatchExceptionsMiddleware(BaseHTTPMiddleware):
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.time() - start_time
+            # 按路由模板而不是实际路径统计，避免路径参数导致标签膨胀
+            route = scope.get("route")
+            http_request_duration.labels(
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status_code=status_code,
+            ).observe(elapsed)
+            path = scope["path"]
+            if path != "/healthcheck" and "form-data" not in Headers(scope=scope).get("content-type", ""):
+                logger.info(f"response: Method {scope['method']} - {path} - code: {status_code} {elapsed * 1000:.2f}ms")
+
+
+class CatchExceptionsMiddleware:
     """捕获和记录异常的中间件，并返回 JSON 响应."""
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    def __init__(self, app: ASGIApp) -> None:
+        """初始化中间件.
+
+        Args:
+            app: 下一层 ASGI 应用.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """处理请求并捕获异常."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             if not isinstance(e, exceptions.IgnoreException):
                 logger.exception(e)
-            return ORJSONResponse(util.make_response_not_ok(str(e)))
+            # 响应已经开始发送时无法再改写，只能中断连接
+            if response_started:
+                raise
+            response = ORJSONResponse(util.make_response_not_ok(str(e)))
+            await response(scope, receive, send)
+
+
+class TracingMiddleware:
+    """为每个请求记录一个服务端 span，请求头中带有 traceparent 时作为其子 span."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """初始化中间件.
+
+        Args:
+            app: 下一层 ASGI 应用.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """处理请求并记录 span."""
+        if scope["type"] != "http" or scope["path"] in const.TRACING_EXCLUDE_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        parent = Headers(scope=scope).get(const.TRACING_TRACEPARENT_HEADER)
+        with tracing.span(f"{scope['method']} {scope['path']}", enum.SpanKind.SERVER, parent=parent) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            # 按路由模板命名，便于聚合
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
 
 
 def register(app: FastAPI):
@@ -67,6 +167,8 @@ def register(app: FastAPI):
     ):
         app.add_middleware(SentryAsgiMiddleware)  # type: ignore
     app.add_middleware(ResponseTimeMiddleware)  # type: ignore
+    if settings.tracing.enabled:
+        app.add_middleware(TracingMiddleware)  # type: ignore
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(_: Any, exc: Any) -> ORJSONResponse:
@@ -0,0 +1,57 @@
+"""限流模块."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """令牌桶.
+
+    令牌允许被预支为负数，等待者按调用顺序依次获得令牌，无需加锁。
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """初始化令牌桶.
+
+        Args:
+            rate: 每秒生成的令牌数.
+            capacity: 桶容量，即允许的突发请求数.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """按流逝的时间补充令牌."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> float:
+        """获取一个令牌，不足时等待.
+
+        Returns:
+            等待的时间(秒)，0 表示没有被限流.
+        """
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        wait = -self._tokens / self.rate
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # 等待被取消时归还预留的令牌，避免后续请求多等
+            self._tokens += 1
+            raise
+        return wait
+
+    def penalize(self, seconds: float) -> None:
+        """服务端已经限流时清空令牌，让后续请求一起退让.
+
+        Args:
+            seconds: 需要退让的时间(秒).
+        """
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
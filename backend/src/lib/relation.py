@@ -0,0 +1,110 @@
+"""关联字段映射模块.
+
+把审批配置中的关联字段编译为映射计划，每个配置版本只编译一次(见 schema.RelationConfig.plan)。
+映射时只遍历一次表单，取出需要的控件，全部找到后提前结束。
+
+关联字段的 code 支持三种形式:
+    widget_id                 -- 表单控件
+    widget_id.child_widget_id -- 明细(fieldList)控件中的子控件，按行返回列表
+    $attribute                -- 审批实例的属性，如 $serial_number，不需要解析表单
+"""
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+from typing import Any
+
+import orjson
+
+from src.lib import const
+
+
+if TYPE_CHECKING:
+    from src.lib.schema import RelationItem
+
+
+class RelationPlan:
+    """关联字段映射计划."""
+
+    __slots__ = ("_top", "_nested", "_computed")
+
+    def __init__(self, items: Iterable["RelationItem"]) -> None:
+        """编译映射计划.
+
+        Args:
+            items: 关联字段配置.
+        """
+        # 控件 id -> [(api_key, 是否只取值)]
+        self._top: dict[str, list[tuple[str, bool]]] = {}
+        # 明细控件 id -> 子控件 id -> [(api_key, 是否只取值)]
+        self._nested: dict[str, dict[str, list[tuple[str, bool]]]] = {}
+        # [(api_key, 审批实例属性名)]
+        self._computed: list[tuple[str, str]] = []
+
+        for item in items:
+            if item.code.startswith(const.RELATION_COMPUTED_PREFIX):
+                self._computed.append((item.api_key, item.code.removeprefix(const.RELATION_COMPUTED_PREFIX)))
+            elif const.RELATION_NESTED_DELIMITER in item.code:
+                parent, child = item.code.split(const.RELATION_NESTED_DELIMITER, 1)
+                self._nested.setdefault(parent, {}).setdefault(child, []).append((item.api_key, item.value_only))
+            else:
+                self._top.setdefault(item.code, []).append((item.api_key, item.value_only))
+
+    @property
+    def needs_form(self) -> bool:
+        """是否需要解析表单."""
+        return bool(self._top or self._nested)
+
+    @property
+    def needs_instance(self) -> bool:
+        """是否需要审批实例详情，没有任何关联字段时不需要."""
+        return bool(self._computed) or self.needs_form
+
+    def apply(self, instance: Any) -> dict[str, Any]:
+        """按计划从审批实例中取出关联字段.
+
+        Args:
+            instance: 审批实例详情，需要有 form 属性(JSON 字符串)，计算字段从同名属性读取.
+
+        Returns:
+            api_key -> 控件(或控件的值)，明细子控件为按行排列的列表，缺失的行为 None.
+        """
+        metadata: dict[str, Any] = {
+            api_key: getattr(instance, attribute, None) for api_key, attribute in self._computed
+        }
+        if not self.needs_form or not instance.form:
+            return metadata
+
+        remaining = len(self._top.keys() | self._nested.keys())
+        for component in orjson.loads(instance.form):
+            component_id = component.get("id")
+            matched = False
+            if component_id in self._top:
+                matched = True
+                for api_key, value_only in self._top[component_id]:
+                    metadata[api_key] = component.get("value") if value_only else component
+            if component_id in self._nested:
+                matched = True
+                self._apply_nested(self._nested[component_id], component.get("value") or [], metadata)
+            if matched:
+                remaining -= 1
+                if remaining == 0:
+                    break
+        return metadata
+
+    @staticmethod
+    def _apply_nested(
+        children: dict[str, list[tuple[str, bool]]], rows: list[list[dict[str, Any]]], metadata: dict[str, Any]
+    ) -> None:
+        """取出明细控件中每一行的子控件."""
+        if not isinstance(rows, list):
+            rows = []
+        columns: dict[str, list[Any]] = {}
+        for api_key, _ in (target for targets in children.values() for target in targets):
+            columns[api_key] = metadata[api_key] = [None] * len(rows)
+        for index, row in enumerate(rows):
+            for child in row if isinstance(row, list) else []:
+                targets = children.get(child.get("id"))
+                if targets is None:
+                    continue
+                for api_key, value_only in targets:
+                    columns[api_key][index] = child.get("value") if value_only else child
@@ -0,0 +1,128 @@
+"""容错模块.
+
+1. 熔断器
+2. 并发隔离
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator
+
+from src.lib import exceptions
+
+
+class CircuitBreaker:
+    """熔断器.
+
+    连续失败达到阈值后打开，打开期间的请求直接失败；冷却时间过后进入半开状态，
+    只放行一个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        """初始化熔断器.
+
+        Args:
+            name: 名称，用于日志和报错信息.
+            failure_threshold: 打开熔断器的连续失败次数.
+            reset_timeout: 打开后进入半开状态的冷却时间(秒).
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """请求前检查是否允许通过.
+
+        Raises:
+            CircuitOpenException: 熔断器打开或半开状态下已有试探请求.
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise exceptions.CircuitOpenException(f"circuit breaker: {self.name} is open!")
+            self.state = self.HALF_OPEN
+            self._probing = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise exceptions.CircuitOpenException(f"circuit breaker: {self.name} is half open!")
+            self._probing = True
+
+    def on_success(self) -> None:
+        """记录成功，关闭熔断器."""
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def on_failure(self) -> None:
+        """记录失败，达到阈值或试探失败时打开熔断器."""
+        self._failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def on_cancel(self) -> None:
+        """请求被取消，不计为成功或失败，只释放半开状态下的试探名额."""
+        self._probing = False
+
+    @contextlib.asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """保护一次请求，退出时总会记录结果，请求被取消时也不会一直占用试探名额.
+
+        Raises:
+            CircuitOpenException: 熔断器打开或半开状态下已有试探请求.
+        """
+        self.before_call()
+        try:
+            yield
+        except Exception:
+            self.on_failure()
+            raise
+        except BaseException:
+            self.on_cancel()
+            raise
+        self.on_success()
+
+
+class Bulkhead:
+    """并发隔离.
+
+    限制同一资源的并发数，名额用尽时短暂等待后快速失败，避免一个慢资源占满所有协程。
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_wait: float) -> None:
+        """初始化.
+
+        Args:
+            name: 名称，用于报错信息.
+            max_concurrency: 最大并发数.
+            max_wait: 名额用尽时的最长等待时间(秒).
+        """
+        self.name = name
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """占用一个名额.
+
+        Raises:
+            BulkheadFullException: 等待超时仍未获得名额.
+        """
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except TimeoutError:
+            raise exceptions.BulkheadFullException(f"bulkhead: {self.name} is full!") from None
+        try:
+            yield
+        finally:
+            self._semaphore.release()
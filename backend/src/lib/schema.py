@@ -1,11 +1,15 @@
 """结构体模块."""
 
+import functools
 from typing import Any
 
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import field_validator
 
+from src.lib import const
 from src.lib import enum
+from src.lib.relation import RelationPlan
 
 
 class HTTPResponse(BaseModel):
@@ -47,6 +51,26 @@ class LarkEventContext(BaseModel):
     event: dict = Field({}, description="事件详情(all versions)")
 
 
+class LarkApprovalTaskEvent(BaseModel):
+    """审批任务状态变更事件(approval_task)的事件详情."""
+
+    approval_code: str = Field("", description="审批定义 code")
+    instance_code: str = Field("", description="审批实例 code")
+    task_id: str = Field("", description="审批任务 id")
+    user_id: str = Field("", description="审批人 user id")
+    status: str = Field("", description="审批任务状态")
+    def_key: str | None = Field(None, description="审批节点 id，对应审批定义中的 node_id")
+    custom_key: str | None = Field(None, description="审批节点自定义 id，对应审批定义中的 custom_node_id")
+
+
+class LarkApprovalInstanceEvent(BaseModel):
+    """审批实例状态变更事件(approval_instance)的事件详情."""
+
+    approval_code: str = Field("", description="审批定义 code")
+    instance_code: str = Field("", description="审批实例 code")
+    status: str = Field("", description="审批实例状态")
+
+
 class LarkCheckOrExecuteCallback(BaseModel):
     """检查或执行节点的回调结构."""
 
@@ -56,6 +80,22 @@ class LarkCheckOrExecuteCallback(BaseModel):
     error: str = Field("", description="错误描述")
 
 
+class LarkCheckOrExecuteBatchCallback(BaseModel):
+    """批量检查或执行节点的回调结构."""
+
+    items: list[LarkCheckOrExecuteCallback] = Field(
+        min_length=1, max_length=const.LARK_BATCH_CALLBACK_MAX_ITEMS, description="回调列表"
+    )
+
+
+class LarkCheckOrExecuteBatchResult(BaseModel):
+    """批量回调中单个工单的处理结果."""
+
+    ticket_id: str = Field(description="工单标识符")
+    success: bool = Field(description="是否已提交到飞书: True 成功 False 失败")
+    error: str = Field("", description="失败原因")
+
+
 class LarkExternalField(BaseModel):
     """飞书外部字段调用参数."""
 
@@ -65,12 +105,26 @@ class LarkExternalField(BaseModel):
     query: str | None = Field(None, description="搜索关键词")
 
 
+class RetryPolicy(BaseModel):
+    """请求重试策略."""
+
+    max_attempts: int = Field(1, ge=1, le=10, description="最大请求次数(包含首次请求)")
+    backoff: float = Field(0.5, ge=0, description="重试基础等待时间(秒)，按指数增长")
+    timeout: float = Field(5, gt=0, description="单次请求超时时间(秒)")
+
+    @property
+    def worst_case_seconds(self) -> float:
+        """全部请求都超时时的总耗时(秒)."""
+        return self.max_attempts * self.timeout + self.backoff * (2 ** (self.max_attempts - 1) - 1)
+
+
 class CheckConfig(BaseModel):
     """检查节点配置."""
 
     is_open: bool = Field(description="是否开启检查节点: True 开启 False 关闭")
     url: str = Field("", description="检查请求的 api 地址")
     call_type: enum.APICallType = Field(description="请求类型")
+    retry: RetryPolicy = Field(default_factory=RetryPolicy, description="重试策略")
 
 
 class ExecuteConfig(BaseModel):
@@ -79,6 +133,7 @@ class ExecuteConfig(BaseModel):
     is_open: bool = Field(description="是否开启执行节点: True 开启 False 关闭")
     url: str = Field("", description="执行请求的 api 地址")
     call_type: enum.APICallType = Field(description="请求类型")
+    retry: RetryPolicy = Field(default_factory=RetryPolicy, description="重试策略")
 
 
 class FieldItem(BaseModel):
@@ -86,6 +141,7 @@ class FieldItem(BaseModel):
 
     code: str = Field(description="飞书字段唯一标识")
     url: str = Field(description="请求地址")
+    cache_ttl: float = Field(0, ge=0, description="响应缓存时间(秒)，0 表示不缓存，开启后会预取下一页")
 
 
 class FieldConfig(BaseModel):
@@ -98,8 +154,20 @@ class FieldConfig(BaseModel):
 class RelationItem(BaseModel):
     """字段关联的动态配置."""
 
-    code: str = Field(description="飞书字段唯一标识")
+    code: str = Field(
+        description="飞书字段唯一标识，明细中的子控件为 明细控件id.子控件id，审批实例属性为 $属性名(如 $serial_number)"
+    )
     api_key: str = Field(description="要转换成的字段名称")
+    value_only: bool = Field(False, description="是否只取控件的值: True 只取 value False 取整个控件")
+
+    @field_validator("code")
+    @classmethod
+    def check_instance_attribute(cls, code: str) -> str:
+        """审批实例属性只能是 RELATION_INSTANCE_ATTRIBUTES 中的属性，其他属性可能无法序列化为 JSON."""
+        attribute = code.removeprefix(const.RELATION_COMPUTED_PREFIX)
+        if code.startswith(const.RELATION_COMPUTED_PREFIX) and attribute not in const.RELATION_INSTANCE_ATTRIBUTES:
+            raise ValueError(f"unsupported instance attribute: {attribute}")
+        return code
 
 
 class RelationConfig(BaseModel):
@@ -108,6 +176,11 @@ class RelationConfig(BaseModel):
     is_open: bool = Field(description="是否开启字段关联: True 开启 False 关闭")
     data: list[RelationItem] = Field(description="动态配置")
 
+    @functools.cached_property
+    def plan(self) -> RelationPlan:
+        """编译后的映射计划，配置更新后随新的配置对象重新编译."""
+        return RelationPlan(self.data)
+
 
 class Config(BaseModel):
     """审批配置."""
@@ -0,0 +1,135 @@
+"""工单台账模块.
+
+回调和后台任务中只把工单变更写入进程内缓冲区，由后台协程定时批量写入 tb_ticket，
+台账写入变慢或失败不会影响审批流程。同一工单在一个批次内的多次变更会被合并。
+"""
+
+import asyncio
+from typing import Any
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.base import sessionmanager
+from src.db.ticket import TicketModel
+from src.lib import const
+from src.lib import enum
+from src.lib import job
+from src.lib import metrics
+
+
+dropped_records = metrics.Counter("lark_ticket_ticket_dropped_records_total", "缓冲区已满被丢弃的工单变更数")
+flushed_records = metrics.Counter("lark_ticket_ticket_flushed_records_total", "写入台账的工单数", ["result"])
+
+
+class TicketRecorder:
+    """批量写入工单台账."""
+
+    def __init__(self, buffer_size: int, batch_size: int, flush_interval: float) -> None:
+        """初始化.
+
+        Args:
+            buffer_size: 缓冲区最多容纳的工单数，写满后丢弃新工单的变更.
+            batch_size: 单条 SQL 写入的最大工单数.
+            flush_interval: 写入间隔(秒).
+        """
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: dict[str, dict[str, Any]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def record(self, ticket_id: str, status: enum.TicketStatus, **values: Any) -> None:
+        """记录工单变更.
+
+        Args:
+            ticket_id: 工单标识符，格式为 approval_code|instance_code|task_id.
+            status: 工单状态.
+            **values: 其他字段，如 node、comment.
+        """
+        row = self._buffer.get(ticket_id)
+        if row is None:
+            if len(self._buffer) >= self.buffer_size:
+                dropped_records.inc()
+                return
+            approval_code, instance_code, task_id = ticket_id.split(const.LARK_TICKET_ID_DELIMITER)
+            row = self._buffer[ticket_id] = {
+                "ticket_id": ticket_id,
+                "approval_code": approval_code,
+                "instance_code": instance_code,
+                "task_id": task_id,
+            }
+        if "comment" in values:
+            values["comment"] = values["comment"][: const.TICKET_COMMENT_MAX_LENGTH]
+        row.update(values, status=status.value)
+
+    async def start(self) -> None:
+        """启动写入协程."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止写入协程并写入缓冲区中剩余的变更."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """写入缓冲区中的变更，失败时放回缓冲区等待下次写入."""
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, {}
+
+        # 同一条 INSERT 中各行的字段需要相同
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for row in buffer.values():
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        for rows in groups.values():
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start : start + self.batch_size]
+                try:
+                    async with sessionmanager.session() as session:
+                        await TicketModel.upsert(session, batch)
+                        await session.commit()
+                except Exception as e:
+                    flushed_records.labels(result="failure").inc(len(batch))
+                    logger.warning(f"[ticket][flush failed] tickets: {len(batch)} error: {e!r}")
+                    self._restore(batch)
+                else:
+                    flushed_records.labels(result="success").inc(len(batch))
+
+    def _restore(self, rows: list[dict[str, Any]]) -> None:
+        """把写入失败的变更放回缓冲区，期间产生的新变更优先."""
+        for row in rows:
+            newer = self._buffer.get(row["ticket_id"])
+            if newer is not None:
+                self._buffer[row["ticket_id"]] = {**row, **newer}
+            elif len(self._buffer) < self.buffer_size:
+                self._buffer[row["ticket_id"]] = row
+            else:
+                dropped_records.inc()
+
+    async def _run(self) -> None:
+        """定时写入."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+recorder = TicketRecorder(
+    buffer_size=const.TICKET_BUFFER_SIZE,
+    batch_size=const.TICKET_FLUSH_BATCH_SIZE,
+    flush_interval=const.TICKET_FLUSH_INTERVAL_SECONDS,
+)
+
+
+@job.every(const.TICKET_PURGE_INTERVAL_SECONDS)
+async def purge_tickets(session: AsyncSession) -> None:
+    """清理保留期之外的工单."""
+    deleted = await TicketModel.purge(session, const.TICKET_RETENTION_DAYS, const.TICKET_PURGE_BATCH_SIZE)
+    if deleted:
+        logger.info(f"[ticket][purged] tickets: {deleted}")
@@ -0,0 +1,312 @@
+"""链路追踪模块.
+
+按 OpenTelemetry 的数据模型记录 span，通过 contextvars 在协程间传递当前 span，
+通过 W3C traceparent 请求头在服务间传递，通过 tb_job.traceparent 在后台任务间传递。
+
+span 结束后放入有界缓冲区，由后台协程批量导出到本地文件(JSON 行)或 OTLP/HTTP(JSON)收集器。
+"""
+
+import asyncio
+import contextlib
+import os
+import random
+import re
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import Any
+
+import httpx
+import orjson
+from asyncer import asyncify
+from loguru import logger
+
+from src.lib import const
+from src.lib import enum
+from src.lib import metrics
+from src.lib.config import settings
+
+
+dropped_spans = metrics.Counter("lark_ticket_tracing_dropped_spans_total", "缓冲区已满被丢弃的 span 数")
+
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# OTLP 中的 span 类型取值
+_OTLP_SPAN_KIND = {enum.SpanKind.INTERNAL: 1, enum.SpanKind.SERVER: 2, enum.SpanKind.CLIENT: 3}
+
+
+class Span:
+    """一次操作的耗时记录."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, kind: enum.SpanKind, trace_id: str, parent_id: str | None, sampled: bool) -> None:
+        """初始化 span.
+
+        Args:
+            name: 名称.
+            kind: 类型.
+            trace_id: 所属链路 id.
+            parent_id: 父 span id，根 span 为 None.
+            sampled: 是否采样，未采样的 span 只用于传递链路 id，不会被导出.
+        """
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: dict[str, Any] = {}
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent 请求头."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """设置属性.
+
+        Args:
+            key: 属性名.
+            value: 属性值.
+        """
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为导出到文件的格式."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind.value,
+            "start_time_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        """转换为 OTLP/JSON 格式."""
+        error = self.attributes.get("error")
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _OTLP_SPAN_KIND[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            # 1: OK 2: ERROR
+            "status": {"code": 2, "message": str(error)} if error is not None else {"code": 1},
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    """转换为 OTLP/JSON 的属性格式."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+_current: ContextVar[Span | None] = ContextVar("lark_ticket_current_span", default=None)
+
+
+def current() -> Span | None:
+    """获取当前 span."""
+    return _current.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """设置当前 span 的属性，不在任何 span 中时忽略.
+
+    Args:
+        key: 属性名.
+        value: 属性值.
+    """
+    span = _current.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def traceparent() -> str | None:
+    """获取当前 span 的 W3C traceparent，用于传递给下游或后台任务."""
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+def inject(headers: dict[str, str] | None) -> dict[str, str] | None:
+    """向请求头注入当前链路上下文.
+
+    Args:
+        headers: 原请求头，不会被修改.
+
+    Returns:
+        注入后的请求头，不在任何 span 中时原样返回.
+    """
+    value = traceparent()
+    if value is None:
+        return headers
+    return {**(headers or {}), const.TRACING_TRACEPARENT_HEADER: value}
+
+
+@contextlib.contextmanager
+def span(
+    name: str,
+    kind: enum.SpanKind = enum.SpanKind.INTERNAL,
+    parent: str | None = None,
+    **attributes: Any,
+) -> Iterator[Span]:
+    """记录一个 span，并在代码块内将其设为当前 span.
+
+    Args:
+        name: 名称.
+        kind: 类型.
+        parent: 远端父 span 的 traceparent，如请求头或后台任务中保存的值；为空时使用当前 span.
+        **attributes: 初始属性.
+
+    Yields:
+        Span 对象.
+    """
+    parent_span = _current.get()
+    remote = _TRACEPARENT_PATTERN.match(parent) if parent else None
+    if remote is not None:
+        trace_id, parent_id, sampled = remote.group(1), remote.group(2), remote.group(3) == "01"
+    elif parent_span is not None:
+        trace_id, parent_id, sampled = parent_span.trace_id, parent_span.span_id, parent_span.sampled
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = settings.tracing.enabled and random.random() < settings.tracing.sample_rate
+
+    current_span = Span(name, kind, trace_id, parent_id, sampled)
+    current_span.attributes.update(attributes)
+    token = _current.set(current_span)
+    try:
+        yield current_span
+    except BaseException as e:
+        current_span.set_attribute("error", repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        current_span.end_ns = time.time_ns()
+        if current_span.sampled and settings.tracing.enabled:
+            exporter.add(current_span)
+
+
+class SpanExporter:
+    """批量导出 span."""
+
+    def __init__(self, exporter: enum.TracingExporter, path: str, endpoint: str, buffer_size: int) -> None:
+        """初始化导出器.
+
+        Args:
+            exporter: 导出方式.
+            path: 导出到文件时的文件路径.
+            endpoint: 导出到 OTLP 时的收集器地址.
+            buffer_size: 缓冲区容量，写满后丢弃新的 span.
+        """
+        self.exporter = exporter
+        self.path = path
+        self.endpoint = endpoint
+        self.buffer_size = buffer_size
+        self._buffer: list[Span] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    def add(self, span: Span) -> None:
+        """放入缓冲区.
+
+        Args:
+            span: 已结束的 span.
+        """
+        if len(self._buffer) >= self.buffer_size:
+            dropped_spans.inc()
+            return
+        self._buffer.append(span)
+        if len(self._buffer) >= const.TRACING_EXPORT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """启动导出协程，未开启链路追踪时不启动."""
+        if self._task is None and settings.tracing.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止导出协程并导出缓冲区中剩余的 span."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def flush(self) -> None:
+        """导出缓冲区中的 span."""
+        while self._buffer:
+            batch = self._buffer[: const.TRACING_EXPORT_BATCH_SIZE]
+            del self._buffer[: const.TRACING_EXPORT_BATCH_SIZE]
+            try:
+                if self.exporter == enum.TracingExporter.OTLP:
+                    await self._export_otlp(batch)
+                else:
+                    await asyncify(self._export_file)(batch)
+            except Exception as e:
+                logger.warning(f"[tracing][export failed] spans: {len(batch)} error: {e!r}")
+
+    async def _run(self) -> None:
+        """定时或缓冲区达到批量大小时导出."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=const.TRACING_EXPORT_INTERVAL_SECONDS)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _export_file(self, batch: list[Span]) -> None:
+        """追加写入 JSON 行文件."""
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(span.to_dict(), option=orjson.OPT_APPEND_NEWLINE) for span in batch))
+
+    async def _export_otlp(self, batch: list[Span]) -> None:
+        """按 OTLP/HTTP JSON 协议发送到收集器."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=const.TRACING_EXPORT_TIMEOUT_SECONDS)
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", settings.basic.app_name),
+                            _otlp_attribute("process.pid", os.getpid()),
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": settings.basic.app_name}, "spans": [span.to_otlp() for span in batch]}
+                    ],
+                }
+            ]
+        }
+        response = await self._client.post(
+            self.endpoint, content=orjson.dumps(body), headers={"content-type": "application/json"}
+        )
+        response.raise_for_status()
+
+
+exporter = SpanExporter(
+    exporter=settings.tracing.exporter,
+    path=settings.tracing.path,
+    endpoint=settings.tracing.endpoint,
+    buffer_size=settings.tracing.buffer_size,
+)
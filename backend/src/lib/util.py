@@ -1,20 +1,24 @@
 """工具模块."""
 
 import base64
+import functools
 import hashlib
-import socket
-import time
+import importlib.util
 from typing import Any
 
 import httpx
 import orjson
+from asyncer import asyncify
 from Crypto.Cipher import AES
 from loguru import logger
 
 from src.lib import const
 from src.lib import enum
+from src.lib import log
 from src.lib import schema
+from src.lib import tracing
 from src.lib.config import settings
+from src.lib.exceptions import IgnoreException
 
 
 def make_response_ok(resp: dict[str, Any] | None = None) -> dict[str, Any]:
@@ -51,25 +55,41 @@ def make_response_not_ok(error: str) -> dict[str, Any]:
     }
 
 
-def scheduler_lock() -> bool:
-    """尝试获取调度锁.
+def encode_cursor(*values: Any) -> str:
+    """编码分页游标.
+
+    Args:
+        *values: 上一页最后一行的排序字段值.
 
     Returns:
-        如果锁已经被占用，返回 True 否则返回 False.
+        URL 安全的游标字符串.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode(const.UTF_8)
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """解码分页游标.
+
+    Args:
+        cursor: encode_cursor 生成的游标.
+
+    Returns:
+        排序字段值.
+
+    Raises:
+        IgnoreException: 游标格式错误.
     """
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.bind((settings.scheduler_lock.host, settings.scheduler_lock.port))
-    except OSError:
-        return True
-    else:
-        time.sleep(const.SCHEDULER_DETECTION_INTERVAL_SECOND)
-        return False
+        return orjson.loads(base64.urlsafe_b64decode(cursor.encode(const.UTF_8)))
+    except ValueError:
+        raise IgnoreException(f"cursor: {cursor} is invalid!")
 
 
 def log_format(response: httpx.Response, title: str, desc: str) -> str:
     """格式化日志信息.
 
+    开销较大，应放在 logger.opt(lazy=True) 的 lambda 中调用.
+
     Args:
         response: httpx 响应对象.
         title: 日志标题.
@@ -80,29 +100,116 @@ def log_format(response: httpx.Response, title: str, desc: str) -> str:
     """
     return (
         f"[{title}] {desc} - {response.request.method} - url: {response.url} header: {dict(response.request.headers)} "
-        f"body: {response.request.content.decode()} response: {response.text}"
+        f"body: {log.payload(response.request.content.decode())} response: {log.payload(response.text)}"
     )
 
 
-async def do_post(url: str, data: dict, header: dict | None = None) -> schema.LarkCheckOrExecuteCallback:
-    """发送 POST 请求.
+class HTTPClientRegistry:
+    """出站 HTTP 客户端管理.
+
+    按目标 host 复用 httpx.AsyncClient，每个 host 独立的连接池和连接数限制，
+    避免每次请求都重新进行 TCP 和 TLS 握手。
+    """
+
+    def __init__(self) -> None:
+        """初始化客户端管理器."""
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._http2 = settings.http.http2
+        if self._http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(const.HTTP_H2_NOT_INSTALLED_PROMPT_MESSAGE)
+            self._http2 = False
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """获取目标地址对应 host 的客户端，不存在时创建.
+
+        Args:
+            url: 请求的 URL.
+
+        Returns:
+            httpx.AsyncClient 对象.
+        """
+        key = self.key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._clients[key] = httpx.AsyncClient(
+                headers=const.HTTP_JSON_HEADER,
+                timeout=settings.http.timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.http.max_connections,
+                    max_keepalive_connections=settings.http.max_keepalive_connections,
+                    keepalive_expiry=settings.http.keepalive_expiry,
+                ),
+                http2=self._http2,
+            )
+        return client
+
+    @staticmethod
+    def key(url: str) -> str:
+        """获取目标地址的 scheme 和 host，作为连接池的键.
+
+        Args:
+            url: 请求的 URL.
+
+        Returns:
+            如 https://example.com:8443
+        """
+        target = httpx.URL(url)
+        return f"{target.scheme}://{target.netloc.decode(const.UTF_8)}"
+
+    def after_fork(self) -> None:
+        """在 fork 出的子进程中丢弃从父进程继承的客户端，首次使用时重新创建."""
+        self._clients = {}
+
+    async def close(self) -> None:
+        """关闭所有客户端."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+http_clients = HTTPClientRegistry()
+
+
+async def do_post(
+    url: str, data: dict, header: dict | None = None, timeout: float | None = None
+) -> schema.LarkCheckOrExecuteCallback:
+    """发送 POST 请求，响应为检查、执行结果.
 
     Args:
         url: 请求的 URL.
         data: 请求体数据.
         header: 请求头，默认为 None.
+        timeout: 超时时间(秒)，默认使用 [HTTP] 中的配置.
 
     Returns:
         LarkCheckOrExecuteCallback 对象.
     """
-    async with httpx.AsyncClient(
-        headers={**const.HTTP_JSON_HEADER, **(header or {})},
-        timeout=const.HTTP_REQUEST_TIMEOUT_SECONDS,
-    ) as client:
-        r = await client.post(url, json=data)
-        logger.info(log_format(r, __name__, "send post request"))
-        assert r.status_code in const.HTTP_SUCCESS_STATUS_CODE, r.text
-        return schema.LarkCheckOrExecuteCallback(**r.json())
+    return schema.LarkCheckOrExecuteCallback(**await do_post_json(url, data, header, timeout))
+
+
+async def do_post_json(url: str, data: dict, header: dict | None = None, timeout: float | None = None) -> Any:
+    """发送 POST 请求，返回解析后的 JSON 响应.
+
+    Args:
+        url: 请求的 URL.
+        data: 请求体数据.
+        header: 请求头，默认为 None.
+        timeout: 超时时间(秒)，默认使用 [HTTP] 中的配置.
+
+    Returns:
+        响应数据.
+    """
+    with tracing.span("http POST", enum.SpanKind.CLIENT, url=url) as span:
+        r = await http_clients.get(url).post(
+            url,
+            json=data,
+            headers=tracing.inject(header),
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
+        span.set_attribute("status_code", r.status_code)
+    logger.opt(lazy=True).info("{}", lambda: log_format(r, __name__, "send post request"))
+    assert r.status_code in const.HTTP_SUCCESS_STATUS_CODE, r.text
+    return r.json()
 
 
 async def do_get(url: str, params: dict, header: dict | None = None) -> dict[str, Any]:
@@ -116,14 +223,12 @@ async def do_get(url: str, params: dict, header: dict | None = None) -> dict[str
     Returns:
         请求的响应数据.
     """
-    async with httpx.AsyncClient(
-        headers={**const.HTTP_JSON_HEADER, **(header or {})},
-        timeout=const.HTTP_REQUEST_TIMEOUT_SECONDS,
-    ) as client:
-        r = await client.get(url, params=params)
-        logger.info(log_format(r, __name__, "send get request"))
-        assert r.status_code in const.HTTP_SUCCESS_STATUS_CODE, r.text
-        return r.json()
+    with tracing.span("http GET", enum.SpanKind.CLIENT, url=url) as span:
+        r = await http_clients.get(url).get(url, params=params, headers=tracing.inject(header))
+        span.set_attribute("status_code", r.status_code)
+    logger.opt(lazy=True).info("{}", lambda: log_format(r, __name__, "send get request"))
+    assert r.status_code in const.HTTP_SUCCESS_STATUS_CODE, r.text
+    return r.json()
 
 
 class _AESCipher:
@@ -168,6 +273,19 @@ class _AESCipher:
         return self.decrypt(enc).decode(const.UTF_8)
 
 
+@functools.lru_cache(maxsize=const.LARK_DECRYPT_CIPHER_CACHE_SIZE)
+def _get_cipher(key: str) -> _AESCipher:
+    """获取解密器，密钥摘要每个进程只计算一次.
+
+    Args:
+        key: 用于解密的密钥.
+
+    Returns:
+        解密器.
+    """
+    return _AESCipher(key)
+
+
 def decrypt(content: str) -> schema.LarkEventContext:
     """解密内容并转换为 LarkEventContext 对象.
 
@@ -177,4 +295,21 @@ def decrypt(content: str) -> schema.LarkEventContext:
     Returns:
         LarkEventContext 对象.
     """
-    return schema.LarkEventContext(**orjson.loads(_AESCipher(settings.lark.encrypt_key).decrypt_str(content)))
+    return schema.LarkEventContext(**orjson.loads(_get_cipher(settings.lark.encrypt_key).decrypt_str(content)))
+
+
+async def decrypt_async(content: str) -> schema.LarkEventContext:
+    """在事件循环中解密内容.
+
+    普通回调只有几百字节，解密耗时远小于线程切换的开销，直接在当前线程执行；
+    超过阈值的内容才放到线程池，避免阻塞事件循环.
+
+    Args:
+        content: 加密的内容.
+
+    Returns:
+        LarkEventContext 对象.
+    """
+    if len(content) <= const.LARK_DECRYPT_INLINE_MAX_LENGTH:
+        return decrypt(content)
+    return await asyncify(decrypt)(content)
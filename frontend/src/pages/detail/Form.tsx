@@ -1,4 +1,4 @@
-import { message, Form, Input, Divider, Radio, Button, Space, Select } from 'antd';
+import { message, Form, Input, InputNumber, Divider, Radio, Button, Space, Select, Checkbox } from 'antd';
 import { useEffect, useState } from 'react';
 import type { IFormField, IFieldItem } from './interface';
 import { useLocation, useNavigate } from 'react-router-dom';
@@ -118,8 +118,8 @@ const Index = () => {
       form={form}
       onFinish={handleFinish}
       initialValues={{
-        check: { is_open: false },
-        execute: { is_open: false },
+        check: { is_open: false, retry: { max_attempts: 1, backoff: 0.5, timeout: 5 } },
+        execute: { is_open: false, retry: { max_attempts: 1, backoff: 0.5, timeout: 5 } },
         field: { is_open: false },
         relation: { is_open: false },
       }}
@@ -162,6 +162,21 @@ const Index = () => {
           >
             <Input placeholder="请输入url地址" />
           </Form.Item>
+          <Space align="baseline">
+            <Form.Item
+              name={['check', 'retry', 'max_attempts']}
+              label="最大请求次数"
+              tooltip="大于 1 时失败后会重新发送同一请求，业务方接口需要按 ticket_id 去重"
+            >
+              <InputNumber min={1} max={10} precision={0} />
+            </Form.Item>
+            <Form.Item name={['check', 'retry', 'backoff']} label="重试间隔(秒)">
+              <InputNumber min={0} step={0.5} />
+            </Form.Item>
+            <Form.Item name={['check', 'retry', 'timeout']} label="超时时间(秒)">
+              <InputNumber min={0.1} step={1} />
+            </Form.Item>
+          </Space>
         </>
       )}
 
@@ -195,6 +210,21 @@ const Index = () => {
           >
             <Input placeholder="请输入url地址" />
           </Form.Item>
+          <Space align="baseline">
+            <Form.Item
+              name={['execute', 'retry', 'max_attempts']}
+              label="最大请求次数"
+              tooltip="大于 1 时失败后会重新发送同一请求，业务方接口需要按 ticket_id 去重"
+            >
+              <InputNumber min={1} max={10} precision={0} />
+            </Form.Item>
+            <Form.Item name={['execute', 'retry', 'backoff']} label="重试间隔(秒)">
+              <InputNumber min={0} step={0.5} />
+            </Form.Item>
+            <Form.Item name={['execute', 'retry', 'timeout']} label="超时时间(秒)">
+              <InputNumber min={0.1} step={1} />
+            </Form.Item>
+          </Space>
         </>
       )}
 
@@ -221,9 +251,11 @@ const Index = () => {
                     rules={[{ required: true, message: 'Missing code' }]}
                   >
                     <Select placeholder="code" style={{ width: '200px' }}>
-                      {fieldList.map(item => (
-                        <Select.Option value={item.value}>{item.label}</Select.Option>
-                      ))}
+                      {fieldList
+                        .filter(item => !item.value.includes('.') && !item.value.startsWith('$'))
+                        .map(item => (
+                          <Select.Option value={item.value}>{item.label}</Select.Option>
+                        ))}
                     </Select>
                   </Form.Item>
                   <Form.Item
@@ -233,6 +265,9 @@ const Index = () => {
                   >
                     <Input placeholder="url" />
                   </Form.Item>
+                  <Form.Item {...restField} name={[name, 'cache_ttl']}>
+                    <InputNumber min={0} precision={0} addonAfter="秒" placeholder="缓存时间" />
+                  </Form.Item>
                   <span className="ml-4">
                     uri: {approvalCode + '/' + (showList[key]?.code || '')}
                   </span>
@@ -284,6 +319,9 @@ const Index = () => {
                   >
                     <Input placeholder="api_key" />
                   </Form.Item>
+                  <Form.Item {...restField} name={[name, 'value_only']} valuePropName="checked">
+                    <Checkbox>只取值</Checkbox>
+                  </Form.Item>
                   {!disabled && <MinusCircleOutlined onClick={() => remove(name)} />}
                 </Space>
               ))}
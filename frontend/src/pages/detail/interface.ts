@@ -1,3 +1,9 @@
+export interface IRetryPolicy {
+  max_attempts: number;
+  backoff: number;
+  timeout: number;
+}
+
 export interface IFormField {
   approval_code: string;
   name: string;
@@ -5,17 +11,20 @@ export interface IFormField {
     call_type: 'sync' | 'async';
     is_open: boolean;
     url: string;
+    retry?: IRetryPolicy;
   };
   execute: {
     call_type: 'sync' | 'async';
     is_open: boolean;
     url: string;
+    retry?: IRetryPolicy;
   };
   field: {
     is_open: boolean;
     data: {
       code: string;
       url: string;
+      cache_ttl?: number;
     }[];
   };
   relation: {
@@ -23,6 +32,7 @@ export interface IFormField {
     data: {
       api_key: string;
       code: string;
+      value_only?: boolean;
     }[];
   };
 }
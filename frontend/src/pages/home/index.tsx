@@ -1,5 +1,6 @@
 import Main from '@/components/Main';
-import { Table, Card, message, Button, Popconfirm } from 'antd';
+import { useState } from 'react';
+import { Table, Card, message, Button, Popconfirm, Input, Space } from 'antd';
 import { useRequest } from 'ahooks';
 import { Link } from 'react-router-dom';
 import type { TableProps } from 'antd';
@@ -8,20 +9,45 @@ import { localRequest, HTTP_SERVICE_CODE } from '@/utils/request';
 interface TableListItem {
   approval_code: string;
   name: string;
+  last_update_time: string;
 }
 
+interface TableListPage {
+  body: TableListItem[];
+  next_cursor: string | null;
+}
+
+const PAGE_SIZE = 20;
+
 const Home = () => {
   const [messageApi, contextHandler] = message.useMessage();
 
+  const [keyword, setKeyword] = useState('');
+  // 每一页的游标，第一页为空字符串
+  const [cursors, setCursors] = useState<string[]>(['']);
+  const cursor = cursors[cursors.length - 1];
+
   // 获取列表
-  const { run, data, loading } = useRequest(async () => {
-    const res = await localRequest<{ body: TableListItem[] }>('/configs', { method: 'GET' });
-    if (res.retcode !== HTTP_SERVICE_CODE.Success) {
-      messageApi.error(res.error);
-      return;
-    }
-    return res.resp.body;
-  });
+  const { run, data, loading } = useRequest(
+    async () => {
+      const params: Record<string, string> = { page_size: String(PAGE_SIZE) };
+      if (keyword) params.keyword = keyword;
+      if (cursor) params.cursor = cursor;
+      const res = await localRequest<TableListPage>('/configs', { method: 'GET', data: params });
+      if (res.retcode !== HTTP_SERVICE_CODE.Success) {
+        messageApi.error(res.error);
+        return;
+      }
+      return res.resp;
+    },
+    { refreshDeps: [keyword, cursor] },
+  );
+
+  // 搜索，从第一页开始
+  const search = (value: string) => {
+    setKeyword(value.trim());
+    setCursors(['']);
+  };
 
   // 删除
   const deleteItem = async (approval_code: string) => {
@@ -48,6 +74,12 @@ const Home = () => {
       dataIndex: 'approval_code',
       key: 'approval_code',
     },
+    {
+      title: '最后更新时间',
+      dataIndex: 'last_update_time',
+      key: 'last_update_time',
+      width: 200,
+    },
     {
       title: '操作',
       key: 'action',
@@ -79,6 +111,14 @@ const Home = () => {
     <Main>
       {contextHandler}
       <Card
+        title={
+          <Input.Search
+            placeholder="按审批配置名称或审批定义 code 前缀搜索"
+            allowClear
+            onSearch={search}
+            style={{ width: 360 }}
+          />
+        }
         extra={
           <Button type="primary">
             <Link to={`/detail`}>新增审批配置</Link>
@@ -88,11 +128,22 @@ const Home = () => {
         <Table
           rowKey="approval_code"
           loading={loading}
-          dataSource={data}
+          dataSource={data?.body}
           bordered
           columns={columns}
           pagination={false}
         />
+        <Space style={{ marginTop: 16, float: 'right' }}>
+          <Button disabled={cursors.length <= 1} onClick={() => setCursors(cursors.slice(0, -1))}>
+            上一页
+          </Button>
+          <Button
+            disabled={!data?.next_cursor}
+            onClick={() => data?.next_cursor && setCursors([...cursors, data.next_cursor])}
+          >
+            下一页
+          </Button>
+        </Space>
       </Card>
     </Main>
   );